@@ -1,6 +1,8 @@
-from typing import List, Optional
+from typing import Dict, List, Literal, Optional, Union
 from pydantic import BaseModel, Field
 
+FingerprintEncoding = Literal["none", "base64", "hex", "indices"]
+
 
 class SmilesInput(BaseModel):
     smiles: str = Field(description="SMILES string of the molecule")
@@ -17,6 +19,21 @@ class SinglePredictionRequest(BaseModel):
     molecule_name: Optional[str] = Field(
         default=None, description="Optional name for the molecule"
     )
+    models: Optional[List[str]] = Field(
+        default=None,
+        description="Names of extra served models to score the molecule with (see /model/info)",
+    )
+    fingerprint_encoding: Optional[FingerprintEncoding] = Field(
+        default=None,
+        description="Return the Morgan fingerprint in this encoding (defaults to FINGERPRINT_ENCODING, none)",
+    )
+
+
+class ModelPrediction(BaseModel):
+    bbb_probability: Optional[float] = None
+    prediction_class: Optional[str] = None
+    threshold: float
+    model_version: Optional[str] = None
 
 
 class SinglePredictionResponse(BaseModel):
@@ -25,12 +42,29 @@ class SinglePredictionResponse(BaseModel):
     status: str = Field(
         description="Processing status for this molecule (e.g., success, error_invalid_smiles)"
     )
+    prediction_id: Optional[str] = Field(
+        default=None,
+        description="Id of a successful prediction, accepted by /report/{id} and /explain for a while",
+    )
 
     # BBB Prediction specific
     bbb_probability: Optional[float] = None
     bbb_class: Optional[str] = None
     prediction_certainty: Optional[float] = None
     applicability_score: Optional[float] = None
+    bbb_probability_std: Optional[float] = Field(
+        default=None,
+        description="Standard deviation of the per-tree votes (ensemble disagreement)",
+    )
+    bbb_probability_ci_low: Optional[float] = Field(
+        default=None, description="Lower bound of the 95% interval of bbb_probability"
+    )
+    bbb_probability_ci_high: Optional[float] = Field(
+        default=None, description="Upper bound of the 95% interval of bbb_probability"
+    )
+    trees_evaluated: Optional[int] = Field(
+        default=None, description="Number of forest trees evaluated for the prediction"
+    )
 
     # Physicochemical properties
     mw: Optional[float] = Field(default=None, description="Molecular Weight (g/mol)")
@@ -90,6 +124,93 @@ class SinglePredictionResponse(BaseModel):
     fingerprint_hash: Optional[str] = Field(
         default=None, description="SHA256 hash of the canonical SMILES"
     )
+    model_predictions: Optional[Dict[str, ModelPrediction]] = Field(
+        default=None, description="Predictions of the extra models requested"
+    )
+    fingerprint: Optional[Union[str, List[int]]] = Field(
+        default=None,
+        description="Morgan fingerprint in fingerprint_encoding, when one was requested",
+    )
+    fingerprint_encoding: Optional[str] = Field(
+        default=None, description="Encoding of fingerprint: base64, hex or indices"
+    )
+
+
+class BitContributionRequest(BaseModel):
+    smiles: str = Field(description="SMILES string of the molecule")
+    top_n: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="Number of fingerprint bits to return (defaults to CONTRIBUTION_TOP_N)",
+    )
+
+
+class BitContribution(BaseModel):
+    bit: int = Field(description="Morgan fingerprint bit index")
+    contribution: float = Field(
+        description="Change in BBB probability attributed to this bit along the tree paths"
+    )
+    present: bool = Field(description="Whether the bit is set for this molecule")
+
+
+class BitContributionResponse(BaseModel):
+    smiles: str
+    status: str
+    bbb_probability: Optional[float] = None
+    bias: Optional[float] = Field(
+        default=None,
+        description="Mean probability at the tree roots; bias plus all contributions equals bbb_probability",
+    )
+    top_bits: List[BitContribution] = Field(default_factory=list)
+    processing_time_ms: Optional[float] = None
+    model_version: Optional[str] = None
+
+
+class AtomHighlightRequest(BaseModel):
+    smiles: str = Field(description="SMILES string of the molecule")
+    top_n: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="Number of set fingerprint bits to map onto atoms (defaults to CONTRIBUTION_TOP_N)",
+    )
+    include_svg: bool = Field(
+        default=False, description="Also return the molecule drawn with atom highlights"
+    )
+
+
+class BitEnvironment(BaseModel):
+    center: int = Field(description="Index of the environment's center atom")
+    radius: int = Field(description="Environment radius in bonds")
+
+
+class AtomHighlightBit(BaseModel):
+    bit: int
+    contribution: float
+    environments: List[BitEnvironment] = Field(default_factory=list)
+    atoms: List[int] = Field(
+        default_factory=list, description="Atoms covered by the bit's environments"
+    )
+
+
+class AtomHighlightResponse(BaseModel):
+    smiles: str
+    canonical_smiles: Optional[str] = None
+    status: str
+    bbb_probability: Optional[float] = None
+    bias: Optional[float] = None
+    atom_weights: List[float] = Field(
+        default_factory=list,
+        description="Contribution to the BBB probability per atom, in RDKit atom order",
+    )
+    bits: List[AtomHighlightBit] = Field(default_factory=list)
+    unmapped_contribution: Optional[float] = Field(
+        default=None,
+        description="Contribution of bits not mapped onto atoms (unset or outside top_n)",
+    )
+    svg: Optional[str] = None
+    cached: bool = False
+    processing_time_ms: Optional[float] = None
+    model_version: Optional[str] = None
 
 
 class BatchPredictionItem(BaseModel):
@@ -99,9 +220,28 @@ class BatchPredictionItem(BaseModel):
 
 class BatchPredictionRequest(BaseModel):
     molecules: List[BatchPredictionItem]
+    models: Optional[List[str]] = Field(
+        default=None,
+        description="Names of extra served models to score every molecule with",
+    )
+    fingerprint_encoding: Optional[FingerprintEncoding] = Field(
+        default=None,
+        description="Return the Morgan fingerprints in this encoding (defaults to FINGERPRINT_ENCODING, none)",
+    )
     # common_settings: Optional[dict] = None # Example if you have common settings
 
 
+class InlineBatchPredictionResponse(BaseModel):
+    results: List[SinglePredictionResponse] = Field(
+        description="One result per input molecule, in request order"
+    )
+    total: int
+    successful: int
+    failed: int
+    processing_time_ms: float
+    model_version: Optional[str] = None
+
+
 class BatchPredictionResponse(BaseModel):
     job_id: str
     message: str = "Batch prediction job started"
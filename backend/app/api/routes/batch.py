@@ -7,11 +7,20 @@ import uuid
 import pandas as pd
 import re
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
 import unicodedata
 import asyncio
-from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, UploadFile
-from fastapi.responses import StreamingResponse
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    File,
+    HTTPException,
+    Request,
+    UploadFile,
+)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
 import io
 from app.models.schemas import (
     BatchPredictionRequest,
@@ -19,8 +28,21 @@ from app.models.schemas import (
     BatchStatusResponse,
     JobStatus,
 )
+from app.ml.fingerprint_encoding import NONE, encode_fingerprint, resolve_encoding
 from app.ml.predictor import BBBPredictor
+from app.core.admission import BATCH, AdmissionController, get_admission
+from app.core.csv_upload import read_molecule_records
+from app.core.rate_limit import BATCH_MOLECULE, RateLimiter, get_rate_limiter
 from app.core.database import get_db
+from app.core.http_cache import (
+    NO_CACHE,
+    cache_control,
+    cache_headers,
+    etag_for,
+    etag_listed,
+    is_not_modified,
+    not_modified,
+)
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
@@ -128,9 +150,29 @@ async def process_batch_job(
     smiles_data: List[Dict[str, Any]],
     predictor: BBBPredictor,
     db: Any,
+    models: Optional[List[str]] = None,
+    admission: Optional[AdmissionController] = None,
+    fingerprint_encoding: str = NONE,
 ) -> None:
-    """Background task to process batch prediction job."""
+    """
+    Background task to process batch prediction job.
+
+    ``models`` names extra served models whose probability and class are added
+    to the results CSV as ``bbb_probability_<name>`` and ``prediction_class_<name>``.
+    ``fingerprint_encoding`` other than none adds a ``fingerprint`` column (set
+    bit indices ``;``-separated for indices).
+    ``admission`` holds the job's molecules as pending batch work; they are
+    released chunk by chunk as predictions complete.
+    """
     total_molecules = len(smiles_data)
+    released_molecules = 0
+
+    def release_completed(count: int) -> None:
+        nonlocal released_molecules
+        if admission is not None:
+            admission.release(BATCH, count)
+        released_molecules += count
+
     UPDATE_DB_INTERVAL = (
         250  # Update progress every N items (Increased from 50, previously 10)
     )
@@ -314,7 +356,12 @@ async def process_batch_job(
                 f"Job {job_id}: Calling predictor.predict_batch for {len(smiles_for_predictor_call)} SMILES strings."
             )
             results_from_batch_predict: List[Dict[str, Any]] = (
-                await predictor.predict_batch(smiles_for_predictor_call)
+                await predictor.predict_batch(
+                    smiles_for_predictor_call,
+                    top_bits=settings.BATCH_TOP_BITS,
+                    models=models,
+                    progress=release_completed,
+                )
             )
             logger.info(
                 f"Job {job_id}: Received {len(results_from_batch_predict)} results from predictor.predict_batch."
@@ -339,6 +386,30 @@ async def process_batch_job(
                     csv_row["bbb_confidence"] = csv_row.pop(
                         "prediction_certainty", None
                     )
+                    fingerprint = encode_fingerprint(
+                        csv_row.pop("fingerprint_on_bits", None), fingerprint_encoding
+                    )
+                    if fingerprint_encoding != NONE:
+                        csv_row["fingerprint"] = (
+                            ";".join(map(str, fingerprint))
+                            if isinstance(fingerprint, list)
+                            else fingerprint
+                        )
+                    if "top_bits" in csv_row:
+                        # One "bit:contribution" pair per entry, strongest first
+                        csv_row["top_bits"] = ";".join(
+                            f"{entry['bit']}:{entry['contribution']:+.4f}"
+                            for entry in csv_row["top_bits"] or []
+                        )
+                    for model_name, model_prediction in (
+                        csv_row.pop("model_predictions", None) or {}
+                    ).items():
+                        csv_row[f"bbb_probability_{model_name}"] = model_prediction[
+                            "bbb_probability"
+                        ]
+                        csv_row[f"prediction_class_{model_name}"] = model_prediction[
+                            "prediction_class"
+                        ]
 
                     # Ensure 'prediction_class' is present (already handled by predictor)
                     # Ensure 'error' field is handled for CSV (already handled below for res_dict, copy will have it)
@@ -636,6 +707,10 @@ async def process_batch_job(
             logger.error(
                 f"Failed to update job {job_id} status to FAILED in DB: {e_fail_update}"
             )
+    finally:
+        # Invalid inputs and anything left by a failure
+        if admission is not None:
+            admission.release(BATCH, total_molecules - released_molecules, completed=0)
 
 
 @router.get("/", response_model=List[BatchStatusResponse])
@@ -725,13 +800,23 @@ async def get_all_batch_jobs() -> List[BatchStatusResponse]:
 
 @router.post("/batch_predict_csv", response_model=BatchJobResponse)
 async def batch_predict_csv(
+    http_request: Request,
     background_tasks: BackgroundTasks,
     request: BatchPredictionRequest = Depends(),  # For job_name
     file: UploadFile = File(...),
     predictor: BBBPredictor = Depends(get_predictor),
     db: Any = Depends(get_db),
+    admission: AdmissionController = Depends(get_admission),
+    limiter: Optional[RateLimiter] = Depends(get_rate_limiter),
 ) -> BatchJobResponse:
-    """Accepts CSV file for batch BBB permeability prediction."""
+    """
+    Accepts CSV file for batch BBB permeability prediction.
+
+    The CSV is parsed as it is read: 413 once it is over MAX_FILE_SIZE_MB or
+    MAX_BATCH_SIZE rows, 400 when it is unreadable or has no smiles column.
+    Rejected with 503 and Retry-After while the pending batch work is at capacity,
+    and with 429 when the client's rate limit does not cover its molecules.
+    """
     job_id = str(uuid.uuid4())
     raw_job_name = (
         request.job_name or f"Batch Job {datetime.utcnow().strftime('%Y-%m-%d %H:%M')}"
@@ -759,122 +844,24 @@ async def batch_predict_csv(
         f"Received batch predict request for job_name: '{job_name}', assigned job_id: {job_id}"
     )
 
-    contents = await file.read()
-    logger.info(f"Job {job_id}: Read {len(contents)} bytes from uploaded file.")
-
-    if not contents:
-        raise HTTPException(status_code=400, detail="Uploaded file is empty.")
-
     try:
-        try:
-            # Try with utf-8-sig first to handle potential BOM
-            contents_decoded = contents.decode("utf-8-sig")
-            df = pd.read_csv(io.StringIO(contents_decoded))
-            logger.info(
-                f"Job {job_id}: Successfully decoded CSV as utf-8-sig and parsed."
-            )
-        except UnicodeDecodeError:
-            logger.warning(
-                f"Job {job_id}: Failed to decode CSV as utf-8-sig. Trying default pandas decoding from bytes."
-            )
-            df = pd.read_csv(io.BytesIO(contents))
-            logger.info(
-                f"Job {job_id}: Parsed CSV with pandas default byte stream decoding."
-            )
-        except Exception as e:
-            logger.error(f"Job {job_id}: Failed to parse CSV. Error: {e}")
-            raise HTTPException(
-                status_code=400, detail=f"Failed to parse CSV file. Error: {e}"
-            )
-
-        if df.empty:
-            logger.error(
-                f"Job {job_id}: CSV file is empty or resulted in an empty DataFrame."
-            )
-            raise HTTPException(
-                status_code=400, detail="CSV file is empty or unreadable."
-            )
-
-        original_columns = list(df.columns)
-        logger.info(
-            f"Job {job_id}: CSV parsed. Shape: {df.shape}. Columns (original): {original_columns}"
+        models = predictor.resolve_model_names(
+            request.models.split(",") if request.models else None
         )
+        fingerprint_encoding = resolve_encoding(request.fingerprint_encoding)
+    except ValueError as e_models:
+        raise HTTPException(status_code=400, detail=str(e_models))
 
-        # Robust column name normalization
-        normalized_columns = []
-        for col in original_columns:
-            try:
-                normalized_col = unicodedata.normalize("NFKC", str(col)).strip().lower()
-                normalized_columns.append(normalized_col)
-            except Exception as e:
-                logger.warning(
-                    f"Job {job_id}: Could not normalize column name '{col}'. Error: {e}. Using basic lowercasing."
-                )
-                normalized_columns.append(str(col).strip().lower())
-
-        df.columns = pd.Index(normalized_columns)  # Converted to pd.Index
-        logger.info(
-            f"Job {job_id}: Columns after full normalization: {df.columns.tolist()}"
+    held_molecules = 0  # Batch capacity to give back unless the job takes it over
+    try:
+        # Streamed from the spooled upload, rejected as soon as it is over the
+        # size or row limit; blocking file I/O, so off the event loop
+        smiles_data_list = await run_in_threadpool(
+            read_molecule_records,
+            file.file,
+            settings.MAX_FILE_SIZE_MB * 1024 * 1024,
+            settings.MAX_BATCH_SIZE,
         )
-
-        if "smiles" not in df.columns:
-            error_detail_msg = (
-                f"CSV must contain a 'smiles' column (case-insensitive). "
-                f"After normalization, found columns: {df.columns.tolist()}. "
-                f"Original columns were: {original_columns}."
-            )
-            logger.error(f"Job {job_id}: {error_detail_msg}")
-            raise HTTPException(
-                status_code=400,
-                detail=error_detail_msg,
-            )
-
-        # Handle molecule_name: use 'compound_name' as fallback, then empty string
-        if "molecule_name" in df.columns:
-            df["molecule_name"] = df["molecule_name"].astype(str).fillna("")
-        elif "compound_name" in df.columns:
-            df["molecule_name"] = df["compound_name"].astype(str).fillna("")
-            logger.info(
-                f"Job {job_id}: Using 'compound_name' column as 'molecule_name'."
-            )
-        else:
-            df["molecule_name"] = ""  # Assign a default Series of empty strings
-            logger.info(
-                f"Job {job_id}: 'molecule_name' and 'compound_name' not found. Using empty strings for molecule names."
-            )
-
-        smiles_data_list: List[Dict[str, Any]] = []
-        for _, row in df.iterrows():
-            item_data: Dict[str, Any] = {}
-            raw_smiles_field = str(
-                row.get("smiles", "")
-            )  # Get the raw content of the SMILES column
-
-            # If the SMILES field itself contains a pattern like SMILES_string,"description"...
-            # we want to extract just the SMILES_string part.
-            # The pattern is: a comma, followed by a double quote. Space after comma is optional.
-
-            # Try splitting by ',"' (comma directly followed by quote)
-            if ',"' in raw_smiles_field:
-                parts = raw_smiles_field.split(',"', 1)
-                actual_smiles = parts[0].strip()
-            # Else, try splitting by ', "' (comma, space, quote) - less likely but good to cover
-            elif ', "' in raw_smiles_field:
-                parts = raw_smiles_field.split(', "', 1)
-                actual_smiles = parts[0].strip()
-            else:
-                actual_smiles = raw_smiles_field.strip()
-
-            # Clean the extracted SMILES string
-            # Remove any leading/trailing whitespace and then any surrounding quotes.
-            item_data["smiles"] = actual_smiles.strip().strip('"')
-
-            # Handle molecule_name, ensuring it's a string or None
-            if "molecule_name" in row:
-                item_data["molecule_name"] = str(row.get("molecule_name", ""))
-
-            smiles_data_list.append(item_data)
-
         total_molecules = len(smiles_data_list)
         logger.info(
             f"Job {job_id}: Extracted {total_molecules} records for processing."
@@ -883,6 +870,12 @@ async def batch_predict_csv(
         if not smiles_data_list:
             raise HTTPException(status_code=400, detail="No valid SMILES found in CSV")
 
+        if limiter is not None:
+            await limiter.charge(http_request, BATCH_MOLECULE, total_molecules)
+        # Shed the job before creating its record; held until the job releases it
+        admission.acquire(BATCH, total_molecules)
+        held_molecules = total_molecules
+
         logger.info(
             f"Job {job_id}: Extracted {total_molecules} records for processing."
         )
@@ -1032,7 +1025,11 @@ async def batch_predict_csv(
             smiles_data_list,
             predictor,
             db,
+            models,
+            admission,
+            fingerprint_encoding,
         )
+        held_molecules = 0
 
         # Use the created_at from job_data for consistency in response
         created_at_str = str(job_data["created_at"])
@@ -1090,17 +1087,55 @@ async def batch_predict_csv(
     except Exception as e:
         logger.error(f"Error creating batch job: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error creating batch job: {e}")
+    finally:
+        if held_molecules:
+            admission.release(BATCH, held_molecules, completed=0)
+
+
+def _job_completed_at(job_data: Dict[str, Any]) -> Optional[datetime]:
+    """When a job completed (its last update when not recorded), if known."""
+    value = job_data.get("completed_at") or job_data.get("updated_at")
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            logger.debug(f"Unparseable job completion time: {value}")
+    return None
+
+
+def _completed_job_cache_headers(
+    etag: str, completed_at: Optional[datetime] = None
+) -> Dict[str, str]:
+    """Validators and Cache-Control of a completed job's status or results."""
+    return cache_headers(
+        etag,
+        cache_control(settings.HTTP_CACHE_BATCH_RESULTS_MAX_AGE_S, immutable=True),
+        completed_at,
+    )
 
 
 @router.get("/batch_status/{job_id}", response_model=BatchStatusResponse)
 async def get_batch_status(
-    job_id: str, db: Any = Depends(get_db)
-) -> BatchStatusResponse:
-    """Get status of a specific batch job."""
+    job_id: str, request: Request, response: Response, db: Any = Depends(get_db)
+) -> Union[BatchStatusResponse, Response]:
+    """
+    Get status of a specific batch job.
+
+    A completed job's status never changes again: it carries an ETag derived
+    from the job id and is cacheable. That ETag is only issued for a completed
+    job, so an If-None-Match naming it gets 304 without a database query;
+    ``*`` and If-Modified-Since get 304 once the job is found completed. Other
+    statuses are sent with no-cache.
+    """
+    etag = etag_for("batch-status", job_id, JobStatus.COMPLETED.value)
+    if etag_listed(request, etag):
+        return not_modified(_completed_job_cache_headers(etag))
     try:
         logger.info(f"Job {job_id}: get_batch_status called.")
         query_start_time = datetime.utcnow()
-        response = (
+        db_response = (
             db.table("batch_jobs")
             .select("*")
             .eq("job_id", job_id)
@@ -1112,11 +1147,20 @@ async def get_batch_status(
         logger.info(
             f"Job {job_id}: Database query for status took {query_duration:.4f} seconds."
         )
-        job_data = response.data
+        job_data = db_response.data
 
         if not job_data:
             raise HTTPException(status_code=404, detail="Batch job not found")
 
+        if job_data.get("status") == JobStatus.COMPLETED.value:
+            completed_at = _job_completed_at(job_data)
+            headers = _completed_job_cache_headers(etag, completed_at)
+            if is_not_modified(request, etag, completed_at):
+                return not_modified(headers)
+            response.headers.update(headers)
+        else:
+            response.headers["Cache-Control"] = NO_CACHE
+
         # Apply datetime parsing fix for fields from Supabase
         datetime_fields_to_parse = [
             "created_at",
@@ -1154,15 +1198,26 @@ async def get_batch_status(
 
 @router.get("/download_batch_results/{job_id}")
 async def download_batch_results(
-    job_id: str, db: Any = Depends(get_db)
-) -> StreamingResponse:
+    job_id: str, request: Request, db: Any = Depends(get_db)
+) -> Response:
+    """
+    Download the results CSV of a completed batch job.
+
+    Results never change once written: the response carries an ETag derived
+    from the job id and is cacheable. An If-None-Match naming that ETag gets
+    304 without touching the database or storage; ``*`` and If-Modified-Since
+    get 304 once the job is found completed, without downloading the results.
+    """
+    etag = etag_for("batch-results", job_id)
+    if etag_listed(request, etag):
+        return not_modified(_completed_job_cache_headers(etag))
     logger.info(
         f"[BATCH_DOWNLOAD] Attempting to download results for job_id: {job_id} at /api/v1/batch_jobs/download_batch_results/{job_id}"
     )
     try:
         response = (
             db.table("batch_jobs")
-            .select("status, results_file_path")
+            .select("status, results_file_path, completed_at, updated_at")
             .eq("job_id", job_id)
             .maybe_single()
             .execute()
@@ -1183,6 +1238,11 @@ async def download_batch_results(
                 status_code=404, detail="Results file path not found for this job."
             )
 
+        completed_at = _job_completed_at(job_data)
+        headers = _completed_job_cache_headers(etag, completed_at)
+        if is_not_modified(request, etag, completed_at):
+            return not_modified(headers)
+
         # Download results file from storage
         storage_response = db.storage.from_(settings.STORAGE_BUCKET_NAME).download(
             file_path
@@ -1192,7 +1252,8 @@ async def download_batch_results(
             io.BytesIO(storage_response),
             media_type="text/csv",
             headers={
-                "Content-Disposition": f"attachment; filename=batch_results_{job_id}.csv"
+                "Content-Disposition": f"attachment; filename=batch_results_{job_id}.csv",
+                **headers,
             },
         )
     except HTTPException:  # Re-raise HTTP exceptions
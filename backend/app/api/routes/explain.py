@@ -5,12 +5,22 @@ AI-powered explanation endpoints using OpenAI.
 import logging
 import json
 from typing import AsyncGenerator, Dict, Any, Optional
-from fastapi import APIRouter, HTTPException, Depends
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import Response, StreamingResponse
 from openai import AsyncOpenAI
 
 from app.models.schemas import ExplainRequest
+from app.core.admission import INTERACTIVE, AdmissionController, get_admission
 from app.core.config import settings
+from app.core.http_cache import (
+    cache_control,
+    cache_headers,
+    etag_for,
+    is_not_modified,
+    not_modified,
+)
+from app.core.responses import ORJSONResponse
+from app.core.write_behind import load_saved_prediction
 from app.ml.predictor import BBBPredictor
 
 logger = logging.getLogger(__name__)
@@ -90,11 +100,16 @@ Be concise but informative. Use technical terms appropriately but explain them w
 
 @router.post("/explain")
 async def explain_prediction(
-    request: ExplainRequest, predictor: BBBPredictor = Depends(get_predictor)
+    request: ExplainRequest,
+    predictor: BBBPredictor = Depends(get_predictor),
+    admission: AdmissionController = Depends(get_admission),
 ) -> StreamingResponse:
     """
     Generate AI-powered explanation for BBB permeability prediction.
 
+    The molecule is given by its SMILES or by the ``prediction_id`` of a
+    /predict result, reused as stored or read back from the database (404 when
+    neither has it), as for ``GET /report/{prediction_id}``.
     Returns a streaming response with the explanation content.
     """
 
@@ -106,34 +121,50 @@ async def explain_prediction(
                 detail="OpenAI API key not configured. Please set OPENAI_API_KEY environment variable.",
             )
 
-        # If no prediction result provided, generate one
-        if not request.prediction_result:
-            prediction_data = await predictor.predict_smiles_data(request.smiles)
-            if prediction_data.get("status") != "success":
-                error_detail = prediction_data.get(
-                    "error", "Prediction failed for unknown reasons."
-                )
+        # A /predict result is reused as stored, without predicting again
+        stored: Optional[Dict[str, Any]] = None
+        if request.prediction_id is not None:
+            stored = predictor.prediction_store.get(request.prediction_id)
+            if stored is None:
+                stored = await load_saved_prediction(request.prediction_id)
+            if stored is None:
                 raise HTTPException(
-                    status_code=400, detail=f"Prediction failed: {error_detail}"
+                    status_code=404, detail="Prediction not found or expired"
                 )
+        smiles = request.smiles or (stored or {}).get("smiles", "")
+
+        if request.prediction_result:
+            prediction_result_for_explain = request.prediction_result
+        else:
+            prediction_data = stored
+            # If no prediction result provided, generate one
+            if prediction_data is None:
+                # Only the prediction takes featurization capacity, not the LLM stream
+                async with admission.admit(INTERACTIVE):
+                    prediction_data = await predictor.predict_smiles_data(smiles)
+                if prediction_data.get("status") != "success":
+                    error_detail = prediction_data.get(
+                        "error", "Prediction failed for unknown reasons."
+                    )
+                    raise HTTPException(
+                        status_code=400, detail=f"Prediction failed: {error_detail}"
+                    )
 
             # Extract only the necessary fields for the explanation context
             prediction_result_for_explain = {
                 "bbb_probability": prediction_data.get("bbb_probability"),
-                "prediction_class": prediction_data.get("bbb_class"),
-                "confidence_score": prediction_data.get("bbb_confidence"),
+                "prediction_class": prediction_data.get("prediction_class"),
+                "confidence_score": prediction_data.get("prediction_certainty"),
                 # Include other relevant data if needed by the explanation prompt
-                "molecular_weight": prediction_data.get("molecular_weight"),
+                "molecular_weight": prediction_data.get("mw"),
                 "logp": prediction_data.get("logp"),
                 "tpsa": prediction_data.get("tpsa"),
             }
-        else:
-            prediction_result_for_explain = request.prediction_result
 
         # Generate explanation stream
         return StreamingResponse(
             generate_explanation_stream(
-                request.smiles,
+                smiles,
                 prediction_result_for_explain,  # Use the potentially enriched dict
                 request.context,
             ),
@@ -160,13 +191,10 @@ async def explain_prediction(
         raise HTTPException(status_code=500, detail="Failed to generate explanation")
 
 
-@router.get("/explain/sample")
-async def get_sample_explanation() -> Dict[str, Any]:
-    """Get a sample explanation for demonstration purposes."""
-
-    sample_explanation = {
-        "smiles": "CC(C)Cc1ccc(C(C)C(=O)O)cc1",
-        "explanation": """
+# Served by /explain/sample
+_SAMPLE_EXPLANATION: Dict[str, Any] = {
+    "smiles": "CC(C)Cc1ccc(C(C)C(=O)O)cc1",
+    "explanation": """
         This molecule (ibuprofen) shows moderate BBB permeability potential based on several key features:
 
         **Molecular Properties:**
@@ -187,8 +215,23 @@ async def get_sample_explanation() -> Dict[str, Any]:
         Ibuprofen does cross the BBB to some extent, which aligns with this prediction, 
         though its primary therapeutic targets are in peripheral tissues.
         """,
-        "confidence": 0.72,
-        "prediction": "permeable",
-    }
+    "confidence": 0.72,
+    "prediction": "permeable",
+}
+_SAMPLE_ETAG = etag_for("explain-sample", json.dumps(_SAMPLE_EXPLANATION))
+
+
+@router.get("/explain/sample")
+async def get_sample_explanation(request: Request) -> Response:
+    """
+    Get a sample explanation for demonstration purposes.
 
-    return sample_explanation
+    The sample never changes: it is cacheable for HTTP_CACHE_STATIC_MAX_AGE_S
+    and a matching If-None-Match gets 304.
+    """
+    headers = cache_headers(
+        _SAMPLE_ETAG, cache_control(settings.HTTP_CACHE_STATIC_MAX_AGE_S)
+    )
+    if is_not_modified(request, _SAMPLE_ETAG):
+        return not_modified(headers)
+    return ORJSONResponse(_SAMPLE_EXPLANATION, headers=headers)
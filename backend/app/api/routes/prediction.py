@@ -2,15 +2,68 @@
 Single molecule prediction endpoints.
 """
 
+import asyncio
+import json
 import logging
 import time
 import uuid
 from datetime import datetime
-from fastapi import APIRouter, HTTPException, Depends
-from typing import Dict, Any
-from app.api.models import SinglePredictionRequest, SinglePredictionResponse
+from fastapi import (
+    APIRouter,
+    HTTPException,
+    Depends,
+    Query,
+    Request,
+    WebSocket,
+    WebSocketDisconnect,
+)
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
+from app.api.models import (
+    AtomHighlightRequest,
+    AtomHighlightResponse,
+    BatchPredictionRequest,
+    BitContributionRequest,
+    BitContributionResponse,
+    InlineBatchPredictionResponse,
+    SinglePredictionRequest,
+    SinglePredictionResponse,
+)
+from starlette.background import BackgroundTask
+from starlette.responses import Response
+from app.ml.fingerprint_encoding import NONE, encode_fingerprint, resolve_encoding
 from app.ml.predictor import BBBPredictor
-from app.core.database import get_db
+from app.core.admission import (
+    BATCH,
+    INTERACTIVE,
+    AdmissionController,
+    Overloaded,
+    admit_interactive,
+    get_admission,
+)
+from app.core.deadline import (
+    Deadline,
+    DeadlineExceeded,
+    deadline_stats,
+    request_deadline,
+)
+from app.core.rate_limit import (
+    BATCH_MOLECULE,
+    PREDICTION,
+    RateLimited,
+    RateLimiter,
+    get_rate_limiter,
+)
+from app.core.ndjson import DuplexStreamingResponse, iter_lines
+from app.core.write_behind import WriteBehindQueue, get_prediction_writer
+from app.core.http_cache import (
+    NO_CACHE,
+    cache_control,
+    cache_headers,
+    etag_for,
+    is_not_modified,
+    not_modified,
+)
+from app.core.responses import ORJSONResponse, dumps
 from app.core.config import settings  # For default model_version
 
 logger = logging.getLogger(__name__)
@@ -26,19 +79,61 @@ def get_predictor() -> BBBPredictor:
     return app.state.predictor
 
 
-@router.post("/predict", response_model=SinglePredictionResponse)
+def _to_prediction_response(
+    prediction_data: Dict[str, Any],
+    fingerprint_encoding: str = NONE,
+) -> SinglePredictionResponse:
+    """
+    Map a predictor result record onto the single prediction response model,
+    with its fingerprint in ``fingerprint_encoding`` (left out for none).
+    """
+    on_bits = prediction_data.pop("fingerprint_on_bits", None)
+    if fingerprint_encoding != NONE and on_bits is not None:
+        prediction_data["fingerprint"] = encode_fingerprint(
+            on_bits, fingerprint_encoding
+        )
+        prediction_data["fingerprint_encoding"] = fingerprint_encoding
+    # Ensure 'bbb_class' is populated for the response model from 'prediction_class'
+    if "prediction_class" in prediction_data:
+        prediction_data["bbb_class"] = prediction_data["prediction_class"]
+    # Map confidence_score to prediction_certainty for the response model
+    if "confidence_score" in prediction_data:
+        prediction_data["prediction_certainty"] = prediction_data.pop(
+            "confidence_score"
+        )
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            f"Final prediction_data before SinglePredictionResponse: {prediction_data}"
+        )
+
+    # Create response using all fields from prediction_data
+    # Pydantic will validate against SinglePredictionResponse model
+    return SinglePredictionResponse(**prediction_data)
+
+
+@router.post(
+    "/predict",
+    response_model=SinglePredictionResponse,
+    response_class=ORJSONResponse,
+    dependencies=[Depends(admit_interactive)],
+)
 async def predict_molecule_data(
     request: SinglePredictionRequest,
     predictor: BBBPredictor = Depends(get_predictor),
-    db: Any = Depends(get_db),
-) -> SinglePredictionResponse:
+    writer: WriteBehindQueue = Depends(get_prediction_writer),
+    deadline: Deadline = Depends(request_deadline),
+) -> ORJSONResponse:
     """
     Predict BBB permeability and calculate molecular properties for a single molecule.
 
     - **smiles**: SMILES string of the molecule
     - **molecule_name**: Optional name for the molecule
+    - **fingerprint_encoding**: Optional base64, hex or indices to also return the fingerprint
 
-    Returns a comprehensive data profile including BBB prediction, physicochemical properties, and alerts.
+    Returns a comprehensive data profile including BBB prediction, physicochemical properties, and alerts,
+    with a ``prediction_id`` that /report/{id} and /explain accept instead of the SMILES.
+    Answers 504 once the request deadline (``X-Request-Timeout-Ms``) has passed.
     """
     start_time = time.time()
 
@@ -47,8 +142,12 @@ async def predict_molecule_data(
             f"Processing single molecule prediction for SMILES: {request.smiles}"
         )
 
+        fingerprint_encoding = resolve_encoding(request.fingerprint_encoding)
+
         # Get comprehensive data from the predictor
-        prediction_data = await predictor.predict_smiles_data(request.smiles)
+        prediction_data = await predictor.predict_smiles_data(
+            request.smiles, request.models, deadline
+        )
 
         # Add molecule_name from request and processing time
         prediction_data["molecule_name"] = request.molecule_name
@@ -58,18 +157,22 @@ async def predict_molecule_data(
         processing_time = (time.time() - start_time) * 1000  # Convert to milliseconds
         prediction_data["processing_time_ms"] = processing_time
 
-        # If prediction was successful, try to save to DB
+        # If prediction was successful, keep it for /report and /explain under
+        # its prediction_id and queue it to be saved to DB under the same id
         if prediction_data.get("status") == "success":
+            prediction_id = str(uuid.uuid4())
+            prediction_data["prediction_id"] = prediction_id
+            predictor.prediction_store.set(prediction_id, dict(prediction_data))
             try:
                 item_to_insert = {
-                    "id": str(uuid.uuid4()),
+                    "id": prediction_id,
                     "smiles": prediction_data.get("smiles"),
                     "molecule_name": request.molecule_name,
                     "bbb_probability": prediction_data.get("bbb_probability"),
                     "prediction_class": prediction_data.get(
                         "prediction_class"
                     ),  # Corrected key
-                    "prediction_certainty": prediction_data.get("confidence_score"),
+                    "prediction_certainty": prediction_data.get("prediction_certainty"),
                     "applicability_score": prediction_data.get("applicability_score"),
                     "fingerprint_hash": prediction_data.get(
                         "fingerprint_hash"
@@ -96,39 +199,18 @@ async def predict_molecule_data(
                     "molecular_formula": prediction_data.get("molecular_formula"),
                     "created_at": datetime.utcnow().isoformat(),
                 }
-                db_response = (
-                    db.table("single_prediction_item").insert(item_to_insert).execute()
-                )
-                if hasattr(db_response, "error") and db_response.error:
+                # Written in bulk by the write-behind queue, after the response
+                if not writer.submit(item_to_insert):
                     logger.error(
-                        f"Failed to save single prediction to DB for SMILES {request.smiles}: {db_response.error}"
-                    )
-                else:
-                    logger.info(
-                        f"Successfully saved single prediction to DB for SMILES {request.smiles}"
+                        f"Single prediction for SMILES {request.smiles} not queued for saving"
                     )
             except Exception as db_exc:
                 logger.error(
-                    f"Exception saving single prediction to DB for SMILES {request.smiles}: {db_exc}",
+                    f"Exception queueing single prediction for SMILES {request.smiles}: {db_exc}",
                     exc_info=True,
                 )
 
-        # Ensure 'bbb_class' is populated for the response model from 'prediction_class'
-        if "prediction_class" in prediction_data:
-            prediction_data["bbb_class"] = prediction_data["prediction_class"]
-        # Map confidence_score to prediction_certainty for the response model
-        if "confidence_score" in prediction_data:
-            prediction_data["prediction_certainty"] = prediction_data.pop(
-                "confidence_score"
-            )
-
-        logger.debug(
-            f"Final prediction_data before SinglePredictionResponse: {prediction_data}"
-        )
-
-        # Create response using all fields from prediction_data
-        # Pydantic will validate against SinglePredictionResponse model
-        response = SinglePredictionResponse(**prediction_data)
+        response = _to_prediction_response(prediction_data, fingerprint_encoding)
 
         logger.info(
             f"Single molecule processing completed in {processing_time:.2f}ms for SMILES: {request.smiles}, status: {response.status}"
@@ -151,7 +233,8 @@ async def predict_molecule_data(
             # else, it's an internal server error, which will be caught by the generic exception handler below
             # or we can explicitly raise a 500 here if needed.
 
-        return response
+        # Already validated: returned as a response so it is not validated again
+        return ORJSONResponse(response)
 
     except (
         ValueError
@@ -159,7 +242,7 @@ async def predict_molecule_data(
         logger.warning(f"Invalid input for prediction: {e} - SMILES: {request.smiles}")
         raise HTTPException(status_code=400, detail=str(e))
 
-    except HTTPException:  # Re-raise HTTP exceptions from above
+    except (HTTPException, DeadlineExceeded):  # Re-raise HTTP exceptions from above
         raise
     except Exception as e:
         logger.error(
@@ -175,29 +258,549 @@ async def predict_molecule_data(
         )
 
 
-@router.get("/model/info")
-async def get_model_info(
+@router.post(
+    "/predict/batch",
+    response_model=InlineBatchPredictionResponse,
+    response_class=ORJSONResponse,
+)
+async def predict_batch_inline(
+    http_request: Request,
+    request: BatchPredictionRequest,
+    predictor: BBBPredictor = Depends(get_predictor),
+    admission: AdmissionController = Depends(get_admission),
+    limiter: Optional[RateLimiter] = Depends(get_rate_limiter),
+) -> ORJSONResponse:
+    """
+    Predict a small batch of molecules and return all results inline.
+
+    - **molecules**: Up to SYNC_BATCH_MAX_SIZE items with `smiles` and optional `molecule_name`
+    - **models**: Optional extra served models to score every molecule with
+    - **fingerprint_encoding**: Optional base64, hex or indices to also return fingerprints
+
+    Runs the vectorized batch pipeline in the request, with no job record and no
+    result upload. Invalid molecules get an error status in their result rather
+    than failing the request. Larger sets go through /batch_jobs/batch_predict_csv.
+    """
+    start_time = time.time()
+    if not request.molecules:
+        raise HTTPException(status_code=400, detail="No molecules provided.")
+    if len(request.molecules) > settings.SYNC_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=(
+                f"Too many molecules ({len(request.molecules)}); this endpoint accepts "
+                f"up to {settings.SYNC_BATCH_MAX_SIZE}. Use /batch_jobs/batch_predict_csv "
+                "for larger sets."
+            ),
+        )
+    try:
+        fingerprint_encoding = resolve_encoding(request.fingerprint_encoding)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if limiter is not None:
+        await limiter.charge(http_request, BATCH_MOLECULE, len(request.molecules))
+
+    try:
+        async with admission.admit(BATCH, len(request.molecules)):
+            results = await predictor.predict_batch(
+                [item.smiles for item in request.molecules], models=request.models
+            )
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(
+            f"Inline batch prediction failed for {len(request.molecules)} molecules: {e}",
+            exc_info=True,
+        )
+        raise HTTPException(
+            status_code=500, detail="Prediction failed due to an internal server error."
+        )
+
+    responses = []
+    for item, result in zip(request.molecules, results):
+        result["molecule_name"] = item.molecule_name
+        responses.append(_to_prediction_response(result, fingerprint_encoding))
+    successful = sum(response.status == "success" for response in responses)
+    processing_time = (time.time() - start_time) * 1000
+    logger.info(
+        f"Inline batch of {len(responses)} molecules completed in {processing_time:.2f}ms ({successful} successful)"
+    )
+    return ORJSONResponse(
+        InlineBatchPredictionResponse(
+            results=responses,
+            total=len(responses),
+            successful=successful,
+            failed=len(responses) - successful,
+            processing_time_ms=processing_time,
+            model_version=settings.MODEL_VERSION,
+        )
+    )
+
+
+def _parse_stream_record(
+    text: str,
+) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Parse one input line of the streaming endpoint into ``(record, error)``.
+
+    A line is either a bare SMILES or a JSON object with ``smiles`` and optional
+    ``molecule_name`` and ``id``.
+    """
+    text = text.strip()
+    if not text.startswith("{"):
+        return {"smiles": text}, None
+    try:
+        record = json.loads(text)
+    except ValueError as e:
+        return None, f"Invalid JSON record: {e}"
+    if not isinstance(record, dict) or not isinstance(record.get("smiles"), str):
+        return None, "JSON record must be an object with a 'smiles' string."
+    return record, None
+
+
+async def _score_stream_chunk(
+    predictor: BBBPredictor,
+    chunk: List[Tuple[int, Optional[Dict[str, Any]], Optional[str]]],
+    models: List[str],
+    fingerprint_encoding: str = NONE,
+) -> bytes:
+    """Score the parsed records of a chunk and render all its NDJSON lines."""
+    scored = [
+        (record or {}).get("smiles", "") for _, record, error in chunk if not error
+    ]
+    results = iter(await predictor.predict_batch(scored, models=models))
+    lines: List[bytes] = []
+    for line_number, record, error in chunk:
+        output: Dict[str, Any] = {"line": line_number}
+        if record is not None and "id" in record:
+            output["id"] = record["id"]
+        if error is not None:
+            output.update({"status": "error_invalid_record", "error": error})
+        else:
+            assert record is not None
+            result = next(results)
+            result["molecule_name"] = record.get("molecule_name")
+            output.update(
+                _to_prediction_response(result, fingerprint_encoding).model_dump(
+                    mode="json", exclude_none=True
+                )
+            )
+        lines.append(dumps(output))
+    return b"\n".join(lines) + b"\n"
+
+
+@router.post("/predict/stream")
+async def predict_stream(
+    request: Request,
+    models: Optional[str] = Query(
+        default=None, description="Comma-separated extra served models"
+    ),
+    fingerprint_encoding: Optional[str] = Query(
+        default=None, description="Also return fingerprints: base64, hex or indices"
+    ),
+    predictor: BBBPredictor = Depends(get_predictor),
+    admission: AdmissionController = Depends(get_admission),
+    limiter: Optional[RateLimiter] = Depends(get_rate_limiter),
+) -> DuplexStreamingResponse:
+    """
+    Stream predictions for a newline-delimited request body.
+
+    Each input line is a SMILES or a JSON object (`smiles`, optional
+    `molecule_name` and `id`). Results are streamed back as NDJSON, one line per
+    non-blank input line and in input order, tagged with the input `line` number.
+    Invalid records get an error status instead of ending the stream.
+
+    Input is read STREAM_CHUNK_SIZE records at a time and the next chunk is only
+    read once the previous results have been written, so memory stays bounded
+    and a slow reader slows down ingestion. The stream holds one chunk of batch
+    capacity while it is open. Each chunk waits for the client's rate limit
+    tokens rather than failing the stream.
+    """
+    try:
+        model_names = predictor.resolve_model_names(
+            models.split(",") if models else None
+        )
+        encoding = resolve_encoding(fingerprint_encoding)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    chunk_size = max(1, settings.STREAM_CHUNK_SIZE)
+    admission.acquire(BATCH, chunk_size)
+
+    async def results() -> AsyncIterator[bytes]:
+        chunk: List[Tuple[int, Optional[Dict[str, Any]], Optional[str]]] = []
+        records = 0
+        async for line_number, text in iter_lines(
+            request.stream(), settings.STREAM_MAX_LINE_BYTES
+        ):
+            if text is None:
+                chunk.append(
+                    (
+                        line_number,
+                        None,
+                        f"Line exceeds {settings.STREAM_MAX_LINE_BYTES} bytes.",
+                    )
+                )
+            elif not text.strip():
+                continue
+            else:
+                record, error = _parse_stream_record(text)
+                chunk.append((line_number, record, error))
+            if len(chunk) >= chunk_size:
+                records += len(chunk)
+                if limiter is not None:
+                    await limiter.throttle(request, BATCH_MOLECULE, len(chunk))
+                yield await _score_stream_chunk(predictor, chunk, model_names, encoding)
+                admission.record_completed(BATCH, len(chunk))
+                chunk = []
+        if chunk:
+            records += len(chunk)
+            if limiter is not None:
+                await limiter.throttle(request, BATCH_MOLECULE, len(chunk))
+            yield await _score_stream_chunk(predictor, chunk, model_names, encoding)
+            admission.record_completed(BATCH, len(chunk))
+        logger.info(f"Streamed predictions for {records} records")
+
+    return DuplexStreamingResponse(
+        results(),
+        media_type="application/x-ndjson",
+        background=BackgroundTask(admission.release, BATCH, chunk_size, completed=0),
+    )
+
+
+async def _answer_websocket_message(
+    websocket: WebSocket,
+    predictor: BBBPredictor,
+    admission: AdmissionController,
+    limiter: Optional[RateLimiter],
+    message: str,
+) -> None:
+    """Predict the molecule of one WebSocket message and send the result."""
+    start_time = time.time()
+    record, error = _parse_stream_record(message)
+    reply: Dict[str, Any] = {}
+    model_names: Optional[List[str]] = None
+    if record is not None and "id" in record:
+        reply["id"] = record["id"]
+    if error is not None or record is None:
+        reply.update({"status": "error_invalid_record", "error": error})
+    else:
+        models = record.get("models")
+        try:
+            model_names = predictor.resolve_model_names(
+                models if isinstance(models, list) else None
+            )
+        except ValueError as e:
+            reply.update({"status": "error_unknown_model", "error": str(e)})
+    if record is not None and model_names is not None:
+        charged = False
+        try:
+            if limiter is not None:
+                await limiter.charge(websocket, PREDICTION)
+                charged = True
+            async with admission.admit(INTERACTIVE):
+                result = await predictor.predict_smiles_data(
+                    record["smiles"], model_names
+                )
+            result["molecule_name"] = record.get("molecule_name")
+            result["processing_time_ms"] = (time.time() - start_time) * 1000
+            reply.update(
+                _to_prediction_response(result).model_dump(
+                    mode="json", exclude_none=True
+                )
+            )
+        except Overloaded as e:
+            reply.update(
+                {
+                    "status": "error_overloaded",
+                    "error": e.detail,
+                    "retry_after": e.retry_after,
+                }
+            )
+        except RateLimited as e:
+            reply.update(
+                {
+                    "status": "error_rate_limited",
+                    "error": e.detail,
+                    "retry_after": e.retry_after,
+                }
+            )
+        except asyncio.CancelledError:
+            # Superseded by the next message: as-you-type edits only pay for
+            # the predictions they get back
+            if charged and limiter is not None:
+                await limiter.refund(websocket, PREDICTION)
+            raise
+        except Exception as e:
+            logger.error(
+                f"WebSocket prediction failed for SMILES {record['smiles']}: {e}",
+                exc_info=True,
+            )
+            reply.update(
+                {
+                    "status": "error",
+                    "error": "Prediction failed due to an internal server error.",
+                }
+            )
+    try:
+        # Shielded so superseding the message never interrupts a frame mid-send
+        await asyncio.shield(websocket.send_text(dumps(reply).decode()))
+    except (WebSocketDisconnect, RuntimeError) as e:
+        logger.debug(f"Could not send WebSocket prediction: {e}")
+
+
+@router.websocket("/predict/ws")
+async def predict_websocket(
+    websocket: WebSocket,
+    predictor: BBBPredictor = Depends(get_predictor),
+    admission: AdmissionController = Depends(get_admission),
+    limiter: Optional[RateLimiter] = Depends(get_rate_limiter),
+) -> None:
+    """
+    Interactive predictions over a WebSocket, for as-you-type editing.
+
+    Each text message is a SMILES or a JSON object (`smiles`, optional `id`,
+    `molecule_name` and `models`); the reply has the /predict fields plus the
+    message's `id`. A new message supersedes the one still being predicted: its
+    work is cancelled (dropped from the micro-batch queue if not yet started)
+    and no reply is sent for it. Results come from the prediction cache when the
+    molecule was seen recently. When the service is at capacity the reply has
+    status `error_overloaded`, and when the client's rate limit is used up
+    `error_rate_limited`, each with a `retry_after` in seconds. A superseded
+    message is not charged to the rate limit.
+    """
+    await websocket.accept()
+    pending: Optional["asyncio.Task[None]"] = None
+    try:
+        while True:
+            message = await websocket.receive_text()
+            if pending is not None and not pending.done():
+                pending.cancel()
+            pending = asyncio.create_task(
+                _answer_websocket_message(
+                    websocket, predictor, admission, limiter, message
+                )
+            )
+    except WebSocketDisconnect:
+        logger.debug("Prediction WebSocket closed by client")
+    finally:
+        if pending is not None and not pending.done():
+            pending.cancel()
+
+
+@router.post(
+    "/predict/contributions",
+    response_model=BitContributionResponse,
+    response_class=ORJSONResponse,
+    dependencies=[Depends(admit_interactive)],
+)
+async def predict_bit_contributions(
+    request: BitContributionRequest,
+    predictor: BBBPredictor = Depends(get_predictor),
+) -> ORJSONResponse:
+    """
+    Explain a prediction locally with tree-path contributions of fingerprint bits.
+
+    - **smiles**: SMILES string of the molecule
+    - **top_n**: Number of bits to return, ranked by absolute contribution
+
+    Runs on the loaded forest in milliseconds, without calling an LLM.
+    """
+    start_time = time.time()
+    if not predictor.is_loaded or predictor.forest is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    top_n = min(
+        request.top_n or settings.CONTRIBUTION_TOP_N, settings.CONTRIBUTION_MAX_TOP_N
+    )
+
+    try:
+        result = (
+            await predictor.predict_batch(
+                [request.smiles], top_bits=top_n, lane=INTERACTIVE
+            )
+        )[0]
+    except Exception as e:
+        logger.error(
+            f"Bit contribution calculation failed for SMILES {request.smiles}: {e}",
+            exc_info=True,
+        )
+        raise HTTPException(
+            status_code=500, detail="Failed to compute bit contributions."
+        )
+
+    status = result.get("status", "error_processing")
+    if status in ("error_invalid_smiles", "error_empty_smiles"):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Error processing SMILES '{request.smiles}': {status}",
+        )
+    if status != "success" or result.get("top_bits") is None:
+        raise HTTPException(
+            status_code=500, detail="Failed to compute bit contributions."
+        )
+
+    return ORJSONResponse(
+        BitContributionResponse(
+            smiles=request.smiles,
+            status=status,
+            bbb_probability=result.get("bbb_probability"),
+            bias=predictor.forest.bias,
+            top_bits=result["top_bits"],
+            processing_time_ms=(time.time() - start_time) * 1000,
+            model_version=result.get("model_version", settings.MODEL_VERSION),
+        )
+    )
+
+
+@router.post(
+    "/predict/atom-highlights",
+    response_model=AtomHighlightResponse,
+    response_class=ORJSONResponse,
+    dependencies=[Depends(admit_interactive)],
+)
+async def predict_atom_highlights(
+    request: AtomHighlightRequest,
+    predictor: BBBPredictor = Depends(get_predictor),
+) -> ORJSONResponse:
+    """
+    Map the most contributing fingerprint bits onto the atoms of a molecule.
+
+    - **smiles**: SMILES string of the molecule
+    - **top_n**: Number of set bits to map, ranked by absolute contribution
+    - **include_svg**: Also render the molecule with atoms shaded by weight
+
+    Results are cached per canonical SMILES and model version.
+    """
+    start_time = time.time()
+    if not predictor.is_loaded or predictor.forest is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    top_n = min(
+        request.top_n or settings.CONTRIBUTION_TOP_N, settings.CONTRIBUTION_MAX_TOP_N
+    )
+
+    try:
+        result = await predictor.predict_atom_highlights(
+            request.smiles, top_n, request.include_svg
+        )
+    except Exception as e:
+        logger.error(
+            f"Atom highlight calculation failed for SMILES {request.smiles}: {e}",
+            exc_info=True,
+        )
+        raise HTTPException(
+            status_code=500, detail="Failed to compute atom highlights."
+        )
+
+    status = result.get("status", "error_processing")
+    if status in ("error_invalid_smiles", "error_empty_smiles"):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Error processing SMILES '{request.smiles}': {status}",
+        )
+    if status != "success":
+        raise HTTPException(
+            status_code=500, detail="Failed to compute atom highlights."
+        )
+
+    result["processing_time_ms"] = (time.time() - start_time) * 1000
+    return ORJSONResponse(AtomHighlightResponse(**result))
+
+
+@router.get("/model/shadow")
+async def get_shadow_stats(
+    predictor: BBBPredictor = Depends(get_predictor),
+) -> Dict[str, Any]:
+    """Disagreement statistics between the primary and the shadow model."""
+    if predictor.shadow is None:
+        return {"enabled": False}
+    return {"enabled": True, **predictor.shadow.stats()}
+
+
+@router.get("/model/drift")
+async def get_drift_report(
     predictor: BBBPredictor = Depends(get_predictor),
 ) -> Dict[str, Any]:
-    """Get information about the loaded ML model."""
+    """Drift of live predictions and descriptors against the training set."""
+    return await predictor.drift_report()
+
+
+@router.get("/model/info", response_class=ORJSONResponse)
+async def get_model_info(
+    request: Request,
+    predictor: BBBPredictor = Depends(get_predictor),
+) -> Response:
+    """
+    Get information about the loaded ML model.
+
+    The response only changes with the served models, so it carries an ETag
+    derived from them and is cacheable for HTTP_CACHE_MODEL_INFO_MAX_AGE_S;
+    a matching If-None-Match gets 304. Live counters are in /model/stats.
+    """
     try:
         if not predictor.is_loaded:
             raise HTTPException(status_code=503, detail="Model not loaded")
 
+        models = [served.describe() for served in predictor.served_models.values()]
+        headers = cache_headers(
+            etag_for(
+                "model-info",
+                settings.MODEL_VERSION,
+                predictor.inference_backend,
+                dumps(models).decode(),
+            ),
+            cache_control(settings.HTTP_CACHE_MODEL_INFO_MAX_AGE_S),
+            predictor.loaded_at,
+        )
+        if is_not_modified(request, headers["ETag"], predictor.loaded_at):
+            return not_modified(headers)
+
         feature_importance = predictor.get_feature_importance(top_n=10)
 
-        return {
-            "model_type": "RandomForestClassifier",
-            "fingerprint_type": "Morgan",
-            "fingerprint_radius": 2,
-            "fingerprint_bits": 2048,
-            "n_estimators": getattr(predictor.model, "n_estimators", "unknown"),
-            "top_features": feature_importance,
-            "is_loaded": predictor.is_loaded,
-        }
+        return ORJSONResponse(
+            {
+                "model_type": "RandomForestClassifier",
+                "fingerprint_type": "Morgan",
+                "fingerprint_radius": 2,
+                "fingerprint_bits": 2048,
+                "n_estimators": getattr(predictor.model, "n_estimators", "unknown"),
+                "model_version": settings.MODEL_VERSION,
+                "inference_backend": predictor.inference_backend,
+                "models": models,
+                "top_features": feature_importance,
+                "is_loaded": predictor.is_loaded,
+            },
+            headers=headers,
+        )
 
     except Exception as e:
         logger.error(f"Failed to get model info: {e}")
         raise HTTPException(
             status_code=500, detail="Failed to retrieve model information"
         )
+
+
+@router.get("/model/stats", response_class=ORJSONResponse)
+async def get_model_stats(
+    predictor: BBBPredictor = Depends(get_predictor),
+    admission: AdmissionController = Depends(get_admission),
+    limiter: Optional[RateLimiter] = Depends(get_rate_limiter),
+    writer: WriteBehindQueue = Depends(get_prediction_writer),
+) -> ORJSONResponse:
+    """Live serving counters: micro-batching, admission, lanes, deadlines, rate limits, predictions."""
+    return ORJSONResponse(
+        {
+            "micro_batching": (
+                predictor.micro_batcher.stats()
+                if predictor.micro_batcher is not None
+                else None
+            ),
+            "admission": admission.stats(),
+            "execution_lanes": predictor.lanes.stats(),
+            "deadlines": deadline_stats(),
+            "rate_limit": limiter.stats() if limiter is not None else None,
+            "prediction_store": predictor.prediction_store.stats(),
+            "prediction_writes": writer.stats(),
+        },
+        headers={"Cache-Control": NO_CACHE},
+    )
@@ -16,7 +16,15 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 
 from app.models.schemas import PredictionRequest
 from app.ml.predictor import BBBPredictor
-from app.core.database import get_db
+from app.core.admission import admit_interactive
+from app.core.deadline import (
+    Deadline,
+    DeadlineExceeded,
+    cancellation_token,
+    request_deadline,
+)
+from app.core.single_flight import SingleFlight
+from app.core.write_behind import load_saved_prediction
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -174,30 +182,69 @@ def generate_molecule_report(
     return pdf_bytes
 
 
-@router.get("/report/{molecule_id}")
-async def generate_report_by_id(molecule_id: str) -> StreamingResponse:
-    """Generate PDF report for a previously analyzed molecule."""
-    db = get_db()
-
-    try:
-        # Get molecule data from database
-        response = db.table("molecules").select("*").eq("id", molecule_id).execute()
+def _report_prediction_data(prediction_result: Dict[str, Any]) -> Dict[str, Any]:
+    """The fields of a successful predictor result record the report prints."""
+    # Defaulting to safe values if keys are missing, though 'success' status should guarantee them.
+    return {
+        "bbb_probability": prediction_result.get("bbb_probability") or 0.0,
+        "prediction_class": prediction_result.get("prediction_class") or "unknown",
+        "confidence_score": prediction_result.get("prediction_certainty") or 0.0,
+        "processing_time_ms": prediction_result.get("processing_time_ms") or 0.0,
+        # Add other properties if your report uses them directly from prediction_data
+        "molecular_weight": prediction_result.get("mw"),
+        "logp": prediction_result.get("logp"),
+        "tpsa": prediction_result.get("tpsa"),
+        "h_bond_donors": prediction_result.get("h_donors"),
+        "h_bond_acceptors": prediction_result.get("h_acceptors"),
+        "rotatable_bonds": prediction_result.get("rot_bonds"),
+        "pains_alerts": prediction_result.get("pains_alerts", 0),
+        "brenk_alerts": prediction_result.get("brenk_alerts", 0),
+    }
+
+
+async def _render_report(
+    predictor: BBBPredictor,
+    smiles: str,
+    molecule_name: str,
+    prediction_data: Dict[str, Any],
+) -> bytes:
+    # Render off the event loop, on the interactive lane, unless every
+    # requester gave up while the render was queued
+    with cancellation_token() as token:
+        pdf_bytes: bytes = await predictor.lanes.run_interactive(
+            _render_report_sync, token, smiles, molecule_name, prediction_data
+        )
+    return pdf_bytes
 
-        if not response.data:
-            raise HTTPException(status_code=404, detail="Molecule not found")
 
-        mol_data = response.data[0]
+@router.get("/report/{prediction_id}", dependencies=[Depends(admit_interactive)])
+async def generate_report_by_id(
+    prediction_id: str,
+    predictor: BBBPredictor = Depends(get_predictor),
+    deadline: Deadline = Depends(request_deadline),
+) -> StreamingResponse:
+    """
+    Generate PDF report for a previous /predict result by its prediction_id.
 
-        prediction_data = {
-            "bbb_probability": mol_data["bbb_probability"],
-            "prediction_class": mol_data["prediction_class"],
-            "confidence_score": mol_data["confidence_score"],
-            "processing_time_ms": 0.0,  # Historical data
-        }
+    Recent results are reused as stored, without predicting again; older ones
+    are read from the database (404 when neither has it).
+    """
+    try:
+        result = predictor.prediction_store.get(prediction_id)
+        if result is None:
+            result = await load_saved_prediction(prediction_id)
+        if result is None:
+            raise HTTPException(status_code=404, detail="Prediction not found")
 
         # Generate PDF report
-        pdf_bytes = generate_molecule_report(
-            mol_data["smiles"], mol_data.get("molecule_name", ""), prediction_data
+        pdf_bytes = await deadline.run(
+            _render_report(
+                predictor,
+                result["smiles"],
+                result.get("molecule_name") or "",
+                _report_prediction_data(result),
+            ),
+            "report",
         )
 
         # Return as streaming response
@@ -205,54 +252,65 @@ async def generate_report_by_id(molecule_id: str) -> StreamingResponse:
             io.BytesIO(pdf_bytes),
             media_type="application/pdf",
             headers={
-                "Content-Disposition": f"attachment; filename=report_{molecule_id}.pdf"
+                "Content-Disposition": f"attachment; filename=report_{prediction_id}.pdf"
             },
         )
 
+    except (HTTPException, DeadlineExceeded):
+        raise
     except Exception as e:
         logger.error(f"Report generation failed: {e}")
         raise HTTPException(status_code=500, detail="Failed to generate report")
 
 
-@router.post("/report")
+# Concurrent requests for the same report (e.g. double clicks) share one render
+report_flight: SingleFlight[bytes] = SingleFlight()
+
+
+async def _render_smiles_report(
+    predictor: BBBPredictor, smiles: str, molecule_name: str
+) -> bytes:
+    """Predict ``smiles`` and render its PDF report."""
+    prediction_result = await predictor.predict_smiles_data(smiles)
+
+    if prediction_result.get("status") != "success":
+        error_detail = prediction_result.get(
+            "error", "Prediction failed for unknown reasons."
+        )
+        raise HTTPException(
+            status_code=400, detail=f"Prediction failed: {error_detail}"
+        )
+
+    return await _render_report(
+        predictor, smiles, molecule_name, _report_prediction_data(prediction_result)
+    )
+
+
+def _render_report_sync(
+    token: Deadline, smiles: str, molecule_name: str, prediction_data: Dict[str, Any]
+) -> bytes:
+    token.check("pdf_render")
+    return generate_molecule_report(smiles, molecule_name, prediction_data)
+
+
+@router.post("/report", dependencies=[Depends(admit_interactive)])
 async def generate_report_from_smiles(
-    request: PredictionRequest, predictor: BBBPredictor = Depends(get_predictor)
+    request: PredictionRequest,
+    predictor: BBBPredictor = Depends(get_predictor),
+    deadline: Deadline = Depends(request_deadline),
 ) -> StreamingResponse:
-    """Generate PDF report for a given SMILES string."""
+    """Generate PDF report for a given SMILES string (504 past the request deadline)."""
 
     try:
-        # Make prediction
-        prediction_result = await predictor.predict_smiles_data(request.smiles)
-
-        if prediction_result.get("status") != "success":
-            error_detail = prediction_result.get(
-                "error", "Prediction failed for unknown reasons."
-            )
-            raise HTTPException(
-                status_code=400, detail=f"Prediction failed: {error_detail}"
-            )
-
-        # Ensure all expected keys are present for the report
-        # Defaulting to safe values if keys are missing, though 'success' status should guarantee them.
-        prediction_data = {
-            "bbb_probability": prediction_result.get("bbb_probability", 0.0),
-            "prediction_class": prediction_result.get("bbb_class", "unknown"),
-            "confidence_score": prediction_result.get("bbb_confidence", 0.0),
-            "processing_time_ms": prediction_result.get("processing_time_ms", 0.0),
-            # Add other properties if your report uses them directly from prediction_data
-            "molecular_weight": prediction_result.get("molecular_weight"),
-            "logp": prediction_result.get("logp"),
-            "tpsa": prediction_result.get("tpsa"),
-            "h_bond_donors": prediction_result.get("h_bond_donors"),
-            "h_bond_acceptors": prediction_result.get("h_bond_acceptors"),
-            "rotatable_bonds": prediction_result.get("rotatable_bonds"),
-            "pains_alerts": prediction_result.get("pains_alerts", 0),
-            "brenk_alerts": prediction_result.get("brenk_alerts", 0),
-        }
-
-        # Generate PDF report
-        pdf_bytes = generate_molecule_report(
-            request.smiles, request.molecule_name or "", prediction_data
+        molecule_name = request.molecule_name or ""
+        # The report prints the SMILES as given, so the exact input is the key;
+        # the prediction itself is shared per canonical SMILES
+        pdf_bytes = await deadline.run(
+            report_flight.do(
+                (request.smiles, molecule_name),
+                lambda: _render_smiles_report(predictor, request.smiles, molecule_name),
+            ),
+            "report",
         )
 
         # Return as streaming response
@@ -263,6 +321,8 @@ async def generate_report_from_smiles(
             headers={"Content-Disposition": f"attachment; filename={filename}"},
         )
 
+    except (HTTPException, DeadlineExceeded):
+        raise
     except Exception as e:
         logger.error(f"Report generation failed: {e}")
         raise HTTPException(status_code=500, detail="Failed to generate report")
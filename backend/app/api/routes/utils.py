@@ -1,23 +1,64 @@
 # backend/app/api/routes/utils.py
-from fastapi import APIRouter, HTTPException, Body
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Body, Depends
+from fastapi.concurrency import run_in_threadpool
 from app.api.models import SmilesInput, PdbOutput
-from app.ml.molecule_utils import smiles_to_pdb_string
+from app.core.admission import admit_interactive
+from app.core.deadline import Deadline, cancellation_token, request_deadline
+from app.core.lanes import ExecutionLanes
+from app.core.single_flight import SingleFlight
+from app.ml.molecule_utils import canonical_smiles, smiles_to_pdb_string
+from app.ml.predictor import BBBPredictor
 
 router = APIRouter()
 
 
+def get_predictor() -> BBBPredictor:
+    """Dependency to get ML predictor instance."""
+    from app.main import app
+
+    # Ensure predictor is of the correct type for Mypy
+    assert isinstance(app.state.predictor, BBBPredictor)
+    return app.state.predictor
+
+
+# Concurrent conversions of the same molecule share one 3D embedding
+pdb_flight: SingleFlight[Optional[str]] = SingleFlight()
+
+
+async def _convert(lanes: ExecutionLanes, smiles: str) -> Optional[str]:
+    # The embedding stops between stages once no requester waits for it
+    with cancellation_token() as token:
+        return await lanes.run_interactive(smiles_to_pdb_string, smiles, token)
+
+
 @router.post(
     "/smiles-to-pdb",
     response_model=PdbOutput,
     summary="Convert SMILES to PDB",
     description="Converts a SMILES string to a 3D structure in PDB format.",
+    dependencies=[Depends(admit_interactive)],
 )
-async def convert_smiles_to_pdb(payload: SmilesInput = Body(...)) -> PdbOutput:
+async def convert_smiles_to_pdb(
+    payload: SmilesInput = Body(...),
+    deadline: Deadline = Depends(request_deadline),
+    predictor: BBBPredictor = Depends(get_predictor),
+) -> PdbOutput:
     """
     Receives a SMILES string and returns the molecule's structure in PDB format.
     - **smiles**: The SMILES string of the molecule.
     """
-    pdb_data = smiles_to_pdb_string(payload.smiles)
+    # The embedding runs on the interactive lane like other interactive work;
+    # parsing the molecule for the key is too quick to count in its latency
+    canonical = await run_in_threadpool(canonical_smiles, payload.smiles)
+    pdb_data = await deadline.run(
+        pdb_flight.do(
+            canonical or payload.smiles,
+            lambda: _convert(predictor.lanes, payload.smiles),
+        ),
+        "pdb_conversion",
+    )
     if pdb_data is None:
         raise HTTPException(
             status_code=400,
@@ -0,0 +1,209 @@
+"""
+Admission control and load shedding per workload class.
+
+Every request declares the featurization work it brings (its cost, in
+molecules) for a workload class: interactive calls such as ``/predict`` or
+batch work such as CSV jobs. Work is admitted while the pending cost of its
+class (in flight plus queued) stays under a configurable limit; beyond it the
+request is rejected immediately with ``Retry-After`` derived from the measured
+throughput of that class, instead of queueing in the threadpool until the
+client times out.
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Mapping, Optional, Tuple
+
+from fastapi import Depends, HTTPException
+from starlette.requests import HTTPConnection
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+
+
+class Overloaded(HTTPException):
+    """Raised when a workload class has no room for more work."""
+
+    def __init__(self, workload: str, retry_after: int, status_code: int) -> None:
+        super().__init__(
+            status_code=status_code,
+            detail=(
+                f"Server is at capacity for {workload} work, "
+                f"retry in {retry_after} s"
+            ),
+            headers={"Retry-After": str(retry_after)},
+        )
+        self.workload = workload
+        self.retry_after = retry_after
+
+
+class _Workload:
+    def __init__(self, max_pending: int) -> None:
+        self.max_pending = max_pending
+        self.pending = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.completed = 0
+        # (timestamp, molecules) of recent completions, for the throughput
+        self.completions: Deque[Tuple[float, int]] = deque()
+
+
+class AdmissionController:
+    """
+    Tracks pending featurization work per workload class and sheds excess load.
+
+    A class with nothing pending always admits, so a single request larger
+    than the limit (e.g. a big CSV) still runs when the service is idle.
+    """
+
+    def __init__(
+        self,
+        limits: Mapping[str, int],
+        enabled: bool = True,
+        reject_status_code: int = 503,
+        throughput_window_s: float = 30.0,
+        default_throughput: float = 10.0,
+        max_retry_after_s: int = 60,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.enabled = enabled
+        self.reject_status_code = reject_status_code
+        self.throughput_window_s = throughput_window_s
+        self.default_throughput = default_throughput
+        self.max_retry_after_s = max(1, max_retry_after_s)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._workloads = {name: _Workload(limit) for name, limit in limits.items()}
+
+    @classmethod
+    def from_settings(cls) -> "AdmissionController":
+        return cls(
+            limits={
+                INTERACTIVE: settings.ADMISSION_MAX_INTERACTIVE_PENDING,
+                BATCH: settings.ADMISSION_MAX_BATCH_PENDING,
+            },
+            enabled=settings.ADMISSION_CONTROL_ENABLED,
+            reject_status_code=settings.ADMISSION_REJECT_STATUS_CODE,
+            default_throughput=1.0 / max(settings.ESTIMATED_TIME_PER_MOLECULE, 1e-3),
+            max_retry_after_s=settings.ADMISSION_MAX_RETRY_AFTER_S,
+        )
+
+    def acquire(self, workload: str, cost: int = 1) -> None:
+        """Reserve ``cost`` molecules of work or raise ``Overloaded``."""
+        cost = max(0, cost)
+        with self._lock:
+            state = self._workloads[workload]
+            if (
+                self.enabled
+                and state.pending > 0
+                and state.pending + cost > state.max_pending
+            ):
+                state.rejected += 1
+                excess = state.pending + cost - state.max_pending
+                retry_after = self._retry_after(state, excess)
+            else:
+                state.pending += cost
+                state.admitted += 1
+                return
+        logger.warning(
+            f"Shedding {workload} request of {cost} molecules "
+            f"({state.pending} pending, retry after {retry_after} s)"
+        )
+        raise Overloaded(workload, retry_after, self.reject_status_code)
+
+    def release(
+        self, workload: str, cost: int = 1, completed: Optional[int] = None
+    ) -> None:
+        """
+        Return ``cost`` reserved molecules; ``completed`` (default ``cost``)
+        of them count towards the measured throughput.
+        """
+        with self._lock:
+            state = self._workloads[workload]
+            state.pending = max(0, state.pending - max(0, cost))
+            self._record(state, cost if completed is None else completed)
+
+    def record_completed(self, workload: str, completed: int) -> None:
+        """Count ``completed`` molecules towards the measured throughput."""
+        with self._lock:
+            self._record(self._workloads[workload], completed)
+
+    @asynccontextmanager
+    async def admit(self, workload: str, cost: int = 1) -> AsyncIterator[None]:
+        """Hold ``cost`` molecules of ``workload`` for the duration of the block."""
+        self.acquire(workload, cost)
+        completed = 0
+        try:
+            yield
+            completed = cost
+        finally:
+            self.release(workload, cost, completed=completed)
+
+    def throughput(self, workload: str) -> float:
+        """Molecules per second completed recently, or the configured estimate."""
+        with self._lock:
+            return self._throughput(self._workloads[workload])
+
+    def _record(self, state: _Workload, completed: int) -> None:
+        if completed <= 0:
+            return
+        state.completed += completed
+        state.completions.append((self._clock(), completed))
+
+    def _throughput(self, state: _Workload) -> float:
+        now = self._clock()
+        while (
+            state.completions
+            and now - state.completions[0][0] > self.throughput_window_s
+        ):
+            state.completions.popleft()
+        if not state.completions:
+            return self.default_throughput
+        done = sum(n for _, n in state.completions)
+        # A burst of completions does not extrapolate to more than its count per second
+        span = max(now - state.completions[0][0], 1.0)
+        return done / span
+
+    def _retry_after(self, state: _Workload, excess: int) -> int:
+        seconds = math.ceil(excess / self._throughput(state))
+        return min(max(seconds, 1), self.max_retry_after_s)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "workloads": {
+                    name: {
+                        "pending": state.pending,
+                        "max_pending": state.max_pending,
+                        "admitted": state.admitted,
+                        "rejected": state.rejected,
+                        "completed": state.completed,
+                        "throughput_per_s": round(self._throughput(state), 2),
+                    }
+                    for name, state in self._workloads.items()
+                },
+            }
+
+
+def get_admission(connection: HTTPConnection) -> AdmissionController:
+    """Dependency to get the admission controller of the application."""
+    admission = connection.app.state.admission
+    assert isinstance(admission, AdmissionController)
+    return admission
+
+
+async def admit_interactive(
+    admission: AdmissionController = Depends(get_admission),
+) -> AsyncIterator[None]:
+    """Route dependency holding one interactive molecule for the whole request."""
+    async with admission.admit(INTERACTIVE):
+        yield
@@ -0,0 +1,196 @@
+"""
+Negotiated gzip/brotli compression of HTTP responses.
+
+The encoding is chosen from the request's ``Accept-Encoding``: brotli when the
+client accepts it and the ``brotli`` package is installed, else gzip. Only
+text-like content types are compressed (JSON, NDJSON, CSV, ...); PDFs and
+server-sent events pass through untouched. A complete body below
+``minimum_size`` bytes is sent as is, since compressing it costs more CPU than
+it saves on the wire. Streamed bodies (CSV downloads, NDJSON predictions) are
+compressed chunk by chunk and flushed after every chunk, so a client still
+receives each chunk as soon as it is produced.
+"""
+
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional, gzip only without it
+    brotli = None
+
+_COMPRESSIBLE_TYPES = (
+    "text/csv",
+    "text/plain",
+    "text/html",
+    "application/json",
+    "application/x-ndjson",
+    "application/problem+json",
+    "image/svg+xml",
+)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick ``br`` or ``gzip`` from an ``Accept-Encoding`` header, or None."""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        token, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if token:
+            accepted[token] = quality
+    wildcard = accepted.get("*", 0.0)
+    if brotli is not None and accepted.get("br", wildcard) > 0:
+        return "br"
+    if accepted.get("gzip", wildcard) > 0:
+        return "gzip"
+    return None
+
+
+def _is_compressible(content_type: str) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type in _COMPRESSIBLE_TYPES or media_type.endswith("+json")
+
+
+class _Encoder:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int) -> None:
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._gzip = zlib.compressobj(
+                gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS
+            )
+
+    def compress(self, data: bytes, flush: bool) -> bytes:
+        """Compress ``data``; with ``flush`` everything so far becomes decodable."""
+        if self.encoding == "br":
+            out = bytes(self._brotli.process(data))
+            return out + bytes(self._brotli.flush()) if flush else out
+        out = self._gzip.compress(data)
+        return out + self._gzip.flush(zlib.Z_SYNC_FLUSH) if flush else out
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return bytes(self._brotli.finish())
+        return self._gzip.flush()
+
+
+class CompressionMiddleware:
+    """Compresses compressible responses with the encoding the client prefers."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        responder = _CompressingSender(send, encoding, self)
+        await self.app(scope, receive, responder)
+
+
+class _CompressingSender:
+    """Wraps ``send`` for one response; decides on the first body message."""
+
+    def __init__(
+        self,
+        send: Send,
+        encoding: Optional[str],
+        options: CompressionMiddleware,
+    ) -> None:
+        self._send = send
+        self._encoding = encoding
+        self._options = options
+        self._start: Optional[Message] = None
+        self._encoder: Optional[_Encoder] = None
+        self._passthrough = False
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self._start = message
+            return
+        if message["type"] != "http.response.body" or self._passthrough:
+            await self._send_start()
+            await self._send(message)
+            return
+        if self._encoder is not None:
+            await self._send_compressed(message)
+            return
+
+        assert self._start is not None
+        headers = MutableHeaders(raw=list(self._start["headers"]))
+        compressible = _is_compressible(headers.get("content-type", ""))
+        if compressible:
+            headers.add_vary_header("Accept-Encoding")
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if (
+            not compressible
+            or self._encoding is None
+            or "content-encoding" in headers
+            or (not more_body and len(body) < self._options.minimum_size)
+        ):
+            self._passthrough = True
+            self._start["headers"] = headers.raw
+            await self._send_start()
+            await self._send(message)
+            return
+
+        self._encoder = _Encoder(
+            self._encoding, self._options.gzip_level, self._options.brotli_quality
+        )
+        headers["Content-Encoding"] = self._encoding
+        # The bytes differ from the identity body: a strong ETag becomes weak
+        etag = headers.get("etag")
+        if etag is not None and not etag.startswith("W/"):
+            headers["ETag"] = "W/" + etag
+        if "content-length" in headers:
+            del headers["Content-Length"]
+        if not more_body:
+            compressed = self._encoder.compress(body, flush=False)
+            compressed += self._encoder.finish()
+            headers["Content-Length"] = str(len(compressed))
+            self._start["headers"] = headers.raw
+            await self._send_start()
+            await self._send({"type": "http.response.body", "body": compressed})
+            return
+        self._start["headers"] = headers.raw
+        await self._send_start()
+        await self._send_compressed(message)
+
+    async def _send_start(self) -> None:
+        if self._start is not None:
+            start, self._start = self._start, None
+            await self._send(start)
+
+    async def _send_compressed(self, message: Message) -> None:
+        assert self._encoder is not None
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if more_body:
+            compressed = self._encoder.compress(body, flush=True) if body else b""
+        else:
+            compressed = self._encoder.compress(body, flush=False)
+            compressed += self._encoder.finish()
+        await self._send(
+            {"type": "http.response.body", "body": compressed, "more_body": more_body}
+        )
@@ -63,11 +63,172 @@ class Settings(BaseSettings):
     MODEL_VERSION: str = "v1.0"
     FP_NBITS: int = 2048
     FP_RADIUS: int = 2
+    # Inference backend: "sklearn" (predict_proba) or "onnx" (onnxruntime, CPU)
+    INFERENCE_BACKEND: str = "sklearn"
+    # Pre-exported ONNX model; when unset or missing the model is exported in memory
+    ONNX_MODEL_PATH: Optional[str] = None
+    ONNX_INTRA_OP_THREADS: int = 0  # 0 = from the thread budget
+    # Early-exit tree voting (opt-in): evaluate trees in blocks and stop once the
+    # class is settled. Tolerance is the accepted probability of a class flip;
+    # 0 only stops when a flip is impossible (same class as the full forest).
+    EARLY_EXIT_ENABLED: bool = False
+    EARLY_EXIT_BLOCK_SIZE: int = 10
+    EARLY_EXIT_TOLERANCE: float = 0.01
+    # Tree-path attribution: default and maximum number of fingerprint bits
+    # returned per molecule, and how many to add to batch job results (0 = none)
+    CONTRIBUTION_TOP_N: int = 10
+    CONTRIBUTION_MAX_TOP_N: int = 100
+    BATCH_TOP_BITS: int = 0
+    # Fingerprint in prediction outputs and batch CSVs: "none" (omitted), "base64"
+    # or "hex" of the packed bits, or "indices" of the set bits. Requests and
+    # batch jobs can ask for another encoding
+    FINGERPRINT_ENCODING: str = "none"
+    # Extra models served next to the primary one, as comma-separated
+    # "name=path[@threshold]" entries; an empty path reuses the primary forest
+    # with another threshold, e.g. "candidate=models/v2.joblib,strict=@0.6"
+    EXTRA_MODELS_STR: str = ""
+
+    @property
+    def EXTRA_MODELS(self) -> List[str]:
+        """Entries of EXTRA_MODELS_STR, without blanks."""
+        return [
+            entry.strip() for entry in self.EXTRA_MODELS_STR.split(",") if entry.strip()
+        ]
+
+    # Shadow mode: score a sample of live traffic with a served candidate model
+    # (an EXTRA_MODELS name) in the background and track its disagreement
+    SHADOW_MODEL: Optional[str] = None
+    SHADOW_SAMPLE_RATE: float = 0.1
+    SHADOW_FLUSH_INTERVAL_S: float = 60.0
+    SHADOW_MAX_PENDING: int = 1000
+    SHADOW_BATCH_SIZE: int = 64
+
+    # Drift monitor: histograms of probabilities, applicability scores and key
+    # descriptors, compared with the training set every DRIFT_WINDOW_SIZE
+    # predictions; a feature alerts when its PSI exceeds DRIFT_PSI_THRESHOLD
+    DRIFT_MONITOR_ENABLED: bool = True
+    DRIFT_WINDOW_SIZE: int = 500
+    DRIFT_PSI_THRESHOLD: float = 0.2
+
+    # Micro-batching of concurrent single-molecule predictions: requests arriving
+    # together share one featurization pass and model call. Up to
+    # MICRO_BATCH_MAX_SIZE molecules per batch; under concurrent load a batch
+    # waits at most MICRO_BATCH_MAX_WAIT_MS for more requests (no wait when idle)
+    MICRO_BATCH_ENABLED: bool = True
+    MICRO_BATCH_MAX_SIZE: int = 64
+    MICRO_BATCH_MAX_WAIT_MS: float = 5.0
+    MICRO_BATCH_MAX_CONCURRENCY: int = 1
+
+    # Single-molecule predictions cached per canonical SMILES, requested models
+    # and model version (0 = off)
+    PREDICTION_CACHE_SIZE: int = 4096
+
+    # /predict results kept under their prediction_id for /report/{id} and
+    # /explain, at most PREDICTION_STORE_SIZE for PREDICTION_STORE_TTL_S (0 = off)
+    PREDICTION_STORE_SIZE: int = 4096
+    PREDICTION_STORE_TTL_S: float = 3600.0
+
+    # Atom highlight maps cached per canonical SMILES and model version (0 = off)
+    ATOM_HIGHLIGHT_CACHE_SIZE: int = 1024
+
+    # Admission control: molecules pending (in flight + queued) per workload
+    # class before new work is shed with ADMISSION_REJECT_STATUS_CODE and a
+    # Retry-After (capped at ADMISSION_MAX_RETRY_AFTER_S) from measured throughput
+    ADMISSION_CONTROL_ENABLED: bool = True
+    ADMISSION_MAX_INTERACTIVE_PENDING: int = 256
+    ADMISSION_MAX_BATCH_PENDING: int = 20000
+    ADMISSION_REJECT_STATUS_CODE: int = 503
+    ADMISSION_MAX_RETRY_AFTER_S: int = 60
+
+    # Thread budget: every thread pool is sized from the CPU quota (cgroup-aware,
+    # THREAD_BUDGET_CPUS overrides detection). Unset sizes come from the budget
+    THREAD_BUDGET_CPUS: Optional[float] = None
+    APP_THREADPOOL_SIZE: Optional[int] = None
+    NATIVE_THREADS: Optional[int] = None  # BLAS/OpenMP threads
+    MODEL_N_JOBS: Optional[int] = None
+
+    # Separate thread pools for interactive and batch work. Batch tasks are
+    # delayed (up to BATCH_THROTTLE_MAX_DELAY_S each) while the p95 latency of
+    # interactive work exceeds BATCH_THROTTLE_P95_MS, which leaves headroom
+    # under the 800 ms end-to-end p95 target
+    INTERACTIVE_LANE_WORKERS: Optional[int] = None
+    BATCH_LANE_WORKERS: Optional[int] = None
+    BATCH_THROTTLE_P95_MS: float = 400.0
+    BATCH_THROTTLE_MAX_DELAY_S: float = 2.0
+
+    # Per-request deadline of /predict, /report and /utils/smiles-to-pdb: the
+    # X-Request-Timeout-Ms header (capped at REQUEST_MAX_TIMEOUT_MS) or this
+    # default (0 = none). Pipeline stages are skipped once it has passed
+    REQUEST_TIMEOUT_MS: int = 30000
+    REQUEST_MAX_TIMEOUT_MS: int = 120000
+
+    # Rate limiting: token bucket per client (an X-API-Key listed in
+    # RATE_LIMIT_API_KEYS_STR, else the client IP from
+    # RATE_LIMIT_CLIENT_IP_HEADER or the peer address) refilled at
+    # RATE_LIMIT_TOKENS_PER_S up to RATE_LIMIT_BURST; calls take the tokens of
+    # their cost class. RATE_LIMIT_REDIS_URL shares the buckets between machines
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_TOKENS_PER_S: float = 1.0
+    RATE_LIMIT_BURST: float = 60.0
+    RATE_LIMIT_COST_PREDICTION: float = 1.0
+    RATE_LIMIT_COST_EXPLAIN: float = 10.0
+    RATE_LIMIT_COST_BATCH_MOLECULE: float = 0.005
+    RATE_LIMIT_CLIENT_IP_HEADER: str = "Fly-Client-IP"
+    RATE_LIMIT_REDIS_URL: str = ""
+    RATE_LIMIT_API_KEYS_STR: str = ""
+    RATE_LIMIT_REDIS_TIMEOUT_S: float = 0.25
+    # After a Redis failure, local buckets are used without asking Redis for
+    # this long; the next call after it probes Redis again
+    RATE_LIMIT_REDIS_RETRY_S: float = 5.0
+
+    @property
+    def RATE_LIMIT_API_KEYS(self) -> List[str]:
+        """Keys of RATE_LIMIT_API_KEYS_STR, without blanks."""
+        return [
+            key.strip()
+            for key in self.RATE_LIMIT_API_KEYS_STR.split(",")
+            if key.strip()
+        ]
+
+    # Response compression negotiated from Accept-Encoding (brotli, else gzip)
+    # for JSON, NDJSON and CSV bodies of at least COMPRESSION_MIN_SIZE bytes;
+    # streamed bodies are compressed chunk by chunk
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+
+    # HTTP caching (ETag, Last-Modified, Cache-Control; 304 on a matching
+    # If-None-Match) of /model/info, /explain/sample and completed batch jobs'
+    # status and results, which only change with the served models or never
+    HTTP_CACHE_MODEL_INFO_MAX_AGE_S: int = 300
+    HTTP_CACHE_STATIC_MAX_AGE_S: int = 86400
+    HTTP_CACHE_BATCH_RESULTS_MAX_AGE_S: int = 86400
+
+    # Write-behind persistence of /predict results: queued in memory (at most
+    # WRITE_BEHIND_MAX_QUEUE, newer records dropped beyond) and inserted
+    # WRITE_BEHIND_BATCH_SIZE rows at a time, or WRITE_BEHIND_FLUSH_INTERVAL_S
+    # after the first; failed inserts retry with exponential backoff
+    WRITE_BEHIND_MAX_QUEUE: int = 10000
+    WRITE_BEHIND_BATCH_SIZE: int = 100
+    WRITE_BEHIND_FLUSH_INTERVAL_S: float = 1.0
+    WRITE_BEHIND_MAX_RETRIES: int = 5
+    WRITE_BEHIND_RETRY_BASE_S: float = 0.5
+    WRITE_BEHIND_RETRY_MAX_S: float = 30.0
+    WRITE_BEHIND_DRAIN_TIMEOUT_S: float = 10.0
 
     # Batch processing limits
     MAX_BATCH_SIZE: int = 10000
     MAX_FILE_SIZE_MB: int = 50
     ESTIMATED_TIME_PER_MOLECULE: float = 0.1
+    # Largest request accepted by the synchronous POST /predict/batch endpoint
+    SYNC_BATCH_MAX_SIZE: int = 100
+    # NDJSON streaming endpoint: records scored (and results written) per chunk,
+    # and the longest input line buffered before it is rejected
+    STREAM_CHUNK_SIZE: int = 128
+    STREAM_MAX_LINE_BYTES: int = 65536
+    # Molecules per vectorized predict_proba call in batch processing
+    BATCH_INFERENCE_CHUNK_SIZE: int = 256
 
     model_config = SettingsConfigDict(
         env_file=".env", case_sensitive=True, extra="ignore"
@@ -0,0 +1,129 @@
+"""
+Streaming ingestion of uploaded molecule CSVs.
+
+Starlette spools an uploaded file to a temporary file on disk once it is
+larger than 1 MB. It is read from there a buffer at a time: the text is
+decoded incrementally and split into rows by the ``csv`` module, so neither
+the raw bytes, the decoded text nor a DataFrame of the whole file is ever held
+in memory. The size limit is checked before anything is parsed and the row
+limit as rows are read, so an oversized upload is rejected without reading
+the rest of it.
+"""
+
+import csv
+import io
+import unicodedata
+from typing import IO, Dict, Iterator, List, Optional
+
+from fastapi import HTTPException
+
+
+class UploadRejected(HTTPException):
+    """400 for an unreadable CSV, 413 for one over the size or row limit."""
+
+    def __init__(self, detail: str, status_code: int = 400) -> None:
+        super().__init__(status_code=status_code, detail=detail)
+
+
+def _upload_size(file: IO[bytes]) -> int:
+    file.seek(0, io.SEEK_END)
+    size = file.tell()
+    file.seek(0)
+    return size
+
+
+def _normalize_column(name: str) -> str:
+    return unicodedata.normalize("NFKC", name).strip().lower()
+
+
+def _clean_smiles(raw_smiles_field: str) -> str:
+    # If the SMILES field itself contains a pattern like SMILES_string,"description"...
+    # we want to extract just the SMILES_string part: a comma, an optional
+    # space and a double quote end the SMILES.
+    for separator in (',"', ', "'):
+        if separator in raw_smiles_field:
+            raw_smiles_field = raw_smiles_field.split(separator, 1)[0]
+            break
+    # Remove any leading/trailing whitespace and then any surrounding quotes.
+    return raw_smiles_field.strip().strip('"')
+
+
+def iter_molecule_records(
+    file: IO[bytes], max_bytes: int, max_rows: int
+) -> Iterator[Dict[str, str]]:
+    """
+    Yield ``{"smiles", "molecule_name"}`` for every data row of a CSV upload.
+
+    The header must have a ``smiles`` column (case-insensitive); the name comes
+    from ``molecule_name``, else ``compound_name``, else is empty. Blank lines
+    are skipped. Raises UploadRejected (400) for an empty, non UTF-8 or
+    malformed file or a missing ``smiles`` column, and (413) for a file over
+    ``max_bytes`` or with more than ``max_rows`` rows.
+    """
+    size = _upload_size(file)
+    if size == 0:
+        raise UploadRejected("Uploaded file is empty.")
+    if size > max_bytes:
+        raise UploadRejected(
+            f"File too large: {size} bytes, the limit is {max_bytes} bytes.",
+            status_code=413,
+        )
+
+    # utf-8-sig drops a leading BOM; newline="" as the csv module expects
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        reader = csv.reader(text)
+        header: Optional[List[str]] = None
+        for row in reader:
+            if not any(field.strip() for field in row):
+                continue
+            header = row
+            break
+        if header is None:
+            raise UploadRejected("CSV file is empty or unreadable.")
+
+        columns = [_normalize_column(name) for name in header]
+        if "smiles" not in columns:
+            raise UploadRejected(
+                f"CSV must contain a 'smiles' column (case-insensitive). "
+                f"After normalization, found columns: {columns}. "
+                f"Original columns were: {header}."
+            )
+        smiles_index = columns.index("smiles")
+        name_index: Optional[int] = None
+        for name_column in ("molecule_name", "compound_name"):
+            if name_column in columns:
+                name_index = columns.index(name_column)
+                break
+
+        rows = 0
+        for row in reader:
+            if not any(field.strip() for field in row):
+                continue
+            rows += 1
+            if rows > max_rows:
+                raise UploadRejected(
+                    f"Too many molecules: the limit is {max_rows} rows per file.",
+                    status_code=413,
+                )
+            smiles = row[smiles_index] if smiles_index < len(row) else ""
+            name = (
+                row[name_index]
+                if name_index is not None and name_index < len(row)
+                else ""
+            )
+            yield {"smiles": _clean_smiles(smiles), "molecule_name": name}
+    except UnicodeDecodeError:
+        raise UploadRejected("CSV file must be UTF-8 encoded.")
+    except csv.Error as e:
+        raise UploadRejected(f"Failed to parse CSV file. Error: {e}")
+    finally:
+        # The upload's file is closed by Starlette, not by the wrapper
+        text.detach()
+
+
+def read_molecule_records(
+    file: IO[bytes], max_bytes: int, max_rows: int
+) -> List[Dict[str, str]]:
+    """All records of a CSV upload (see iter_molecule_records); blocking I/O."""
+    return list(iter_molecule_records(file, max_bytes, max_rows))
@@ -0,0 +1,192 @@
+"""
+Per-request deadlines with cooperative cancellation.
+
+A request's deadline comes from the ``X-Request-Timeout-Ms`` header (capped at
+``REQUEST_MAX_TIMEOUT_MS``) or from ``REQUEST_TIMEOUT_MS``; a client
+disconnect cancels it early. A request whose deadline passes is answered with
+504 straight away, and the computation it was waiting for is cancelled once no
+other caller waits for it (see ``SingleFlight``). ``DeadlineExceeded`` is a
+plain ``TimeoutError``, so the ML code raising it does not depend on the HTTP
+layer; ``deadline_exceeded_handler`` turns it into the 504.
+
+Work already running in a thread cannot be interrupted, so the pipeline checks
+a cancellation token between stages (parse, descriptors, alerts, fingerprint,
+inference, similarity, PDF render) and skips the remaining stages once it has
+been cancelled. Skipped work is counted per stage, so ``/metrics`` shows how
+much capacity dead requests no longer take.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterator,
+    Optional,
+    TypeVar,
+)
+
+from fastapi import HTTPException, Request
+from starlette.responses import JSONResponse
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+R = TypeVar("R")
+
+DEADLINE_HEADER = "X-Request-Timeout-Ms"
+
+_stats_lock = threading.Lock()
+# Molecules (or renders) whose remaining stages were skipped, per first skipped stage
+_abandoned: Dict[str, int] = {}
+# Requests answered with 504 per stage they were waiting for
+_expired: Dict[str, int] = {}
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised for a request whose deadline passed (or whose client went away)."""
+
+    def __init__(self, stage: str) -> None:
+        super().__init__(f"Request deadline exceeded during {stage}.")
+        self.stage = stage
+
+
+async def deadline_exceeded_handler(request: Request, exc: Exception) -> JSONResponse:
+    """Exception handler answering DeadlineExceeded with 504."""
+    return JSONResponse({"detail": str(exc)}, status_code=504)
+
+
+class Deadline:
+    """
+    Expiry time and cancellation flag of one request or computation.
+
+    ``expired`` may be read from any thread; ``cancel`` is called on the event
+    loop. Without a timeout the deadline only ends by cancellation.
+    """
+
+    def __init__(
+        self,
+        timeout_s: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._clock = clock
+        self.expires_at = None if timeout_s is None else clock() + timeout_s
+        self.cancelled = False
+        self._cancelled_event = asyncio.Event()
+
+    def cancel(self) -> None:
+        self.cancelled = True
+        self._cancelled_event.set()
+
+    @property
+    def expired(self) -> bool:
+        return self.cancelled or (
+            self.expires_at is not None and self._clock() >= self.expires_at
+        )
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left, or None without a timeout."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - self._clock())
+
+    def check(self, stage: str) -> None:
+        """Count ``stage`` as abandoned and raise if the deadline has expired."""
+        if self.expired:
+            record_abandoned(stage)
+            raise DeadlineExceeded(stage)
+
+    async def run(self, awaitable: Awaitable[R], stage: str) -> R:
+        """
+        Await ``awaitable`` until the deadline expires or is cancelled, then
+        cancel it and raise ``DeadlineExceeded``.
+        """
+        task = asyncio.ensure_future(awaitable)
+        if not self.expired:
+            cancelled = asyncio.ensure_future(self._cancelled_event.wait())
+            try:
+                await asyncio.wait(
+                    {task, cancelled},
+                    timeout=self.remaining(),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+            finally:
+                cancelled.cancel()
+                if not task.done():
+                    task.cancel()
+        else:
+            task.cancel()
+        if task.done() and not task.cancelled():
+            return task.result()
+        with _stats_lock:
+            _expired[stage] = _expired.get(stage, 0) + 1
+        logger.info(f"Request deadline exceeded during {stage}, work abandoned")
+        raise DeadlineExceeded(stage)
+
+
+def record_abandoned(stage: str, count: int = 1) -> None:
+    with _stats_lock:
+        _abandoned[stage] = _abandoned.get(stage, 0) + count
+
+
+def deadline_stats() -> Dict[str, Any]:
+    """Expired requests and abandoned work per stage since startup."""
+    with _stats_lock:
+        return {"expired_requests": dict(_expired), "abandoned_work": dict(_abandoned)}
+
+
+@contextmanager
+def cancellation_token() -> Iterator[Deadline]:
+    """
+    Token for work offloaded to a thread, cancelled when the awaiting task is
+    (e.g. the last caller of a shared computation gave up).
+    """
+    token = Deadline()
+    try:
+        yield token
+    except asyncio.CancelledError:
+        token.cancel()
+        raise
+
+
+def _timeout_s(request: Request) -> Optional[float]:
+    header = request.headers.get(DEADLINE_HEADER)
+    if header is None:
+        timeout_ms = settings.REQUEST_TIMEOUT_MS
+        return timeout_ms / 1000.0 if timeout_ms > 0 else None
+    try:
+        timeout_ms = int(header)
+    except ValueError:
+        timeout_ms = 0
+    if timeout_ms <= 0:
+        raise HTTPException(
+            status_code=400,
+            detail=f"{DEADLINE_HEADER} must be a positive number of milliseconds.",
+        )
+    return min(timeout_ms, settings.REQUEST_MAX_TIMEOUT_MS) / 1000.0
+
+
+async def _cancel_on_disconnect(request: Request, deadline: Deadline) -> None:
+    # The body has already been read, so the next message is the disconnect
+    while True:
+        message = await request.receive()
+        if message["type"] == "http.disconnect":
+            deadline.cancel()
+            return
+
+
+async def request_deadline(request: Request) -> AsyncIterator[Deadline]:
+    """Dependency: the request's deadline, cancelled if the client disconnects."""
+    deadline = Deadline(_timeout_s(request))
+    watcher = asyncio.create_task(_cancel_on_disconnect(request, deadline))
+    try:
+        yield deadline
+    finally:
+        watcher.cancel()
@@ -0,0 +1,106 @@
+"""
+HTTP validators and conditional requests for responses that do not change.
+
+An ETag is derived from what determines a response (the model version, a
+batch job's id once completed), so it can be computed before the response is:
+a request whose ``If-None-Match`` matches gets ``304 Not Modified`` without
+the work, the database or the storage behind the response. Since ``*``
+matches any current representation, a 304 for it is only answered once the
+resource is known to exist in that state. ``If-Modified-Since`` is honoured when there is no
+``If-None-Match``. Cache-Control lets the nginx frontend and browsers reuse
+the response for a while and revalidate it after.
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+# Responses that can change: always revalidate, never reuse unchecked
+NO_CACHE = "no-cache"
+
+
+def etag_for(*parts: str) -> str:
+    """Strong ETag for the values that determine a response."""
+    digest = hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def cache_control(max_age_s: int, public: bool = True, immutable: bool = False) -> str:
+    """Cache-Control header value for a cacheable response."""
+    value = f"{'public' if public else 'private'}, max-age={max(0, max_age_s)}"
+    return value + ", immutable" if immutable else value
+
+
+def cache_headers(
+    etag: str,
+    cache_control_value: str,
+    last_modified: Optional[datetime] = None,
+) -> Dict[str, str]:
+    """ETag, Cache-Control and (when known) Last-Modified headers."""
+    headers = {"ETag": etag, "Cache-Control": cache_control_value}
+    if last_modified is not None:
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        headers["Last-Modified"] = format_datetime(
+            last_modified.astimezone(timezone.utc), usegmt=True
+        )
+    return headers
+
+
+def _etag_matches(if_none_match: str, etag: str, wildcard: bool = True) -> bool:
+    # Weak comparison (RFC 9110 13.1.2): W/ prefixes are ignored
+    opaque = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            if wildcard:
+                return True
+        elif candidate.removeprefix("W/") == opaque:
+            return True
+    return False
+
+
+def etag_listed(request: Request, etag: str) -> bool:
+    """
+    Whether If-None-Match names ``etag`` itself (not ``*``): the client holds a
+    copy that was only issued once the resource reached that state, so it can
+    be answered with a 304 before looking the resource up.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    return if_none_match is not None and _etag_matches(
+        if_none_match, etag, wildcard=False
+    )
+
+
+def is_not_modified(
+    request: Request, etag: str, last_modified: Optional[datetime] = None
+) -> bool:
+    """
+    Whether the client's cached copy (If-None-Match, else If-Modified-Since) is
+    current; only ask for a resource that exists, as ``*`` matches any.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        # HTTP dates have whole seconds
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def not_modified(headers: Dict[str, str]) -> Response:
+    """``304 Not Modified`` carrying the response's validators."""
+    return Response(status_code=304, headers=headers)
@@ -0,0 +1,156 @@
+"""
+Separate execution lanes for interactive and batch work.
+
+Interactive work (``/predict`` and friends) and batch work (CSV jobs, inline
+batches, streams) run on their own, separately sized thread pools, so a large
+job can no longer fill the threadpool that interactive requests wait on.
+Interactive work also has priority: the latency of recent interactive tasks
+(queue wait included) is tracked, and while its p95 is above the throttle
+threshold every batch task is delayed before it starts, the delay doubling
+while the threshold is exceeded and halving once latency recovers. Batch work
+therefore yields CPU (and the GIL) to interactive requests instead of sharing
+it evenly.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+import numpy as np
+
+from app.core.admission import BATCH, INTERACTIVE
+from app.core.config import settings
+from app.core.thread_budget import get_thread_budget
+
+logger = logging.getLogger(__name__)
+
+R = TypeVar("R")
+
+# First delay applied to batch tasks once throttling starts
+_MIN_BATCH_DELAY_S = 0.01
+# Fewest interactive samples in the window for a p95 to be acted upon
+_MIN_SAMPLES = 5
+
+
+class ExecutionLanes:
+    """Interactive and batch thread pools with latency-driven batch throttling."""
+
+    def __init__(
+        self,
+        interactive_workers: int = 4,
+        batch_workers: int = 1,
+        throttle_p95_ms: float = 400.0,
+        max_batch_delay_s: float = 2.0,
+        window_s: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.interactive_workers = max(1, interactive_workers)
+        self.batch_workers = max(1, batch_workers)
+        self.throttle_p95_ms = throttle_p95_ms
+        self.max_batch_delay_s = max_batch_delay_s
+        self.window_s = window_s
+        self._clock = clock
+        self._interactive = ThreadPoolExecutor(
+            max_workers=self.interactive_workers, thread_name_prefix="interactive"
+        )
+        self._batch = ThreadPoolExecutor(
+            max_workers=self.batch_workers, thread_name_prefix="batch"
+        )
+        # (finished at, latency in ms) of recent interactive tasks
+        self._latencies: Deque[Tuple[float, float]] = deque()
+        self.batch_delay_s = 0.0
+        self.interactive_tasks = 0
+        self.batch_tasks = 0
+        self.throttled_batch_tasks = 0
+        self.batch_throttle_s = 0.0
+
+    @classmethod
+    def from_settings(cls) -> "ExecutionLanes":
+        budget = get_thread_budget()
+        return cls(
+            interactive_workers=budget.interactive_workers,
+            batch_workers=budget.batch_workers,
+            throttle_p95_ms=settings.BATCH_THROTTLE_P95_MS,
+            max_batch_delay_s=settings.BATCH_THROTTLE_MAX_DELAY_S,
+        )
+
+    async def run(self, lane: str, fn: Callable[..., R], *args: Any) -> R:
+        """Run ``fn(*args)`` on ``lane`` (``INTERACTIVE`` or ``BATCH``)."""
+        if lane == INTERACTIVE:
+            return await self.run_interactive(fn, *args)
+        if lane == BATCH:
+            return await self.run_batch(fn, *args)
+        raise ValueError(f"Unknown execution lane: {lane}")
+
+    async def run_interactive(self, fn: Callable[..., R], *args: Any) -> R:
+        """Run ``fn(*args)`` on the interactive pool, recording its latency."""
+        start = self._clock()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._interactive, partial(fn, *args)
+            )
+        finally:
+            now = self._clock()
+            self._latencies.append((now, (now - start) * 1000.0))
+            # Pruned here too, so interactive-only traffic does not grow it
+            self._prune_latencies(now)
+            self.interactive_tasks += 1
+
+    async def run_batch(self, fn: Callable[..., R], *args: Any) -> R:
+        """Run ``fn(*args)`` on the batch pool once interactive latency allows."""
+        delay = self._next_batch_delay()
+        if delay > 0:
+            self.throttled_batch_tasks += 1
+            self.batch_throttle_s += delay
+            await asyncio.sleep(delay)
+        self.batch_tasks += 1
+        return await asyncio.get_running_loop().run_in_executor(
+            self._batch, partial(fn, *args)
+        )
+
+    def interactive_p95_ms(self) -> Optional[float]:
+        """p95 latency of the interactive tasks of the last ``window_s`` seconds."""
+        self._prune_latencies(self._clock())
+        if len(self._latencies) < _MIN_SAMPLES:
+            return None
+        return float(np.percentile([ms for _, ms in self._latencies], 95))
+
+    def _prune_latencies(self, now: float) -> None:
+        cutoff = now - self.window_s
+        while self._latencies and self._latencies[0][0] < cutoff:
+            self._latencies.popleft()
+
+    def _next_batch_delay(self) -> float:
+        p95 = self.interactive_p95_ms()
+        if p95 is not None and p95 > self.throttle_p95_ms:
+            self.batch_delay_s = min(
+                max(self.batch_delay_s * 2, _MIN_BATCH_DELAY_S),
+                self.max_batch_delay_s,
+            )
+        elif self.batch_delay_s > 0:
+            self.batch_delay_s /= 2
+            if self.batch_delay_s < _MIN_BATCH_DELAY_S:
+                self.batch_delay_s = 0.0
+        return self.batch_delay_s
+
+    def stats(self) -> Dict[str, Any]:
+        p95 = self.interactive_p95_ms()
+        return {
+            "interactive_workers": self.interactive_workers,
+            "batch_workers": self.batch_workers,
+            "interactive_tasks": self.interactive_tasks,
+            "batch_tasks": self.batch_tasks,
+            "interactive_p95_ms": round(p95, 2) if p95 is not None else None,
+            "throttle_p95_ms": self.throttle_p95_ms,
+            "batch_delay_s": round(self.batch_delay_s, 3),
+            "throttled_batch_tasks": self.throttled_batch_tasks,
+            "batch_throttle_s": round(self.batch_throttle_s, 3),
+        }
+
+    def shutdown(self) -> None:
+        self._interactive.shutdown(wait=False, cancel_futures=True)
+        self._batch.shutdown(wait=False, cancel_futures=True)
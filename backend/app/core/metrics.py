@@ -0,0 +1,169 @@
+"""
+Prometheus text exposition of the service's runtime metrics.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.deadline import deadline_stats
+from app.core.thread_budget import get_thread_budget
+
+Sample = Tuple[Dict[str, str], float]
+
+
+class _Exposition:
+    def __init__(self) -> None:
+        self.lines: List[str] = []
+
+    def add(self, name: str, kind: str, help_text: str, samples: List[Sample]) -> None:
+        self.lines.append(f"# HELP vitronmax_{name} {help_text}")
+        self.lines.append(f"# TYPE vitronmax_{name} {kind}")
+        for labels, value in samples:
+            label_text = ",".join(
+                f'{key}="{_escape(str(label))}"' for key, label in labels.items()
+            )
+            suffix = f"{{{label_text}}}" if label_text else ""
+            self.lines.append(f"vitronmax_{name}{suffix} {float(value)!r}")
+
+    def render(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_metrics(app: Any) -> str:
+    """
+    Render the thread budget, execution lane, admission, rate limit and
+    deadline metrics of ``app``.
+    """
+    out = _Exposition()
+    budget = get_thread_budget()
+    out.add("cpu_quota", "gauge", "CPUs available to the process.", [({}, budget.cpus)])
+    out.add(
+        "thread_pool_size",
+        "gauge",
+        "Threads allotted to each pool by the thread budget.",
+        [
+            ({"pool": "interactive"}, budget.interactive_workers),
+            ({"pool": "batch"}, budget.batch_workers),
+            ({"pool": "app"}, budget.app_threads),
+            ({"pool": "native"}, budget.native_threads),
+            ({"pool": "model_n_jobs"}, budget.model_n_jobs),
+            ({"pool": "onnx_intra_op"}, budget.onnx_threads),
+        ],
+    )
+    out.add(
+        "native_threads",
+        "gauge",
+        "Threads of each loaded BLAS/OpenMP library.",
+        [
+            (
+                {
+                    "library": pool["library"],
+                    "internal_api": pool["internal_api"],
+                    "api": pool["user_api"],
+                },
+                pool["num_threads"],
+            )
+            for pool in budget.native_pools
+        ],
+    )
+
+    predictor: Optional[Any] = getattr(app.state, "predictor", None)
+    if predictor is not None:
+        lanes = predictor.lanes.stats()
+        out.add(
+            "lane_tasks_total",
+            "counter",
+            "Tasks run on each execution lane.",
+            [
+                ({"lane": "interactive"}, lanes["interactive_tasks"]),
+                ({"lane": "batch"}, lanes["batch_tasks"]),
+            ],
+        )
+        if lanes["interactive_p95_ms"] is not None:
+            out.add(
+                "interactive_p95_ms",
+                "gauge",
+                "p95 latency of recent interactive tasks.",
+                [({}, lanes["interactive_p95_ms"])],
+            )
+        out.add(
+            "batch_delay_seconds",
+            "gauge",
+            "Current delay applied to batch tasks.",
+            [({}, lanes["batch_delay_s"])],
+        )
+
+    admission: Optional[Any] = getattr(app.state, "admission", None)
+    if admission is not None:
+        workloads = admission.stats()["workloads"]
+        out.add(
+            "admission_pending",
+            "gauge",
+            "Molecules pending per workload class.",
+            [({"workload": name}, w["pending"]) for name, w in workloads.items()],
+        )
+        out.add(
+            "admission_rejected_total",
+            "counter",
+            "Requests shed per workload class.",
+            [({"workload": name}, w["rejected"]) for name, w in workloads.items()],
+        )
+
+    limiter: Optional[Any] = getattr(app.state, "rate_limiter", None)
+    if limiter is not None:
+        limits = limiter.stats()
+        out.add(
+            "rate_limited_total",
+            "counter",
+            "Calls refused (or, for streams, delayed) by the rate limiter per cost class.",
+            [({"cost_class": name}, n) for name, n in limits["limited"].items()],
+        )
+        out.add(
+            "rate_limit_backend_errors_total",
+            "counter",
+            "Shared rate limit backend failures answered from local buckets.",
+            [({}, limits["backend_errors"])],
+        )
+
+    writer: Optional[Any] = getattr(app.state, "prediction_writer", None)
+    if writer is not None:
+        writes = writer.stats()
+        out.add(
+            "prediction_writes_queued",
+            "gauge",
+            "Single predictions waiting in the write-behind queue.",
+            [({}, writes["queued"])],
+        )
+        out.add(
+            "prediction_writes_total",
+            "counter",
+            "Single predictions leaving the write-behind queue, per outcome.",
+            [
+                ({"outcome": outcome}, writes[outcome])
+                for outcome in ("written", "failed", "dropped")
+            ],
+        )
+        out.add(
+            "prediction_write_retries_total",
+            "counter",
+            "Bulk inserts of single predictions retried after a failure.",
+            [({}, writes["retries"])],
+        )
+
+    deadlines = deadline_stats()
+    out.add(
+        "deadline_exceeded_total",
+        "counter",
+        "Requests answered with 504 after their deadline passed, per awaited step.",
+        [({"step": step}, n) for step, n in deadlines["expired_requests"].items()],
+    )
+    out.add(
+        "abandoned_work_total",
+        "counter",
+        "Molecules or renders whose remaining stages were skipped, per first skipped stage.",
+        [({"stage": stage}, n) for stage, n in deadlines["abandoned_work"].items()],
+    )
+    return out.render()
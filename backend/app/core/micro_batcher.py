@@ -0,0 +1,164 @@
+"""
+Micro-batching of concurrent single-item requests.
+
+Concurrent callers of ``MicroBatcher.submit`` are gathered into one call of a
+synchronous, vectorized ``process`` function that runs in the threadpool, and
+each caller's future is resolved with its own result. The batch size follows
+the load: while ``max_concurrency`` batches are running, new items queue up
+and the next batch takes everything queued (up to ``max_batch_size``). The
+wait window only opens once recent batches show concurrent arrivals, so an
+isolated request at low load is dispatched immediately.
+"""
+
+import asyncio
+import logging
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Generic,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+from fastapi.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Smoothing factor of the moving average of the batch size
+_EWMA_ALPHA = 0.2
+# Average batch size from which the wait window is opened
+_CONCURRENT_LOAD = 1.5
+
+
+class MicroBatcher(Generic[T, R]):
+    """
+    Gathers concurrent items into vectorized calls of ``process``.
+
+    ``process`` receives a list of items and must return one result per item,
+    in order; if it raises, every caller of that batch gets the exception.
+    ``run(process, items)`` offloads a batch (default: the Starlette threadpool).
+    """
+
+    def __init__(
+        self,
+        process: Callable[[List[T]], List[R]],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+        max_concurrency: int = 1,
+        run: Optional[
+            Callable[[Callable[[List[T]], List[R]], List[T]], Awaitable[List[R]]]
+        ] = None,
+    ) -> None:
+        self.process = process
+        self.run = run or run_in_threadpool
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_s = max(0.0, max_wait_ms) / 1000.0
+        self.max_concurrency = max(1, max_concurrency)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: List[Tuple[T, "asyncio.Future[R]"]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set["asyncio.Task[None]"] = set()
+        self._in_flight = 0
+        self._avg_batch_size = 1.0
+        self.batches = 0
+        self.items = 0
+        self.max_observed_batch = 0
+
+    async def submit(self, item: T) -> R:
+        """Queue ``item`` and wait for its result."""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Futures and timers belong to one event loop (one per test client)
+            self._reset(loop)
+        future: "asyncio.Future[R]" = loop.create_future()
+        self._queue.append((item, future))
+        self._schedule()
+        return await future
+
+    def _reset(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+        self._queue = []
+        self._timer = None
+        self._tasks = set()
+        self._in_flight = 0
+
+    def _window_s(self) -> float:
+        """Wait window for the next batch: open only under concurrent load."""
+        return self.max_wait_s if self._avg_batch_size >= _CONCURRENT_LOAD else 0.0
+
+    def _schedule(self) -> None:
+        if not self._queue or self._in_flight >= self.max_concurrency:
+            return
+        window = self._window_s()
+        if len(self._queue) >= self.max_batch_size or window == 0.0:
+            self._dispatch()
+        elif self._timer is None:
+            assert self._loop is not None
+            self._timer = self._loop.call_later(window, self._on_timer)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        if self._queue and self._in_flight < self.max_concurrency:
+            self._dispatch()
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch = self._queue[: self.max_batch_size]
+        self._queue = self._queue[self.max_batch_size :]
+        # Callers that went away (e.g. client disconnects) are not processed
+        batch = [(item, future) for item, future in batch if not future.done()]
+        if not batch:
+            self._schedule()
+            return
+        assert self._loop is not None
+        self._in_flight += 1
+        task = self._loop.create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[T, "asyncio.Future[R]"]]) -> None:
+        try:
+            results = await self.run(self.process, [item for item, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(
+                    f"Micro-batch returned {len(results)} results for {len(batch)} items"
+                )
+        except Exception as e:
+            logger.error(f"Micro-batch of {len(batch)} items failed: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self._in_flight -= 1
+            self.batches += 1
+            self.items += len(batch)
+            self.max_observed_batch = max(self.max_observed_batch, len(batch))
+            self._avg_batch_size += _EWMA_ALPHA * (len(batch) - self._avg_batch_size)
+            self._schedule()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_s * 1000.0,
+            "max_concurrency": self.max_concurrency,
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else None,
+            "recent_batch_size": round(self._avg_batch_size, 2),
+            "queued": len(self._queue),
+            "in_flight": self._in_flight,
+        }
@@ -0,0 +1,72 @@
+"""
+Incremental splitting of a streamed request body into lines, and a streaming
+response that can be produced while that body is still being read.
+"""
+
+from typing import AsyncIterator, Optional, Tuple
+
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    Streaming response whose body iterator reads the request body.
+
+    ``StreamingResponse`` watches for client disconnects with its own
+    ``receive()`` loop on older ASGI servers, which would swallow the request
+    body messages. Here disconnects surface through the request stream itself
+    (``ClientDisconnect``) or as a failed send. The background task runs even
+    after a disconnect, so it can release what was held for the stream.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+        finally:
+            if self.background is not None:
+                await self.background()
+
+
+async def iter_lines(
+    chunks: AsyncIterator[bytes], max_line_bytes: int
+) -> AsyncIterator[Tuple[int, Optional[str]]]:
+    """
+    Yield ``(line_number, text)`` for every line of a chunked byte stream.
+
+    Line numbers start at 1 and count blank lines too. At most
+    ``max_line_bytes`` of a line are buffered: a longer line is discarded up
+    to its newline and yielded with ``text`` None, so memory stays bounded
+    whatever the input. Invalid UTF-8 is replaced rather than rejected.
+    """
+    buffer = bytearray()
+    overflow = False
+    line_number = 0
+    async for chunk in chunks:
+        start = 0
+        while True:
+            newline = chunk.find(b"\n", start)
+            piece = chunk[start:] if newline == -1 else chunk[start:newline]
+            if not overflow:
+                buffer += piece
+                if len(buffer) > max_line_bytes:
+                    overflow = True
+                    buffer.clear()
+            if newline == -1:
+                break
+            line_number += 1
+            yield line_number, _decode(buffer, overflow)
+            buffer.clear()
+            overflow = False
+            start = newline + 1
+    if buffer or overflow:
+        yield line_number + 1, _decode(buffer, overflow)
+
+
+def _decode(buffer: bytearray, overflow: bool) -> Optional[str]:
+    if overflow:
+        return None
+    return buffer.decode("utf-8", errors="replace").rstrip("\r")
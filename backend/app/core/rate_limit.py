@@ -0,0 +1,373 @@
+"""
+Per-client token-bucket rate limiting.
+
+Every client key has a bucket: a known ``X-API-Key`` (one listed in
+``RATE_LIMIT_API_KEYS_STR``) has its own, any other request shares its client
+IP's, so sending a new key does not buy a fresh burst. A bucket refills at
+``RATE_LIMIT_TOKENS_PER_S`` up to ``RATE_LIMIT_BURST`` tokens.
+Each call takes tokens according to its cost class:
+
+- ``prediction``: single-molecule endpoints (``/predict``, reports, PDB, ...)
+  and WebSocket messages, given back for a message superseded by the next;
+- ``explain``: ``/explain``, which also spends OpenAI tokens;
+- ``batch_molecule``: per molecule of inline batches, streams and CSV jobs.
+
+A call that finds too few tokens gets 429 with a ``Retry-After`` for when the
+bucket will hold enough (streams are slowed down instead). Fixed-cost
+endpoints are charged by ``RateLimitMiddleware`` before the request is routed;
+batch endpoints charge their molecules with ``charge`` once they have counted
+them.
+
+Buckets live in process by default. With ``RATE_LIMIT_REDIS_URL`` they are
+shared between machines through Redis, updated atomically by a Lua script on
+the Redis clock; if Redis fails, the local buckets take over without asking
+Redis again for ``RATE_LIMIT_REDIS_RETRY_S``, then the next call probes it.
+"""
+
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional, Tuple
+
+from fastapi import HTTPException
+from starlette.requests import HTTPConnection
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PREDICTION = "prediction"
+EXPLAIN = "explain"
+BATCH_MOLECULE = "batch_molecule"
+
+API_KEY_HEADER = "X-API-Key"
+
+_PREFIX = "/api/v1"
+# Endpoints charged a fixed cost per request by the middleware
+_ROUTE_COSTS: Dict[Tuple[str, str], str] = {
+    ("POST", f"{_PREFIX}/predict"): PREDICTION,
+    ("POST", f"{_PREFIX}/predict/contributions"): PREDICTION,
+    ("POST", f"{_PREFIX}/predict/atom-highlights"): PREDICTION,
+    ("POST", f"{_PREFIX}/report"): PREDICTION,
+    ("POST", f"{_PREFIX}/utils/smiles-to-pdb"): PREDICTION,
+    ("POST", f"{_PREFIX}/explain"): EXPLAIN,
+}
+# Endpoints with a path parameter, charged by the path prefix before it
+_ROUTE_PREFIX_COSTS: Dict[Tuple[str, str], str] = {
+    ("GET", f"{_PREFIX}/report/"): PREDICTION,
+}
+
+
+def route_cost_class(method: str, path: str) -> Optional[str]:
+    """Cost class the middleware charges for a request, or None if it is free."""
+    cost_class = _ROUTE_COSTS.get((method, path))
+    if cost_class is not None:
+        return cost_class
+    for (prefix_method, prefix), prefix_cost in _ROUTE_PREFIX_COSTS.items():
+        if method == prefix_method and path.startswith(prefix):
+            return prefix_cost
+    return None
+
+
+# Atomically refills and takes from one bucket; returns the seconds to wait
+# (0 when taken). A negative cost gives tokens back, up to the burst. Uses the
+# Redis clock so every machine agrees on time.
+_TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= cost then
+  tokens = math.min(burst, tokens - cost)
+else
+  wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return tostring(wait)
+"""
+
+
+def _hash_key(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode()).hexdigest()[:32]
+
+
+class RateLimited(HTTPException):
+    """429 with a ``Retry-After`` (whole seconds) for a key out of tokens."""
+
+    def __init__(self, cost_class: str, retry_after: float) -> None:
+        self.retry_after = max(1, math.ceil(retry_after))
+        self.cost_class = cost_class
+        super().__init__(
+            status_code=429,
+            detail=f"Rate limit exceeded ({cost_class}); retry later.",
+            headers={"Retry-After": str(self.retry_after)},
+        )
+
+
+class MemoryBucketBackend:
+    """Token buckets in this process, the least recently used beyond ``max_keys`` dropped."""
+
+    name = "memory"
+
+    def __init__(
+        self, max_keys: int = 100000, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.max_keys = max(1, max_keys)
+        self._clock = clock
+        # key -> (tokens, updated at)
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def take(self, key: str, cost: float, rate: float, burst: float) -> float:
+        """
+        Take ``cost`` tokens from ``key``'s bucket; return 0 or the seconds to
+        wait. A negative cost gives tokens back, up to the burst.
+        """
+        now = self._clock()
+        tokens, updated = self._buckets.pop(key, (burst, now))
+        tokens = min(burst, tokens + max(0.0, now - updated) * rate)
+        wait = 0.0
+        if tokens >= cost:
+            tokens = min(burst, tokens - cost)
+        else:
+            wait = (cost - tokens) / rate
+        self._buckets[key] = (tokens, now)
+        while len(self._buckets) > self.max_keys:
+            # A dropped bucket restarts full, as for a new key
+            self._buckets.popitem(last=False)
+        return wait
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    async def close(self) -> None:
+        self._buckets.clear()
+
+
+class RedisBucketBackend:
+    """Token buckets shared between machines through Redis."""
+
+    name = "redis"
+
+    def __init__(self, client: Any, prefix: str = "vitronmax:ratelimit:") -> None:
+        self._client = client
+        self.prefix = prefix
+        self._script = client.register_script(_TOKEN_BUCKET_LUA)
+
+    async def take(self, key: str, cost: float, rate: float, burst: float) -> float:
+        wait = await self._script(keys=[self.prefix + key], args=[rate, burst, cost])
+        return float(wait)
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+class RateLimiter:
+    """Takes tokens per client key and cost class from a bucket backend."""
+
+    def __init__(
+        self,
+        tokens_per_s: float = 1.0,
+        burst: float = 60.0,
+        costs: Optional[Mapping[str, float]] = None,
+        backend: Optional[Any] = None,
+        enabled: bool = True,
+        client_ip_header: str = "",
+        api_keys: Iterable[str] = (),
+        backend_retry_s: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.enabled = enabled
+        self.tokens_per_s = max(tokens_per_s, 1e-6)
+        self.burst = max(burst, 1e-6)
+        self.costs: Dict[str, float] = dict(
+            costs or {PREDICTION: 1.0, EXPLAIN: 10.0, BATCH_MOLECULE: 0.005}
+        )
+        self.local = MemoryBucketBackend()
+        self.backend = backend or self.local
+        self.client_ip_header = client_ip_header
+        self._api_key_hashes = {_hash_key(key) for key in api_keys}
+        self.allowed: Dict[str, int] = {name: 0 for name in self.costs}
+        self.limited: Dict[str, int] = {name: 0 for name in self.costs}
+        self.backend_errors = 0
+        self.backend_retry_s = max(0.0, backend_retry_s)
+        self._clock = clock
+        self._backend_failing = False
+        # While failing, the shared backend is skipped until this time
+        self._backend_retry_at = 0.0
+
+    @classmethod
+    def from_settings(cls) -> "RateLimiter":
+        backend = None
+        if settings.RATE_LIMIT_ENABLED and settings.RATE_LIMIT_REDIS_URL:
+            try:
+                import redis.asyncio as redis
+
+                backend = RedisBucketBackend(
+                    redis.from_url(
+                        settings.RATE_LIMIT_REDIS_URL,
+                        socket_timeout=settings.RATE_LIMIT_REDIS_TIMEOUT_S,
+                        socket_connect_timeout=settings.RATE_LIMIT_REDIS_TIMEOUT_S,
+                    )
+                )
+            except ImportError as e:
+                logger.warning(
+                    f"redis not installed, rate limit buckets stay in process: {e}"
+                )
+        return cls(
+            tokens_per_s=settings.RATE_LIMIT_TOKENS_PER_S,
+            burst=settings.RATE_LIMIT_BURST,
+            costs={
+                PREDICTION: settings.RATE_LIMIT_COST_PREDICTION,
+                EXPLAIN: settings.RATE_LIMIT_COST_EXPLAIN,
+                BATCH_MOLECULE: settings.RATE_LIMIT_COST_BATCH_MOLECULE,
+            },
+            backend=backend,
+            enabled=settings.RATE_LIMIT_ENABLED,
+            client_ip_header=settings.RATE_LIMIT_CLIENT_IP_HEADER,
+            api_keys=settings.RATE_LIMIT_API_KEYS,
+            backend_retry_s=settings.RATE_LIMIT_REDIS_RETRY_S,
+        )
+
+    def client_key(self, connection: HTTPConnection) -> str:
+        """Bucket key of a request: its hashed API key if known, else its client IP."""
+        api_key = connection.headers.get(API_KEY_HEADER)
+        if api_key:
+            key_hash = _hash_key(api_key)
+            if key_hash in self._api_key_hashes:
+                return "key:" + key_hash
+        ip = (
+            connection.headers.get(self.client_ip_header)
+            if self.client_ip_header
+            else None
+        )
+        if not ip and connection.client is not None:
+            ip = connection.client.host
+        return f"ip:{ip or 'unknown'}"
+
+    async def take(self, key: str, cost_class: str, units: float = 1.0) -> float:
+        """
+        Take ``units`` calls of ``cost_class`` from ``key``'s bucket; return 0
+        or the seconds until the bucket holds enough. A cost above the burst
+        takes the whole bucket, so the largest batch can still run.
+        """
+        if not self.enabled:
+            return 0.0
+        cost = min(self.costs[cost_class] * units, self.burst)
+        if cost <= 0:
+            return 0.0
+        wait = await self._take(key, cost)
+        if wait > 0:
+            self.limited[cost_class] += 1
+        else:
+            self.allowed[cost_class] += 1
+        return wait
+
+    async def _take(self, key: str, cost: float) -> float:
+        if self.backend is self.local or (
+            self._backend_failing and self._clock() < self._backend_retry_at
+        ):
+            # Not waiting for a timeout from a backend that just failed
+            return await self.local.take(key, cost, self.tokens_per_s, self.burst)
+        try:
+            wait = await self.backend.take(key, cost, self.tokens_per_s, self.burst)
+        except Exception as e:
+            self.backend_errors += 1
+            if not self._backend_failing:
+                logger.warning(
+                    f"Shared rate limit backend failed, using local buckets: {e}"
+                )
+            self._backend_failing = True
+            self._backend_retry_at = self._clock() + self.backend_retry_s
+            return await self.local.take(key, cost, self.tokens_per_s, self.burst)
+        if self._backend_failing:
+            logger.info("Shared rate limit backend recovered")
+            self._backend_failing = False
+        return wait
+
+    async def charge(
+        self, connection: HTTPConnection, cost_class: str, units: float = 1.0
+    ) -> None:
+        """Take tokens for a request or raise RateLimited."""
+        wait = await self.take(self.client_key(connection), cost_class, units)
+        if wait > 0:
+            raise RateLimited(cost_class, wait)
+
+    async def refund(
+        self, connection: HTTPConnection, cost_class: str, units: float = 1.0
+    ) -> None:
+        """Give back the tokens ``charge`` took for work that was not done."""
+        if not self.enabled:
+            return
+        cost = min(self.costs[cost_class] * units, self.burst)
+        if cost <= 0:
+            return
+        await self._take(self.client_key(connection), -cost)
+        self.allowed[cost_class] -= 1
+
+    async def throttle(
+        self, connection: HTTPConnection, cost_class: str, units: float = 1.0
+    ) -> None:
+        """Take tokens for a request, waiting until the bucket holds enough."""
+        key = self.client_key(connection)
+        while True:
+            wait = await self.take(key, cost_class, units)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "backend": self.backend.name,
+            "tokens_per_s": self.tokens_per_s,
+            "burst": self.burst,
+            "costs": dict(self.costs),
+            "allowed": dict(self.allowed),
+            "limited": dict(self.limited),
+            "backend_errors": self.backend_errors,
+            "backend_failing": self._backend_failing,
+            "local_keys": len(self.local),
+        }
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+
+def get_rate_limiter(connection: HTTPConnection) -> Optional[RateLimiter]:
+    """Dependency: the application's rate limiter, if one is configured."""
+    limiter: Optional[RateLimiter] = getattr(connection.app.state, "rate_limiter", None)
+    return limiter
+
+
+class RateLimitMiddleware:
+    """Charges the fixed-cost endpoints before routing; answers 429 when out of tokens."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            cost_class = route_cost_class(scope["method"], scope["path"])
+            limiter = getattr(scope["app"].state, "rate_limiter", None)
+            if cost_class is not None and limiter is not None:
+                try:
+                    await limiter.charge(HTTPConnection(scope), cost_class)
+                except RateLimited as e:
+                    response = JSONResponse(
+                        {"detail": e.detail}, status_code=429, headers=e.headers
+                    )
+                    await response(scope, receive, send)
+                    return
+        await self.app(scope, receive, send)
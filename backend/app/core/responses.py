@@ -0,0 +1,34 @@
+"""
+Fast JSON responses for the hot endpoints.
+
+Returning a ``Response`` from an endpoint bypasses FastAPI's response model
+handling, which would validate the already validated response model again
+and, for plain dicts, walk them with ``jsonable_encoder`` before ``json.dumps``.
+``ORJSONResponse`` serializes with orjson instead, which also handles numpy
+scalars and arrays coming straight from the predictor; response models are
+dumped by pydantic's own (Rust) serializer, which is as fast. Endpoints keep
+their ``response_model`` for the OpenAPI schema.
+"""
+
+from typing import Any
+
+import orjson
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+# UTC as "Z", as pydantic writes it
+_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize ``content`` (JSON types, numpy values, datetimes) with orjson."""
+    return orjson.dumps(content, option=_OPTIONS)
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response serialized with orjson, or by pydantic for response models."""
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.model_dump_json().encode("utf-8")
+        return dumps(content)
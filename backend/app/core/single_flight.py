@@ -0,0 +1,80 @@
+"""
+Single-flight coalescing of identical concurrent computations.
+
+While a computation for a key is in flight, further callers with the same key
+wait for it and get its result (or exception) instead of starting their own.
+A computation whose callers have all been cancelled is cancelled too. Nothing
+is kept once it completes; caching finished results is a separate concern.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, Optional, TypeVar
+
+R = TypeVar("R")
+
+
+class SingleFlight(Generic[R]):
+    """Shares one in-flight computation between concurrent callers of a key."""
+
+    def __init__(self) -> None:
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._in_flight: Dict[Hashable, "asyncio.Task[R]"] = {}
+        self._waiters: Dict[Hashable, int] = {}
+        self.started = 0
+        self.coalesced = 0
+        self.abandoned = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[R]]) -> R:
+        """
+        Return the result of ``fn()``, shared with concurrent callers of ``key``.
+
+        The computation runs as its own task, so a caller that is cancelled
+        (e.g. the client disconnected or sent a newer input) does not cancel it
+        for the others; it is only cancelled once no caller is left waiting.
+        """
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Tasks belong to one event loop (one per test client)
+            self._loop = loop
+            self._in_flight = {}
+            self._waiters = {}
+        task = self._in_flight.get(key)
+        if task is None:
+            task = loop.create_task(self._run(fn))
+            self._in_flight[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda _: self._forget(key, task))
+            self.started += 1
+        else:
+            self.coalesced += 1
+        self._waiters[key] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.done() and self._waiters[key] == 1:
+                task.cancel()
+                self.abandoned += 1
+            raise
+        finally:
+            # The key may already belong to a newer computation
+            if self._in_flight.get(key) is task:
+                self._waiters[key] -= 1
+
+    async def _run(self, fn: Callable[[], Awaitable[R]]) -> R:
+        return await fn()
+
+    def _forget(self, key: Hashable, task: "asyncio.Task[R]") -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+            del self._waiters[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved when every caller went away
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._in_flight),
+            "started": self.started,
+            "coalesced": self.coalesced,
+            "abandoned": self.abandoned,
+        }
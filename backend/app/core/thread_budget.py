@@ -0,0 +1,164 @@
+"""
+Central thread budget for the CPU quota the service actually gets.
+
+The number of usable CPUs is detected from the cgroup CPU quota (v2
+``cpu.max`` or v1 ``cpu.cfs_quota_us``) and the process's CPU affinity, rather
+than the host core count that ``os.cpu_count()``, BLAS and OpenMP assume. From
+it the budget derives every thread pool in the process:
+
+- the interactive and batch execution lanes;
+- the application threadpool (Starlette/anyio ``run_in_threadpool``);
+- the native BLAS/OpenMP pools (via threadpoolctl);
+- the model's ``n_jobs`` and the onnxruntime intra-op threads.
+
+Parallelism comes from the lanes, which run requests side by side. Native
+pools and per-model parallelism are therefore kept at one thread per calling
+thread, so the lanes never multiply them into more runnable threads than CPUs.
+Any value can be overridden in the settings.
+"""
+
+import logging
+import math
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+
+# Environment variables read by native libraries loaded after startup
+_NATIVE_THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+)
+
+
+def _read(path: Path) -> Optional[str]:
+    try:
+        return path.read_text().strip()
+    except OSError:
+        return None
+
+
+def _cgroup_v2_quota(root: Path) -> Optional[float]:
+    content = _read(root / "cpu.max")
+    if not content:
+        return None
+    quota, _, period = content.partition(" ")
+    if quota == "max":
+        return None
+    try:
+        return int(quota) / int(period or 100000)
+    except ValueError:
+        return None
+
+
+def _cgroup_v1_quota(root: Path) -> Optional[float]:
+    for controller in ("cpu", "cpu,cpuacct"):
+        quota = _read(root / controller / "cpu.cfs_quota_us")
+        period = _read(root / controller / "cpu.cfs_period_us")
+        if quota is None or period is None:
+            continue
+        try:
+            if int(quota) > 0 and int(period) > 0:
+                return int(quota) / int(period)
+        except ValueError:
+            continue
+    return None
+
+
+def detect_cpu_quota(root: Path = CGROUP_ROOT) -> Tuple[float, str]:
+    """
+    Return ``(cpus, source)``: the CPUs this process may use and where that
+    number comes from (``cgroup`` quota or CPU ``affinity``).
+    """
+    if hasattr(os, "sched_getaffinity"):
+        available = float(len(os.sched_getaffinity(0)))
+    else:
+        available = float(os.cpu_count() or 1)
+    quota = _cgroup_v2_quota(root) or _cgroup_v1_quota(root)
+    if quota is not None and quota < available:
+        return quota, "cgroup"
+    return available, "affinity"
+
+
+class ThreadBudget:
+    """Thread pool sizes derived from the CPU quota (settings override each)."""
+
+    def __init__(self, cpus: float, source: str) -> None:
+        self.cpus = cpus
+        self.source = source
+        # Whole CPUs; a fractional quota only adds throttling, not parallelism
+        cores = max(1, math.floor(cpus))
+        self.cores = cores
+        self.interactive_workers = settings.INTERACTIVE_LANE_WORKERS or max(2, cores)
+        self.batch_workers = settings.BATCH_LANE_WORKERS or max(1, cores // 2)
+        # Mostly I/O (uploads, storage) and occasional conversions
+        self.app_threads = settings.APP_THREADPOOL_SIZE or max(4, 4 * cores)
+        self.native_threads = settings.NATIVE_THREADS or 1
+        self.model_n_jobs = settings.MODEL_N_JOBS or 1
+        self.onnx_threads = settings.ONNX_INTRA_OP_THREADS or 1
+        # Native libraries and their thread counts once the limits are applied
+        self.native_pools: List[Dict[str, Any]] = []
+
+    @classmethod
+    def from_settings(cls) -> "ThreadBudget":
+        if settings.THREAD_BUDGET_CPUS:
+            return cls(settings.THREAD_BUDGET_CPUS, "settings")
+        return cls(*detect_cpu_quota())
+
+    def apply_native_limits(self) -> None:
+        """
+        Limit the BLAS/OpenMP pools of the loaded native libraries; libraries
+        loaded later read the environment variables.
+        """
+        for name in _NATIVE_THREAD_ENV_VARS:
+            os.environ.setdefault(name, str(self.native_threads))
+        try:
+            from threadpoolctl import threadpool_info, threadpool_limits
+        except ImportError as e:
+            logger.warning(
+                f"threadpoolctl not installed, native pools not limited: {e}"
+            )
+            return
+        threadpool_limits(limits=self.native_threads)
+        self.native_pools = [
+            {
+                "library": info.get("prefix"),
+                "internal_api": info.get("internal_api"),
+                "user_api": info.get("user_api"),
+                "num_threads": info.get("num_threads"),
+            }
+            for info in threadpool_info()
+        ]
+
+    def apply_app_threadpool(self) -> None:
+        """Size the threadpool behind ``run_in_threadpool`` (needs a running loop)."""
+        import anyio.to_thread
+
+        anyio.to_thread.current_default_thread_limiter().total_tokens = self.app_threads
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "cpus": round(self.cpus, 2),
+            "cpu_source": self.source,
+            "cores": self.cores,
+            "interactive_workers": self.interactive_workers,
+            "batch_workers": self.batch_workers,
+            "app_threads": self.app_threads,
+            "native_threads": self.native_threads,
+            "model_n_jobs": self.model_n_jobs,
+            "onnx_intra_op_threads": self.onnx_threads,
+            "native_pools": self.native_pools,
+        }
+
+
+@lru_cache(maxsize=1)
+def get_thread_budget() -> ThreadBudget:
+    """The process-wide thread budget, computed once."""
+    return ThreadBudget.from_settings()
@@ -0,0 +1,294 @@
+"""
+Write-behind persistence of records the response does not wait for.
+
+Requests hand their records to ``WriteBehindQueue.submit``, which only appends
+them to an in-memory queue. A background task writes them in bulk, one call
+per ``batch_size`` records, as soon as a batch is full or ``flush_interval_s``
+after the first record of a partial one. The blocking write runs in a worker
+thread, so the event loop never waits on the database.
+
+The queue holds at most ``max_size`` records; beyond that new records are
+dropped (and counted) rather than growing memory while the database is down.
+A failed write is retried with exponential backoff up to ``max_retries``
+times before its records are given up. A batch the database rejects for its
+data (``RecordRejected``) is not retried but written again one record at a
+time, so only the bad records are lost. ``close`` stops accepting records and
+drains the queue, within a timeout, on shutdown.
+
+``load_saved_prediction`` reads a saved /predict result back by its id, for
+the endpoints that reuse results after they left the in-memory store.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, cast
+
+from fastapi.concurrency import run_in_threadpool
+from postgrest.exceptions import APIError
+from starlette.requests import HTTPConnection
+
+from app.core.config import settings
+from app.core.database import get_db
+
+logger = logging.getLogger(__name__)
+
+Record = Dict[str, Any]
+
+# Columns a saved /predict row needs to stand in for the stored result
+_SAVED_PREDICTION_FIELDS = (
+    "smiles",
+    "bbb_probability",
+    "prediction_class",
+    "prediction_certainty",
+)
+
+# SQLSTATE classes of errors caused by the records themselves: data exceptions
+# (22) and integrity constraint violations (23)
+_REJECTED_SQLSTATE_CLASSES = ("22", "23")
+
+
+class RecordRejected(Exception):
+    """Raised by a writer when the database rejects the records, not the write."""
+
+
+class WriteBehindQueue:
+    """Bounded queue of records written in bulk by a background task."""
+
+    def __init__(
+        self,
+        write: Callable[[List[Record]], None],
+        name: str = "records",
+        max_size: int = 10000,
+        batch_size: int = 100,
+        flush_interval_s: float = 1.0,
+        max_retries: int = 5,
+        retry_base_s: float = 0.5,
+        retry_max_s: float = 30.0,
+    ) -> None:
+        self._write = write
+        self.name = name
+        self.max_size = max(1, max_size)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval_s = flush_interval_s
+        self.max_retries = max(0, max_retries)
+        self.retry_base_s = retry_base_s
+        self.retry_max_s = retry_max_s
+        self._pending: Deque[Record] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+        self._closing = False
+        self._in_flight = 0
+        self.submitted = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.retries = 0
+        self.flushes = 0
+        self.last_flush_ms: Optional[float] = None
+
+    def start(self) -> None:
+        """Start the background writer on the running event loop."""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    def submit(self, record: Record) -> bool:
+        """Queue ``record`` for writing; False if the queue is full or closed."""
+        if self._closing or len(self._pending) >= self.max_size:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                logger.warning(
+                    f"Write-behind queue for {self.name} full or closed, "
+                    f"{self.dropped} records dropped so far"
+                )
+            return False
+        self._pending.append(record)
+        self.submitted += 1
+        # Wake the writer for the first record (starts the interval) and a full batch
+        if self._wakeup is not None and (
+            len(self._pending) == 1 or len(self._pending) >= self.batch_size
+        ):
+            self._wakeup.set()
+        return True
+
+    async def _run(self) -> None:
+        assert self._wakeup is not None
+        while True:
+            if not self._pending:
+                self._wakeup.clear()
+                if self._closing:
+                    return
+                await self._wakeup.wait()
+            if len(self._pending) < self.batch_size and not self._closing:
+                # A partial batch waits for more records, up to the interval
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(
+                        self._wakeup.wait(), timeout=self.flush_interval_s
+                    )
+                except TimeoutError:
+                    pass
+            batch = [
+                self._pending.popleft()
+                for _ in range(min(self.batch_size, len(self._pending)))
+            ]
+            if batch:
+                self._in_flight = len(batch)
+                try:
+                    await self._write_with_retry(batch)
+                finally:
+                    self._in_flight = 0
+
+    async def _write_with_retry(self, batch: List[Record]) -> None:
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                await run_in_threadpool(self._write, batch)
+            except RecordRejected as e:
+                await self._write_one_by_one(batch, e)
+                return
+            except Exception as e:
+                if attempt == self.max_retries:
+                    self.failed += len(batch)
+                    logger.error(
+                        f"Giving up writing {len(batch)} {self.name} after "
+                        f"{attempt + 1} attempts: {e}"
+                    )
+                    return
+                delay = min(self.retry_max_s, self.retry_base_s * 2**attempt)
+                self.retries += 1
+                logger.warning(
+                    f"Writing {len(batch)} {self.name} failed, retrying in {delay:.1f}s: {e}"
+                )
+                await asyncio.sleep(delay)
+            else:
+                self.written += len(batch)
+                self.flushes += 1
+                self.last_flush_ms = (time.perf_counter() - start) * 1000
+                return
+
+    async def _write_one_by_one(
+        self, batch: List[Record], error: RecordRejected
+    ) -> None:
+        if len(batch) == 1:
+            self.failed += 1
+            logger.error(
+                f"Dropping a {self.name} record the database rejected: {error}"
+            )
+            return
+        logger.warning(
+            f"Writing {len(batch)} {self.name} rejected, writing them one by one: "
+            f"{error}"
+        )
+        for record in batch:
+            await self._write_with_retry([record])
+
+    def wake(self) -> None:
+        """Flush pending records now instead of waiting for the interval."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def close(self, timeout_s: float = 10.0) -> None:
+        """Stop accepting records and write the pending ones, for up to ``timeout_s``."""
+        self._closing = True
+        if self._task is None:
+            return
+        self.wake()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._task), timeout=timeout_s)
+        except TimeoutError:
+            self._task.cancel()
+            lost = len(self._pending) + self._in_flight
+            self.failed += lost
+            self._pending.clear()
+            logger.error(
+                f"Write-behind queue for {self.name} not drained within "
+                f"{timeout_s}s; {lost} queued records lost"
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": len(self._pending),
+            "max_size": self.max_size,
+            "submitted": self.submitted,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "retries": self.retries,
+            "flushes": self.flushes,
+            "last_flush_ms": self.last_flush_ms,
+        }
+
+
+def _insert_single_predictions(rows: List[Record]) -> None:
+    try:
+        response = get_db().table("single_prediction_item").insert(rows).execute()
+    except APIError as e:
+        if (e.code or "").startswith(_REJECTED_SQLSTATE_CLASSES):
+            raise RecordRejected(f"Supabase insert error: {e}") from e
+        raise
+    error = getattr(response, "error", None)
+    if error:
+        raise RuntimeError(f"Supabase insert error: {error}")
+
+
+def _select_saved_prediction(prediction_id: str) -> Optional[Record]:
+    response = (
+        get_db()
+        .table("single_prediction_item")
+        .select("*")
+        .eq("id", prediction_id)
+        .execute()
+    )
+    if not response.data:
+        return None
+    row = cast(Record, response.data[0])
+    missing = [field for field in _SAVED_PREDICTION_FIELDS if row.get(field) is None]
+    if missing:
+        logger.warning(f"Saved prediction {prediction_id} lacks {', '.join(missing)}")
+        return None
+    return {
+        "smiles": row["smiles"],
+        "molecule_name": row.get("molecule_name"),
+        "bbb_probability": row["bbb_probability"],
+        "prediction_class": row["prediction_class"],
+        "prediction_certainty": row["prediction_certainty"],
+        "processing_time_ms": 0.0,  # Historical data
+    }
+
+
+async def load_saved_prediction(prediction_id: str) -> Optional[Record]:
+    """
+    A /predict result saved to the database, as a predictor result record;
+    None when it was not saved (or its row is incomplete).
+    """
+    try:
+        uuid.UUID(prediction_id)
+    except ValueError:
+        # Not a key of the table's UUID id column, so it cannot be saved there
+        return None
+    return await run_in_threadpool(_select_saved_prediction, prediction_id)
+
+
+def single_prediction_writer() -> WriteBehindQueue:
+    """The write-behind queue of /predict results, configured from settings."""
+    return WriteBehindQueue(
+        _insert_single_predictions,
+        name="single predictions",
+        max_size=settings.WRITE_BEHIND_MAX_QUEUE,
+        batch_size=settings.WRITE_BEHIND_BATCH_SIZE,
+        flush_interval_s=settings.WRITE_BEHIND_FLUSH_INTERVAL_S,
+        max_retries=settings.WRITE_BEHIND_MAX_RETRIES,
+        retry_base_s=settings.WRITE_BEHIND_RETRY_BASE_S,
+        retry_max_s=settings.WRITE_BEHIND_RETRY_MAX_S,
+    )
+
+
+def get_prediction_writer(connection: HTTPConnection) -> WriteBehindQueue:
+    """Dependency to get the write-behind queue of single predictions."""
+    writer = connection.app.state.prediction_writer
+    assert isinstance(writer, WriteBehindQueue)
+    return writer
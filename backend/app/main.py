@@ -3,6 +3,7 @@ VitronMax FastAPI application main module.
 Provides BBB permeability prediction API endpoints.
 """
 
+import asyncio
 import logging
 import time
 from contextlib import asynccontextmanager
@@ -10,13 +11,20 @@ from typing import Dict, Any, AsyncGenerator, Callable, Awaitable
 
 from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 import uvicorn
 
+from app.core.admission import AdmissionController
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
 from app.api.routes import prediction, batch, report, explain, utils, statistics
 from app.core.database import init_db
+from app.core.deadline import DeadlineExceeded, deadline_exceeded_handler
 from app.core.logging_config import setup_logging
+from app.core.metrics import render_metrics
+from app.core.rate_limit import RateLimiter, RateLimitMiddleware
+from app.core.thread_budget import get_thread_budget
+from app.core.write_behind import single_prediction_writer
 
 # Setup logging
 setup_logging()
@@ -28,6 +36,12 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     """Application lifespan management."""
     logger.info("Starting VitronMax API server...")
 
+    # Size every thread pool from the CPU quota before any work starts
+    budget = get_thread_budget()
+    budget.apply_native_limits()
+    budget.apply_app_threadpool()
+    logger.info(f"Thread budget: {budget.describe()}")
+
     # Initialize database
     await init_db()
 
@@ -35,6 +49,15 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     from app.ml.predictor import BBBPredictor
 
     app.state.predictor = BBBPredictor()
+    app.state.admission = AdmissionController.from_settings()
+    app.state.rate_limiter = RateLimiter.from_settings()
+    app.state.prediction_writer = single_prediction_writer()
+    app.state.prediction_writer.start()
+    # Build the drift reference in the background so startup is not delayed;
+    # on the batch lane, within the thread budget
+    app.state.drift_reference_task = asyncio.create_task(
+        app.state.predictor.lanes.run_batch(app.state.predictor.load_drift_reference)
+    )
     # await app.state.predictor.load_model() # Model is loaded in BBBPredictor.__init__
 
     logger.info("VitronMax API server started successfully.")
@@ -42,6 +65,13 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
         yield
     finally:
         logger.info("Shutting down VitronMax API server...")
+        # Save the queued predictions before the database client goes away
+        await app.state.prediction_writer.close(settings.WRITE_BEHIND_DRAIN_TIMEOUT_S)
+        # An unfinished drift reference is not needed any more
+        app.state.drift_reference_task.cancel()
+        await asyncio.gather(app.state.drift_reference_task, return_exceptions=True)
+        app.state.predictor.shutdown()
+        await app.state.rate_limiter.close()
 
 
 # Create FastAPI app
@@ -54,6 +84,9 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Per-client rate limiting (inside CORS so 429s carry the CORS headers)
+app.add_middleware(RateLimitMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -63,6 +96,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Response compression (outside CORS and rate limiting, so it covers their responses)
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+    )
+
 
 # Request timing middleware
 @app.middleware("http")
@@ -89,6 +131,12 @@ async def health_check() -> Dict[str, Any]:
     }
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> str:
+    """Prometheus metrics (scraped by Fly at :8080/metrics)."""
+    return render_metrics(app)
+
+
 # Include API routes
 app.include_router(prediction.router, prefix="/api/v1", tags=["prediction"])
 app.include_router(batch.router, prefix="/api/v1/batch_jobs", tags=["batch"])
@@ -98,6 +146,10 @@ app.include_router(utils.router, prefix="/api/v1/utils", tags=["utilities"])
 app.include_router(statistics.router, prefix="/api/v1", tags=["statistics"])
 
 
+# Requests past their deadline get 504
+app.add_exception_handler(DeadlineExceeded, deadline_exceeded_handler)
+
+
 # Global exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception) -> JSONResponse:
@@ -0,0 +1,97 @@
+"""
+Map fingerprint bit contributions back onto the atoms of a molecule.
+
+A Morgan bit is set by one or more atom environments (a center atom and the
+atoms within ``radius`` bonds of it); RDKit reports them through ``bitInfo``.
+A bit's contribution is split evenly across its environments and then across
+the atoms of each environment, so the per-atom weights add up to the mapped
+contributions.
+"""
+
+from typing import Any, Dict, List, Sequence, Set, Tuple
+
+from rdkit import Chem
+from rdkit.Chem.Draw import rdMolDraw2D
+
+# Highlight colours for atoms that raise / lower the permeable-class probability
+_POSITIVE_RGB = (0.18, 0.49, 0.20)
+_NEGATIVE_RGB = (0.78, 0.16, 0.16)
+
+
+def environment_atoms(mol: Chem.Mol, center: int, radius: int) -> List[int]:
+    """Atom indices of the Morgan environment of ``radius`` around ``center``."""
+    atoms: Set[int] = {center}
+    if radius > 0:
+        for bond_idx in Chem.FindAtomEnvironmentOfRadiusN(mol, radius, center):
+            bond = mol.GetBondWithIdx(bond_idx)
+            atoms.add(bond.GetBeginAtomIdx())
+            atoms.add(bond.GetEndAtomIdx())
+    return sorted(atoms)
+
+
+def atom_weights_from_bits(
+    mol: Chem.Mol,
+    bit_contributions: Sequence[Tuple[int, float]],
+    bit_info: Dict[int, Sequence[Tuple[int, int]]],
+) -> Tuple[List[float], List[Dict[str, Any]]]:
+    """
+    Per-atom weights for the given ``(bit, contribution)`` pairs.
+
+    Returns the weight of every atom in ``mol`` and, per bit, the environments
+    (center, radius) and atoms it was mapped to. Bits missing from ``bit_info``
+    (not set for this molecule) are reported with no atoms and add no weight.
+    """
+    weights = [0.0] * mol.GetNumAtoms()
+    bits: List[Dict[str, Any]] = []
+    for bit, contribution in bit_contributions:
+        environments = list(bit_info.get(bit, ()))
+        bit_atoms: Set[int] = set()
+        for center, radius in environments:
+            atoms = environment_atoms(mol, center, radius)
+            share = contribution / (len(environments) * len(atoms))
+            for atom in atoms:
+                weights[atom] += share
+            bit_atoms.update(atoms)
+        bits.append(
+            {
+                "bit": bit,
+                "contribution": contribution,
+                "environments": [
+                    {"center": center, "radius": radius}
+                    for center, radius in environments
+                ],
+                "atoms": sorted(bit_atoms),
+            }
+        )
+    return weights, bits
+
+
+def render_atom_weights_svg(
+    mol: Chem.Mol, weights: Sequence[float], width: int = 400, height: int = 300
+) -> str:
+    """Draw ``mol`` with atoms shaded by weight (green raises, red lowers BBB+)."""
+    scale = max((abs(w) for w in weights), default=0.0)
+    colors: Dict[int, Tuple[float, float, float]] = {}
+    if scale > 0:
+        for atom_idx, weight in enumerate(weights):
+            if weight == 0:
+                continue
+            red, green, blue = _POSITIVE_RGB if weight > 0 else _NEGATIVE_RGB
+            # Blend towards white for small weights
+            strength = abs(weight) / scale
+            colors[atom_idx] = (
+                1.0 - strength * (1.0 - red),
+                1.0 - strength * (1.0 - green),
+                1.0 - strength * (1.0 - blue),
+            )
+    drawer = rdMolDraw2D.MolDraw2DSVG(width, height)
+    rdMolDraw2D.PrepareAndDrawMolecule(
+        drawer,
+        mol,
+        highlightAtoms=list(colors),
+        highlightAtomColors=colors,
+        highlightBonds=[],
+    )
+    drawer.FinishDrawing()
+    svg: str = drawer.GetDrawingText()
+    return svg
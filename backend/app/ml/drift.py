@@ -0,0 +1,266 @@
+"""
+Streaming drift monitor for prediction outputs and key descriptors.
+
+Every successful prediction updates fixed-bin histograms (constant memory, one
+vectorized binning pass per batch). Counts are kept for
+the current window, the last completed window and since start. Each completed
+window is compared with a reference histogram built from the training set
+using the population stability index (PSI); features above the threshold are
+reported as drift alerts and logged.
+"""
+
+import logging
+import threading
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+logger = logging.getLogger(__name__)
+
+# Monitored result keys with the fixed histogram range and bin count.
+# Values outside the range land in the first/last bin.
+DRIFT_FEATURES: Dict[str, Tuple[float, float, int]] = {
+    "bbb_probability": (0.0, 1.0, 20),
+    "applicability_score": (0.0, 1.0, 20),
+    "mw": (0.0, 1000.0, 40),
+    "logp": (-5.0, 10.0, 30),
+    "tpsa": (0.0, 250.0, 25),
+    "h_donors": (0.0, 15.0, 15),
+    "h_acceptors": (0.0, 20.0, 20),
+    "rot_bonds": (0.0, 20.0, 20),
+}
+
+# Added to every bin before computing PSI so empty bins stay finite
+_PSI_EPSILON = 1e-4
+
+
+class StreamingHistogram:
+    """Fixed-range histogram that summarizes a stream in constant memory."""
+
+    def __init__(self, low: float, high: float, n_bins: int) -> None:
+        self.low = low
+        self.high = high
+        self.n_bins = n_bins
+        self._scale = n_bins / (high - low)
+        self.edges: NDArray[np.float64] = np.linspace(low, high, n_bins + 1)
+        self.counts: NDArray[np.int64] = np.zeros(n_bins, dtype=np.int64)
+        self.total = 0.0  # Sum of the clipped values, for the mean
+
+    @property
+    def n(self) -> int:
+        return int(self.counts.sum())
+
+    def update(self, values: NDArray[np.float64]) -> None:
+        values = np.clip(values[~np.isnan(values)], self.low, self.high)
+        if values.size == 0:
+            return
+        # Equal-width bins: the bin index is arithmetic, no search needed
+        bins = np.minimum(
+            ((values - self.low) * self._scale).astype(np.intp), self.n_bins - 1
+        )
+        self.counts += np.bincount(bins, minlength=self.n_bins)
+        self.total += float(values.sum())
+
+    def mean(self) -> Optional[float]:
+        n = self.n
+        return self.total / n if n else None
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Approximate quantile, interpolated linearly inside the bin."""
+        n = self.n
+        if not n:
+            return None
+        cumulative = np.cumsum(self.counts)
+        target = q * n
+        idx = int(np.searchsorted(cumulative, target, side="left"))
+        idx = min(idx, len(self.counts) - 1)
+        before = cumulative[idx - 1] if idx > 0 else 0
+        fraction = (target - before) / self.counts[idx] if self.counts[idx] else 0.0
+        width = self.edges[idx + 1] - self.edges[idx]
+        return float(self.edges[idx] + fraction * width)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "n": self.n,
+            "mean": self.mean(),
+            "p10": self.quantile(0.1),
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+        }
+
+
+def population_stability_index(
+    expected: NDArray[np.int64], actual: NDArray[np.int64]
+) -> Optional[float]:
+    """PSI between two histograms over the same bins (None if either is empty)."""
+    if expected.sum() == 0 or actual.sum() == 0:
+        return None
+    p = expected / expected.sum() + _PSI_EPSILON
+    q = actual / actual.sum() + _PSI_EPSILON
+    p, q = p / p.sum(), q / q.sum()
+    return float(np.sum((q - p) * np.log(q / p)))
+
+
+class DriftMonitor:
+    """
+    Windowed drift detection over ``DRIFT_FEATURES``.
+
+    ``observe`` is called with the successful result records of a pipeline
+    run; every ``window_size`` observations the current window is closed,
+    compared with the reference and a new one is started. The counts of all
+    features live in one flat array so an observation is binned with a single
+    vectorized pass, whatever the number of features.
+    """
+
+    def __init__(
+        self,
+        window_size: int = 500,
+        psi_threshold: float = 0.2,
+        features: Mapping[str, Tuple[float, float, int]] = DRIFT_FEATURES,
+    ) -> None:
+        self.window_size = max(1, window_size)
+        self.psi_threshold = psi_threshold
+        self.features = dict(features)
+        specs = list(self.features.values())
+        self._lows = np.array([[low] for low, _, _ in specs], dtype=np.float64)
+        self._highs = np.array([[high] for _, high, _ in specs], dtype=np.float64)
+        self._scales = np.array(
+            [[n_bins / (high - low)] for low, high, n_bins in specs], dtype=np.float64
+        )
+        self._max_bins = np.array([[n_bins - 1] for _, _, n_bins in specs])
+        bin_counts = [n_bins for _, _, n_bins in specs]
+        self._offsets = np.concatenate([[0], np.cumsum(bin_counts)])
+        self._lock = threading.Lock()
+        self._window = self._empty_counts()
+        self._cumulative = self._empty_counts()
+        self._last_window: Optional[Dict[str, StreamingHistogram]] = None
+        self._window_observations = 0
+        self._windows_completed = 0
+        self.reference: Optional[Dict[str, StreamingHistogram]] = None
+
+    def _empty_counts(self) -> Tuple[NDArray[np.int64], NDArray[np.float64]]:
+        """Flat bin counts of every feature plus the per-feature value sums."""
+        return (
+            np.zeros(int(self._offsets[-1]), dtype=np.int64),
+            np.zeros(len(self.features), dtype=np.float64),
+        )
+
+    def _new_histograms(self) -> Dict[str, StreamingHistogram]:
+        return {
+            name: StreamingHistogram(low, high, n_bins)
+            for name, (low, high, n_bins) in self.features.items()
+        }
+
+    def _histograms(
+        self, counts: NDArray[np.int64], totals: NDArray[np.float64]
+    ) -> Dict[str, StreamingHistogram]:
+        """Per-feature histogram views of flat counts."""
+        histograms = self._new_histograms()
+        for i, histogram in enumerate(histograms.values()):
+            histogram.counts = counts[self._offsets[i] : self._offsets[i + 1]].copy()
+            histogram.total = float(totals[i])
+        return histograms
+
+    def set_reference(self, values: Mapping[str, Sequence[Optional[float]]]) -> None:
+        """Build the reference histograms from per-feature training values."""
+        reference = self._new_histograms()
+        for name, histogram in reference.items():
+            histogram.update(_as_array(values.get(name, [])))
+        with self._lock:
+            self.reference = reference
+
+    def observe(self, records: Sequence[Mapping[str, Any]]) -> None:
+        """Add the monitored values of ``records`` (missing values are skipped)."""
+        if not records:
+            return
+        # One row per feature; None becomes NaN and is skipped
+        matrix = np.array(
+            [[record.get(name) for record in records] for name in self.features],
+            dtype=np.float64,
+        )
+        present = ~np.isnan(matrix)
+        clipped = np.clip(
+            np.where(present, matrix, self._lows), self._lows, self._highs
+        )
+        bins = np.minimum(
+            ((clipped - self._lows) * self._scales).astype(np.intp), self._max_bins
+        )
+        counts = np.bincount(
+            (bins + self._offsets[:-1, None])[present], minlength=len(self._window[0])
+        )
+        totals = np.where(present, clipped, 0.0).sum(axis=1)
+        with self._lock:
+            self._window[0][:] += counts
+            self._window[1][:] += totals
+            self._window_observations += len(records)
+            if self._window_observations < self.window_size:
+                return
+            # Fold the closed window into the totals since start
+            self._cumulative[0][:] += self._window[0]
+            self._cumulative[1][:] += self._window[1]
+            self._last_window = self._histograms(*self._window)
+            self._window = self._empty_counts()
+            self._window_observations = 0
+            self._windows_completed += 1
+            alerts = self._alerts(self._last_window)
+        if alerts:
+            logger.warning(f"Drift alert against the training distribution: {alerts}")
+
+    def _alerts(self, window: Dict[str, StreamingHistogram]) -> Dict[str, float]:
+        if self.reference is None:
+            return {}
+        alerts: Dict[str, float] = {}
+        for name, histogram in window.items():
+            psi = population_stability_index(
+                self.reference[name].counts, histogram.counts
+            )
+            if psi is not None and psi > self.psi_threshold:
+                alerts[name] = round(psi, 4)
+        return alerts
+
+    def report(self) -> Dict[str, Any]:
+        """Per-feature summaries and PSI of the last completed window."""
+        with self._lock:
+            last_window = self._last_window
+            current = self._histograms(*self._window)
+            cumulative = self._histograms(
+                self._cumulative[0] + self._window[0],
+                self._cumulative[1] + self._window[1],
+            )
+            reference = self.reference
+            window_observations = self._window_observations
+            windows_completed = self._windows_completed
+
+        features: Dict[str, Any] = {}
+        alerts: List[str] = []
+        for name in self.features:
+            psi = None
+            if reference is not None and last_window is not None:
+                psi = population_stability_index(
+                    reference[name].counts, last_window[name].counts
+                )
+            drifted = psi is not None and psi > self.psi_threshold
+            if drifted:
+                alerts.append(name)
+            features[name] = {
+                "psi": round(psi, 4) if psi is not None else None,
+                "alert": drifted,
+                "reference": reference[name].summary() if reference else None,
+                "last_window": last_window[name].summary() if last_window else None,
+                "current_window": current[name].summary(),
+                "since_start": cumulative[name].summary(),
+            }
+        return {
+            "window_size": self.window_size,
+            "psi_threshold": self.psi_threshold,
+            "windows_completed": windows_completed,
+            "current_window_observations": window_observations,
+            "reference_loaded": reference is not None,
+            "alerts": alerts,
+            "features": features,
+        }
+
+
+def _as_array(values: Sequence[Optional[float]]) -> NDArray[np.float64]:
+    return np.array(values, dtype=np.float64)
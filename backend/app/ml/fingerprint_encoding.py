@@ -0,0 +1,84 @@
+"""
+Compact encodings of Morgan fingerprints for API responses and batch CSVs.
+
+Prediction records keep a fingerprint as the indices of its set bits (a few
+dozen of the FP_NBITS bits). Outputs leave it out unless an encoding is asked
+for:
+
+- ``base64``: the bits packed most significant first (``numpy.packbits``
+  order), base64 encoded; 344 characters for 2048 bits;
+- ``hex``: the same packed bytes as hexadecimal; 512 characters for 2048 bits;
+- ``indices``: the set bit indices, ascending (a JSON list, or ``;``-separated
+  in CSVs).
+
+FINGERPRINT_ENCODING sets the encoding of every output, ``none`` by default;
+requests and batch jobs can ask for another one.
+"""
+
+import base64
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
+
+from app.core.config import settings
+
+NONE = "none"
+BASE64 = "base64"
+HEX = "hex"
+INDICES = "indices"
+
+FINGERPRINT_ENCODINGS = (NONE, BASE64, HEX, INDICES)
+
+
+def validate_encoding(encoding: Optional[str]) -> str:
+    """Normalize an encoding name (None and "" mean none); raise ValueError if unknown."""
+    name = (encoding or NONE).strip().lower()
+    if name not in FINGERPRINT_ENCODINGS:
+        raise ValueError(
+            f"Unknown fingerprint encoding '{encoding}'; expected one of "
+            f"{', '.join(FINGERPRINT_ENCODINGS)}."
+        )
+    return name
+
+
+def resolve_encoding(requested: Optional[str] = None) -> str:
+    """The requested encoding, else FINGERPRINT_ENCODING; raise ValueError if unknown."""
+    return validate_encoding(requested or settings.FINGERPRINT_ENCODING)
+
+
+def _packed(on_bits: Sequence[int], n_bits: int) -> bytes:
+    bits = np.zeros(n_bits, dtype=np.uint8)
+    bits[np.asarray(on_bits, dtype=np.intp)] = 1
+    return np.packbits(bits).tobytes()
+
+
+def encode_fingerprint(
+    on_bits: Optional[Sequence[int]], encoding: str, n_bits: Optional[int] = None
+) -> Optional[Union[str, List[int]]]:
+    """
+    Encode the set bits of an ``n_bits`` (FP_NBITS) fingerprint; None without
+    a fingerprint or for ``none``.
+    """
+    if on_bits is None or encoding == NONE:
+        return None
+    if encoding == INDICES:
+        return [int(bit) for bit in on_bits]
+    packed = _packed(on_bits, n_bits or settings.FP_NBITS)
+    if encoding == HEX:
+        return packed.hex()
+    return base64.b64encode(packed).decode("ascii")
+
+
+def decode_fingerprint(
+    value: Union[str, Sequence[int]], encoding: str, n_bits: Optional[int] = None
+) -> List[int]:
+    """Set bit indices of an encoded fingerprint (the inverse of encode_fingerprint)."""
+    if encoding == INDICES:
+        if isinstance(value, str):
+            return [int(bit) for bit in value.split(";") if bit]
+        return [int(bit) for bit in value]
+    assert isinstance(value, str)
+    packed = bytes.fromhex(value) if encoding == HEX else base64.b64decode(value)
+    bits = np.unpackbits(np.frombuffer(packed, dtype=np.uint8))
+    bits = bits[: n_bits or settings.FP_NBITS]
+    return [int(bit) for bit in np.flatnonzero(bits)]
@@ -0,0 +1,249 @@
+"""
+Per-tree evaluation of a fitted Random Forest classifier.
+
+sklearn's ``predict_proba`` only exposes the averaged ensemble output. The
+``ForestEngine`` keeps per-tree leaf probabilities precomputed at model load so
+the vote of every tree can be read directly: one pass yields the ensemble
+probability together with the disagreement between trees, and the forest can be
+evaluated in blocks of trees that stop early once the predicted class is settled.
+
+It also precomputes, per leaf, the tree-path (Saabas) attribution: the change in
+permeable-class probability along every split on the way to the leaf is charged
+to the feature split on, so a molecule's prediction decomposes into a bias (the
+mean root value) plus one contribution per fingerprint bit.
+"""
+
+import math
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+from numpy.typing import NDArray
+
+# Two-sided 95% quantile of the standard normal distribution
+_Z_95 = 1.959964
+
+
+class ForestEngine:
+    """Evaluates the trees of a fitted ``RandomForestClassifier`` individually."""
+
+    def __init__(self, model: Any, positive_class: Any = 1) -> None:
+        classes = list(model.classes_)
+        positive_idx = (
+            classes.index(positive_class) if positive_class in classes else -1
+        )
+        self.trees: List[Any] = [estimator.tree_ for estimator in model.estimators_]
+        self.n_trees: int = len(self.trees)
+        # Permeable-class probability of every node, per tree (leaves are what apply() returns)
+        self.node_proba: List[NDArray[np.float64]] = []
+        for tree in self.trees:
+            counts = tree.value[:, 0, :]
+            totals = counts.sum(axis=1)
+            totals[totals == 0] = 1.0
+            self.node_proba.append(counts[:, positive_idx] / totals)
+        self.n_features: int = int(model.n_features_in_)
+        # Mean permeable-class probability at the roots: the prediction before any split
+        self.bias: float = (
+            float(np.mean([proba[0] for proba in self.node_proba]))
+            if self.n_trees
+            else 0.0
+        )
+        # Offset of every tree's nodes in the concatenated node index
+        self._node_offsets: NDArray[np.int_] = np.cumsum(
+            [0] + [tree.node_count for tree in self.trees]
+        )
+        self._leaf_contributions = self._build_leaf_contributions()
+
+    def _build_leaf_contributions(self) -> sp.csr_matrix:
+        """
+        Sparse (total nodes, n_features) matrix of path contributions per leaf.
+
+        Along a root-to-leaf path, each split moves the permeable-class probability
+        from ``value(parent)`` to ``value(child)``; that delta is charged to the
+        feature split on at the parent. Row ``offset(tree) + leaf`` holds the sum
+        of those deltas over the leaf's path, divided by the number of trees, so
+        summing the rows of the leaves a sample lands in gives its contributions
+        to the ensemble mean. Rows of internal nodes stay empty.
+        """
+        rows: List[NDArray[np.int_]] = []
+        cols: List[NDArray[np.int_]] = []
+        deltas: List[NDArray[np.float64]] = []
+        for offset, tree, proba in zip(self._node_offsets, self.trees, self.node_proba):
+            internal = np.flatnonzero(tree.children_left >= 0)
+            parent = np.full(tree.node_count, -1, dtype=np.int_)
+            parent[tree.children_left[internal]] = internal
+            parent[tree.children_right[internal]] = internal
+            # Walk every leaf up to the root one level at a time
+            leaves = np.flatnonzero(tree.children_left < 0)
+            node = leaves
+            while True:
+                has_parent = parent[node] >= 0
+                leaves, node = leaves[has_parent], node[has_parent]
+                if node.size == 0:
+                    break
+                split = parent[node]
+                rows.append(leaves + offset)
+                cols.append(tree.feature[split])
+                deltas.append(proba[node] - proba[split])
+                node = split
+        shape = (int(self._node_offsets[-1]), self.n_features)
+        if not rows:
+            return sp.csr_matrix(shape, dtype=np.float64)
+        # Duplicate (leaf, feature) pairs, from a feature split on twice, are summed
+        return sp.csr_matrix(
+            (
+                np.concatenate(deltas) / self.n_trees,
+                (np.concatenate(rows), np.concatenate(cols)),
+            ),
+            shape=shape,
+        )
+
+    @staticmethod
+    def _as_input(X: NDArray[Any]) -> NDArray[np.float32]:
+        # sklearn trees split on float32 features
+        return np.ascontiguousarray(X, dtype=np.float32)
+
+    def _votes(
+        self, X: NDArray[np.float32], start: int, stop: int
+    ) -> NDArray[np.float64]:
+        votes = np.empty((X.shape[0], stop - start), dtype=np.float64)
+        for column, tree_idx in enumerate(range(start, stop)):
+            leaves = self.trees[tree_idx].apply(X)
+            votes[:, column] = self.node_proba[tree_idx][leaves]
+        return votes
+
+    def tree_votes(self, X: NDArray[Any]) -> NDArray[np.float64]:
+        """Permeable-class probability from every tree, shape (n_samples, n_trees)."""
+        return self._votes(self._as_input(X), 0, self.n_trees)
+
+    def predict(
+        self,
+        X: NDArray[Any],
+        early_exit: bool = False,
+        block_size: int = 10,
+        tolerance: float = 0.0,
+        threshold: float = 0.5,
+    ) -> Dict[str, NDArray[Any]]:
+        """
+        Ensemble probability and tree disagreement for each row, in a single pass.
+
+        Returns arrays keyed by ``probability`` (mean tree vote), ``std`` (standard
+        deviation of the tree votes), ``ci_low``/``ci_high`` (95% normal interval of
+        the mean vote) and ``trees_evaluated``. With ``early_exit`` the statistics
+        cover only the trees evaluated before the row's class was settled (see
+        ``_accumulate_early_exit``).
+        """
+        X = self._as_input(X)
+        if early_exit:
+            sums, sq_sums, counts = self._accumulate_early_exit(
+                X, block_size, tolerance, threshold
+            )
+        else:
+            votes = self._votes(X, 0, self.n_trees)
+            sums = votes.sum(axis=1)
+            sq_sums = np.square(votes).sum(axis=1)
+            counts = np.full(X.shape[0], self.n_trees, dtype=np.int_)
+
+        n = np.maximum(counts, 1)
+        mean = sums / n
+        std = np.sqrt(np.maximum(sq_sums / n - np.square(mean), 0.0))
+        half_width = _Z_95 * std / np.sqrt(n)
+        return {
+            "probability": mean,
+            "std": std,
+            "ci_low": np.clip(mean - half_width, 0.0, 1.0),
+            "ci_high": np.clip(mean + half_width, 0.0, 1.0),
+            "trees_evaluated": counts,
+        }
+
+    def _accumulate_early_exit(
+        self,
+        X: NDArray[np.float32],
+        block_size: int,
+        tolerance: float,
+        threshold: float,
+    ) -> Tuple[NDArray[np.float64], NDArray[np.float64], NDArray[np.int_]]:
+        """
+        Evaluate trees in blocks, stopping per sample once the class is settled.
+
+        After ``k`` of ``n`` trees with running mean ``m``, the remaining trees are
+        assumed to have a mean within ``m ± eps`` where ``eps`` is the Hoeffding
+        radius for ``tolerance`` (``sqrt(ln(2 / tolerance) / 2k)``). A sample stops
+        when even the least favourable remaining vote inside that band cannot move
+        the final mean across ``threshold``. With ``tolerance == 0`` the band is
+        the full [0, 1] range, so the class is exactly the one of the full forest.
+
+        Returns per-sample sums and squared sums of the evaluated votes, and the
+        number of trees evaluated.
+        """
+        n_samples = X.shape[0]
+        vote_sums = np.zeros(n_samples, dtype=np.float64)
+        vote_sq_sums = np.zeros(n_samples, dtype=np.float64)
+        trees_evaluated = np.zeros(n_samples, dtype=np.int_)
+        active = np.arange(n_samples)
+        block_size = max(1, block_size)
+        log_term = math.log(2.0 / tolerance) if tolerance > 0 else math.inf
+
+        for start in range(0, self.n_trees, block_size):
+            if active.size == 0:
+                break
+            stop = min(start + block_size, self.n_trees)
+            votes = self._votes(X[active], start, stop)
+            vote_sums[active] += votes.sum(axis=1)
+            vote_sq_sums[active] += np.square(votes).sum(axis=1)
+            trees_evaluated[active] = stop
+
+            remaining = self.n_trees - stop
+            if remaining == 0:
+                break
+            sums = vote_sums[active]
+            running_mean = sums / stop
+            eps = math.sqrt(log_term / (2.0 * stop))
+            remaining_low = np.clip(running_mean - eps, 0.0, 1.0)
+            remaining_high = np.clip(running_mean + eps, 0.0, 1.0)
+            final_low = (sums + remaining * remaining_low) / self.n_trees
+            final_high = (sums + remaining * remaining_high) / self.n_trees
+            settled = (final_low >= threshold) | (final_high < threshold)
+            active = active[~settled]
+
+        return vote_sums, vote_sq_sums, trees_evaluated
+
+    def contributions(self, X: NDArray[Any]) -> sp.csr_matrix:
+        """
+        Per-feature tree-path contributions, sparse shape (n_samples, n_features).
+
+        For every row, ``bias + contributions.sum()`` equals the ensemble
+        probability. Only features split on along the row's paths are non-zero.
+        """
+        X = self._as_input(X)
+        n_samples = X.shape[0]
+        if self.n_trees == 0 or n_samples == 0:
+            return sp.csr_matrix((n_samples, self.n_features), dtype=np.float64)
+        leaves = np.empty((n_samples, self.n_trees), dtype=np.int_)
+        for tree_idx, tree in enumerate(self.trees):
+            leaves[:, tree_idx] = tree.apply(X) + self._node_offsets[tree_idx]
+        # One row per sample selecting the leaf it reached in every tree
+        leaf_indicator = sp.csr_matrix(
+            (
+                np.ones(leaves.size, dtype=np.float64),
+                leaves.ravel(),
+                np.arange(0, leaves.size + 1, self.n_trees),
+            ),
+            shape=(n_samples, self._leaf_contributions.shape[0]),
+        )
+        result: sp.csr_matrix = sp.csr_matrix(leaf_indicator @ self._leaf_contributions)
+        return result
+
+    def top_contributions(
+        self, X: NDArray[Any], top_n: int = 10
+    ) -> List[List[Tuple[int, float]]]:
+        """The ``top_n`` features with the largest absolute contribution per row."""
+        matrix = self.contributions(X)
+        top: List[List[Tuple[int, float]]] = []
+        for row in range(matrix.shape[0]):
+            start, stop = matrix.indptr[row], matrix.indptr[row + 1]
+            features = matrix.indices[start:stop]
+            values = matrix.data[start:stop]
+            order = np.argsort(-np.abs(values), kind="stable")[:top_n]
+            top.append([(int(features[i]), float(values[i])) for i in order])
+        return top
@@ -0,0 +1,148 @@
+"""
+Named models served side by side on one featurization pass.
+
+The predictor always serves its primary model as ``PRIMARY_MODEL_NAME``. Extra
+models (candidate forests, or the primary forest with another decision
+threshold) are configured with ``EXTRA_MODELS_STR`` as comma-separated
+``name=path[@threshold]`` entries; an empty path reuses the primary forest,
+e.g. ``strict=@0.6``. All models consume the same fingerprint matrix, so each
+extra model only costs its own inference.
+"""
+
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import joblib
+import numpy as np
+from numpy.typing import NDArray
+
+from app.core.config import settings
+from app.ml.forest import ForestEngine
+from app.ml.onnx_backend import OnnxForestBackend
+
+logger = logging.getLogger(__name__)
+
+PRIMARY_MODEL_NAME = "default"
+
+
+class ServedModel:
+    """A fitted classifier served under a name, with its decision threshold."""
+
+    def __init__(
+        self,
+        name: str,
+        model: Any,
+        threshold: float = 0.5,
+        version: Optional[str] = None,
+        onnx_backend: Optional[OnnxForestBackend] = None,
+        forest: Optional[ForestEngine] = None,
+    ) -> None:
+        self.name = name
+        self.model = model
+        self.threshold = threshold
+        self.version = version or settings.MODEL_VERSION
+        self.onnx_backend = onnx_backend
+        # Per-tree view of the forest, used for uncertainty and early-exit voting
+        self.forest: Optional[ForestEngine] = forest
+        if forest is None and hasattr(model, "estimators_"):
+            self.forest = ForestEngine(model)
+
+    @property
+    def inference_backend(self) -> str:
+        return "onnx" if self.onnx_backend is not None else "sklearn"
+
+    def predict_proba(self, X: NDArray[Any]) -> NDArray[np.float64]:
+        """Permeable-class probability for each row of a fingerprint matrix."""
+        if self.onnx_backend is not None:
+            return self.onnx_backend.predict_proba(X)[:, 1].astype(np.float64)
+        probabilities: NDArray[np.float64] = self.model.predict_proba(X)[:, 1]
+        return probabilities
+
+    def infer(self, X: NDArray[Any], early_exit: bool) -> Dict[str, NDArray[Any]]:
+        """
+        Run the model on a fingerprint matrix.
+
+        Returns arrays keyed by ``probability`` and ``trees_evaluated``, plus the
+        per-tree spread (``std``, ``ci_low``, ``ci_high``) whenever the trees are
+        evaluated individually: always with the sklearn backend, since the votes
+        come from the same pass that produces the probability. In early-exit mode
+        the forest is evaluated in blocks of ``settings.EARLY_EXIT_BLOCK_SIZE``
+        trees and each row stops once its class can no longer change (within
+        ``settings.EARLY_EXIT_TOLERANCE``). The ONNX backend only exposes the
+        aggregated probability, so it reports no spread.
+        """
+        if self.forest is not None and (early_exit or self.onnx_backend is None):
+            return self.forest.predict(
+                X,
+                early_exit=early_exit,
+                block_size=settings.EARLY_EXIT_BLOCK_SIZE,
+                tolerance=settings.EARLY_EXIT_TOLERANCE,
+                threshold=self.threshold,
+            )
+        probabilities = self.predict_proba(X)
+        n_trees = len(getattr(self.model, "estimators_", []))
+        return {
+            "probability": probabilities,
+            "trees_evaluated": np.full(len(probabilities), n_trees, dtype=np.int_),
+        }
+
+    def describe(self) -> Dict[str, Any]:
+        """Summary for the model info endpoint."""
+        return {
+            "name": self.name,
+            "model_version": self.version,
+            "threshold": self.threshold,
+            "inference_backend": self.inference_backend,
+            "n_estimators": len(getattr(self.model, "estimators_", [])),
+        }
+
+
+def parse_model_spec(entry: str) -> Tuple[str, Optional[str], float]:
+    """Split one ``name=path[@threshold]`` entry; raises ValueError if malformed."""
+    name, separator, target = entry.partition("=")
+    name = name.strip()
+    if not separator or not name:
+        raise ValueError(f"Expected 'name=path[@threshold]', got '{entry}'")
+    path, at, raw_threshold = target.strip().rpartition("@")
+    if not at:
+        path, raw_threshold = target.strip(), ""
+    threshold = float(raw_threshold) if raw_threshold.strip() else 0.5
+    if not 0.0 < threshold < 1.0:
+        raise ValueError(f"Threshold for model '{name}' must be in (0, 1)")
+    return name, path.strip() or None, threshold
+
+
+def load_extra_models(
+    entries: List[str], primary: ServedModel
+) -> Dict[str, ServedModel]:
+    """
+    Load the extra models described by ``entries``.
+
+    Entries that cannot be parsed or loaded are logged and skipped, so a broken
+    candidate never takes the primary model down with it.
+    """
+    models: Dict[str, ServedModel] = {}
+    for entry in entries:
+        try:
+            name, path, threshold = parse_model_spec(entry)
+            if name == PRIMARY_MODEL_NAME or name in models:
+                raise ValueError(f"Duplicate model name '{name}'")
+            forest = None
+            if path is None:
+                # Same forest, different decision threshold
+                model, forest = primary.model, primary.forest
+                version = f"{primary.version}@{threshold}"
+            else:
+                model_path = Path(path)
+                if not model_path.exists():
+                    raise FileNotFoundError(f"Model file not found: {model_path}")
+                model = joblib.load(model_path)
+                version = model_path.stem
+            models[name] = ServedModel(name, model, threshold, version, forest=forest)
+            logger.info(
+                f"Loaded extra model '{name}' (version {version}, threshold {threshold})"
+            )
+        except Exception as e:
+            logger.error(f"Skipping extra model entry '{entry}': {e}")
+    return models
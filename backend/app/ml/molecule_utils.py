@@ -1,20 +1,36 @@
 # backend/app/ml/molecule_utils.py
 from rdkit import Chem
 from rdkit.Chem import AllChem
-from typing import cast
+from typing import Optional, cast
 
+from app.core.deadline import Deadline, DeadlineExceeded
 
-def smiles_to_pdb_string(smiles: str) -> str | None:
+
+def canonical_smiles(smiles: str) -> Optional[str]:
+    """Canonical SMILES of ``smiles``, or None if it cannot be parsed."""
+    mol = Chem.MolFromSmiles(smiles) if smiles else None
+    return Chem.MolToSmiles(mol, canonical=True) if mol is not None else None
+
+
+def smiles_to_pdb_string(
+    smiles: str, deadline: Optional[Deadline] = None
+) -> str | None:
     """
     Converts a SMILES string to a PDB block string.
 
     Args:
         smiles: The SMILES string of the molecule.
+        deadline: Optional deadline checked between the conversion stages.
 
     Returns:
         A string containing the molecule in PDB format, or None if conversion fails.
+
+    Raises:
+        DeadlineExceeded: If ``deadline`` expired before a stage.
     """
     try:
+        if deadline is not None:
+            deadline.check("parse")
         mol = Chem.MolFromSmiles(smiles)
         if mol is None:
             # RDKit couldn't parse the SMILES string
@@ -23,6 +39,8 @@ def smiles_to_pdb_string(smiles: str) -> str | None:
         # Add hydrogens (important for 3D structure)
         mol_with_hs = Chem.AddHs(mol)
 
+        if deadline is not None:
+            deadline.check("embed")
         # Generate 3D coordinates
         # ETKDG is a good default method for conformer generation
         embed_result = AllChem.EmbedMolecule(mol_with_hs, AllChem.ETKDG())
@@ -33,15 +51,21 @@ def smiles_to_pdb_string(smiles: str) -> str | None:
             embed_result_uff = AllChem.EmbedMolecule(mol_with_hs, useRandomCoords=True)
             if embed_result_uff == -1:
                 return None  # Still failed
+            if deadline is not None:
+                deadline.check("optimize")
             AllChem.UFFOptimizeMolecule(mol_with_hs)
 
         elif embed_result == 0:
             # Optimization might be beneficial after embedding
+            if deadline is not None:
+                deadline.check("optimize")
             AllChem.UFFOptimizeMolecule(mol_with_hs)
 
         # Generate PDB block
         pdb_block = Chem.MolToPDBBlock(mol_with_hs)
         return cast(str, pdb_block)
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         print(f"Error converting SMILES to PDB: {smiles}, Error: {str(e)}")
         return None
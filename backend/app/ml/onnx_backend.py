@@ -0,0 +1,139 @@
+"""
+ONNX Runtime inference backend for the Random Forest model.
+
+The sklearn forest is exported to an ONNX ``TreeEnsembleClassifier`` graph and
+evaluated with onnxruntime's CPU execution provider, which walks the compiled
+tree ensemble in native code with its own intra-op thread pool (no GIL, no
+joblib dispatch per call).
+
+Export an existing model ahead of deployment with:
+    python -m app.ml.onnx_backend --output models/default_model.onnx
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+from typing import Any, Optional, Sequence
+
+import numpy as np
+from numpy.typing import NDArray
+
+from app.core.config import settings
+from app.core.thread_budget import get_thread_budget
+
+logger = logging.getLogger(__name__)
+
+
+def export_forest_to_onnx(model: Any, n_features: int) -> bytes:
+    """Convert a fitted sklearn forest classifier to a serialized ONNX model."""
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import FloatTensorType
+
+    onnx_model = convert_sklearn(
+        model,
+        initial_types=[("input", FloatTensorType([None, n_features]))],
+        # Plain probability tensor instead of a list of {class: prob} maps
+        options={id(model): {"zipmap": False}},
+        target_opset={"": 15, "ai.onnx.ml": 3},
+    )
+    return bytes(onnx_model.SerializeToString())
+
+
+class OnnxForestBackend:
+    """Runs ``predict_proba`` for an ONNX-exported forest with onnxruntime."""
+
+    def __init__(self, model_bytes: bytes, intra_op_threads: int = 0) -> None:
+        import onnxruntime as ort
+
+        session_options = ort.SessionOptions()
+        # 0 lets onnxruntime pick the number of physical cores
+        session_options.intra_op_num_threads = intra_op_threads
+        session_options.inter_op_num_threads = 1
+        session_options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        self.session = ort.InferenceSession(
+            model_bytes,
+            sess_options=session_options,
+            providers=["CPUExecutionProvider"],
+        )
+        self.input_name: str = self.session.get_inputs()[0].name
+        # Outputs are [label, probabilities]
+        self.probability_output: str = self.session.get_outputs()[1].name
+
+    @classmethod
+    def from_sklearn(
+        cls, model: Any, n_features: int, intra_op_threads: int = 0
+    ) -> "OnnxForestBackend":
+        return cls(export_forest_to_onnx(model, n_features), intra_op_threads)
+
+    @classmethod
+    def from_path(cls, path: Path, intra_op_threads: int = 0) -> "OnnxForestBackend":
+        return cls(path.read_bytes(), intra_op_threads)
+
+    def predict_proba(self, X: NDArray[Any]) -> NDArray[np.float32]:
+        """Class probabilities with the same layout as sklearn's ``predict_proba``."""
+        inputs = np.ascontiguousarray(X, dtype=np.float32)
+        probabilities: NDArray[np.float32] = self.session.run(
+            [self.probability_output], {self.input_name: inputs}
+        )[0]
+        return probabilities
+
+
+def load_onnx_backend(model: Any) -> Optional[OnnxForestBackend]:
+    """
+    Build the ONNX backend for ``model`` according to the settings.
+
+    Uses ``settings.ONNX_MODEL_PATH`` when it points to an existing export, and
+    otherwise converts the loaded sklearn model in memory. Returns None (so the
+    caller keeps using sklearn) if onnxruntime is unavailable or loading fails.
+    """
+    threads = get_thread_budget().onnx_threads
+    try:
+        onnx_path = Path(settings.ONNX_MODEL_PATH) if settings.ONNX_MODEL_PATH else None
+        if onnx_path is not None and onnx_path.exists():
+            backend = OnnxForestBackend.from_path(onnx_path, threads)
+            logger.info(f"Loaded ONNX model from {onnx_path}")
+        else:
+            if onnx_path is not None:
+                logger.warning(
+                    f"ONNX model not found at {onnx_path}, exporting the loaded model in memory."
+                )
+            backend = OnnxForestBackend.from_sklearn(model, settings.FP_NBITS, threads)
+            logger.info("Exported the loaded model to ONNX in memory.")
+        return backend
+    except ImportError as e:
+        logger.error(
+            f"ONNX backend requested but onnxruntime/skl2onnx is not installed: {e}"
+        )
+    except Exception as e:
+        logger.error(f"Failed to initialize ONNX backend: {e}", exc_info=True)
+    return None
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Export the model at ``settings.MODEL_PATH`` to an ONNX file."""
+    import joblib
+
+    parser = argparse.ArgumentParser(description="Export the BBB model to ONNX")
+    parser.add_argument(
+        "--model", type=Path, default=Path(settings.MODEL_PATH), help="joblib model"
+    )
+    parser.add_argument("--output", type=Path, required=True, help="ONNX file to write")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    if not args.model.exists():
+        logger.error(f"Model file not found: {args.model}")
+        return 1
+    model = joblib.load(args.model)
+    n_features = int(getattr(model, "n_features_in_", settings.FP_NBITS))
+    args.output.write_bytes(export_forest_to_onnx(model, n_features))
+    logger.info(f"Wrote ONNX model to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,13 +2,18 @@
 BBB permeability prediction using Random Forest and Morgan fingerprints.
 """
 
+import copy
 import hashlib
 import logging
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
 import joblib
 import numpy as np
 import pandas as pd  # Added pandas
 from numpy.typing import NDArray
-from typing import List, Tuple, Optional, Dict, Any
+from typing import Callable, Iterator, List, Tuple, Optional, Dict, Any, Sequence
 from fastapi.concurrency import run_in_threadpool
 
 from pathlib import Path
@@ -18,7 +23,26 @@ from rdkit.Chem import AllChem, rdMolDescriptors  # Added AllChem
 from rdkit.Chem import Descriptors, Crippen, FilterCatalog, Lipinski
 from sklearn.ensemble import RandomForestClassifier
 
+from app.core.cache import LRUCache
 from app.core.config import settings
+from app.core.admission import BATCH
+from app.core.deadline import (
+    Deadline,
+    DeadlineExceeded,
+    cancellation_token,
+    record_abandoned,
+)
+from app.core.lanes import ExecutionLanes
+from app.core.micro_batcher import MicroBatcher
+from app.core.thread_budget import get_thread_budget
+from app.core.single_flight import SingleFlight
+from app.ml.atom_attribution import atom_weights_from_bits, render_atom_weights_svg
+from app.ml.drift import DriftMonitor
+from app.ml.forest import ForestEngine
+from app.ml.model_registry import PRIMARY_MODEL_NAME, ServedModel, load_extra_models
+from app.ml.molecule_utils import canonical_smiles
+from app.ml.onnx_backend import OnnxForestBackend, load_onnx_backend
+from app.ml.shadow import ShadowEvaluator
 
 # Ensure RDKit logging is handled appropriately if verbose output is not desired
 rdBase.DisableLog("rdApp.error")
@@ -26,15 +50,86 @@ rdBase.DisableLog("rdApp.error")
 logger = logging.getLogger(__name__)
 
 
+@contextmanager
+def _stage(timings: Optional[Dict[str, float]], name: str) -> Iterator[None]:
+    """Accumulate the wall time of a pipeline stage into ``timings``, if given."""
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+
+
+def _abandon(deadline: Optional[Deadline], result: Dict[str, Any], stage: str) -> bool:
+    """Mark ``result`` abandoned before ``stage`` if its deadline has expired."""
+    if deadline is None or not deadline.expired:
+        return False
+    result["status"] = "error_deadline_exceeded"
+    result["error"] = f"Request deadline exceeded before {stage}."
+    record_abandoned(stage)
+    return True
+
+
 class BBBPredictor:
     """Blood-Brain Barrier Permeability Predictor."""
 
     def __init__(self) -> None:
         self.model: Optional[RandomForestClassifier] = None
         self.is_loaded: bool = False
+        self.inference_backend: str = "sklearn"
+        self.onnx_backend: Optional[OnnxForestBackend] = None
+        self.forest: Optional[ForestEngine] = None
+        # Primary model under PRIMARY_MODEL_NAME plus settings.EXTRA_MODELS
+        self.served_models: Dict[str, ServedModel] = {}
+        # When the served models were built (Last-Modified of /model/info)
+        self.loaded_at: Optional[datetime] = None
+        self.shadow: Optional[ShadowEvaluator] = None
+        self.drift_monitor: Optional[DriftMonitor] = (
+            DriftMonitor(settings.DRIFT_WINDOW_SIZE, settings.DRIFT_PSI_THRESHOLD)
+            if settings.DRIFT_MONITOR_ENABLED
+            else None
+        )
+        self._drift_reference_lock = threading.Lock()
+        self._drift_reference_attempted = False
+        # Successful predict_smiles_data results per canonical SMILES and models
+        self.prediction_cache: LRUCache[Dict[str, Any]] = LRUCache(
+            settings.PREDICTION_CACHE_SIZE
+        )
+        # /predict results by prediction_id, reused by /report and /explain
+        self.prediction_store: LRUCache[Dict[str, Any]] = LRUCache(
+            settings.PREDICTION_STORE_SIZE,
+            ttl_seconds=settings.PREDICTION_STORE_TTL_S,
+        )
+        # Concurrent predict_smiles_data calls for one molecule share one run
+        self.prediction_flight: SingleFlight[Dict[str, Any]] = SingleFlight()
+        # Interactive and batch work run on separate, separately sized pools
+        self.lanes = ExecutionLanes.from_settings()
+        # Concurrent predict_smiles_data calls share one pipeline run
+        self.micro_batcher: Optional[
+            MicroBatcher[
+                Tuple[str, Tuple[str, ...], Optional[Deadline]], Dict[str, Any]
+            ]
+        ] = (
+            MicroBatcher(
+                self._run_micro_batch_sync,
+                max_batch_size=settings.MICRO_BATCH_MAX_SIZE,
+                max_wait_ms=settings.MICRO_BATCH_MAX_WAIT_MS,
+                max_concurrency=settings.MICRO_BATCH_MAX_CONCURRENCY,
+                run=self.lanes.run_interactive,
+            )
+            if settings.MICRO_BATCH_ENABLED
+            else None
+        )
         self.pains_catalog: Optional[FilterCatalog.FilterCatalog] = None
         self.brenk_catalog: Optional[FilterCatalog.FilterCatalog] = None
         self._training_fps: List[Any] = []  # For Tanimoto applicability score
+        # Atom highlight maps keyed by canonical SMILES, model version and options
+        self.atom_highlight_cache: LRUCache[Dict[str, Any]] = LRUCache(
+            settings.ATOM_HIGHLIGHT_CACHE_SIZE
+        )
 
         try:
             # Initialize PAINS alerts catalog (RDKit built-in A, B, C)
@@ -113,6 +208,171 @@ class BBBPredictor:
                 logger.warning("Creating dummy model as fallback due to loading error.")
                 self._create_dummy_model()  # Fallback to dummy if loading fails
         logger.info(f"Model loading process finished. Model loaded: {self.is_loaded}")
+        self._init_inference_backend()
+
+    def _init_inference_backend(self) -> None:
+        """
+        Build the served models: the primary one, with the predict_proba backend
+        configured by ``settings.INFERENCE_BACKEND``, and any ``EXTRA_MODELS``.
+        """
+        self.inference_backend = "sklearn"
+        self.onnx_backend = None
+        self.forest = None
+        self.served_models = {}
+        if self.model is None:
+            return
+        requested = settings.INFERENCE_BACKEND.strip().lower()
+        if requested == "onnx":
+            self.onnx_backend = load_onnx_backend(self.model)
+            if self.onnx_backend is None:
+                logger.warning("Falling back to the sklearn inference backend.")
+        elif requested != "sklearn":
+            logger.warning(
+                f"Unknown INFERENCE_BACKEND '{settings.INFERENCE_BACKEND}', using sklearn."
+            )
+        primary = ServedModel(
+            PRIMARY_MODEL_NAME, self.model, onnx_backend=self.onnx_backend
+        )
+        self.inference_backend = primary.inference_backend
+        self.forest = primary.forest
+        self.served_models[PRIMARY_MODEL_NAME] = primary
+        self.served_models.update(load_extra_models(settings.EXTRA_MODELS, primary))
+        self.loaded_at = datetime.now(timezone.utc)
+        # Requests run side by side on the lanes; each model call stays within
+        # the thread budget instead of spreading over every core
+        n_jobs = get_thread_budget().model_n_jobs
+        for served in self.served_models.values():
+            if hasattr(served.model, "n_jobs"):
+                served.model.n_jobs = n_jobs
+        self._init_shadow()
+        logger.info(
+            f"Inference backend: {self.inference_backend}, "
+            f"served models: {list(self.served_models)}"
+        )
+
+    def _init_shadow(self) -> None:
+        """Start shadow scoring of ``settings.SHADOW_MODEL``, if configured."""
+        if self.shadow is not None:
+            self.shadow.close(wait=False)
+            self.shadow = None
+        name = (settings.SHADOW_MODEL or "").strip()
+        if not name:
+            return
+        if name == PRIMARY_MODEL_NAME or name not in self.served_models:
+            logger.error(
+                f"SHADOW_MODEL '{name}' is not an extra served model, shadow mode disabled."
+            )
+            return
+        self.shadow = ShadowEvaluator(
+            self.served_models[PRIMARY_MODEL_NAME],
+            self.served_models[name],
+            sample_rate=settings.SHADOW_SAMPLE_RATE,
+            flush_interval_s=settings.SHADOW_FLUSH_INTERVAL_S,
+            max_pending=settings.SHADOW_MAX_PENDING,
+            batch_size=settings.SHADOW_BATCH_SIZE,
+        )
+        logger.info(
+            f"Shadow mode on: scoring {settings.SHADOW_SAMPLE_RATE:.0%} of traffic with '{name}'."
+        )
+
+    def load_drift_reference(self) -> None:
+        """
+        Build the drift monitor's reference histograms from the training set.
+
+        Uses the same descriptors, model and applicability score as live
+        predictions; for the applicability score each training molecule is
+        compared with the others (leave-one-out). Runs once; blocking, so call it
+        off the event loop.
+        """
+        if self.drift_monitor is None or self.model is None:
+            return
+        with self._drift_reference_lock:
+            if self._drift_reference_attempted:
+                return
+            self._drift_reference_attempted = True
+            try:
+                df = pd.read_csv(self.training_data_path)
+                mols = [
+                    mol
+                    for mol in (
+                        Chem.MolFromSmiles(str(smi))
+                        for smi in df["smiles"]
+                        if not pd.isna(smi)
+                    )
+                    if mol is not None
+                ]
+                bitvects: List[Any] = []
+                arrays: List[NDArray[np.int_]] = []
+                for mol in mols:
+                    bitvect, array = self._prepare_fingerprints(mol)
+                    if array is not None:
+                        bitvects.append(bitvect)
+                        arrays.append(array)
+                X = np.vstack(arrays)
+                nearest: List[float] = []
+                for i, bitvect in enumerate(bitvects):
+                    similarities = np.array(
+                        DataStructs.BulkTanimotoSimilarity(bitvect, bitvects)
+                    )
+                    similarities[i] = 0.0
+                    nearest.append(float(similarities.max()))
+                values: Dict[str, Sequence[Optional[float]]] = {
+                    "bbb_probability": self._infer(X, False)["probability"].tolist(),
+                    "applicability_score": nearest,
+                    "mw": [Descriptors.MolWt(mol) for mol in mols],
+                    "logp": [Crippen.MolLogP(mol) for mol in mols],
+                    "tpsa": [Descriptors.TPSA(mol) for mol in mols],
+                    "h_donors": [Lipinski.NumHDonors(mol) for mol in mols],
+                    "h_acceptors": [Lipinski.NumHAcceptors(mol) for mol in mols],
+                    "rot_bonds": [Lipinski.NumRotatableBonds(mol) for mol in mols],
+                }
+                self.drift_monitor.set_reference(values)
+                logger.info(
+                    f"Drift reference built from {len(mols)} training molecules."
+                )
+            except Exception as e:
+                logger.error(f"Failed to build drift reference: {e}", exc_info=True)
+
+    async def drift_report(self) -> Dict[str, Any]:
+        """Drift monitor report, building the training reference on first use."""
+        if self.drift_monitor is None:
+            return {"enabled": False}
+        if self.drift_monitor.reference is None:
+            await run_in_threadpool(self.load_drift_reference)
+        return {"enabled": True, **self.drift_monitor.report()}
+
+    def shutdown(self) -> None:
+        """Stop background work (shadow scoring) and flush its statistics."""
+        if self.shadow is not None:
+            self.shadow.close()
+            self.shadow = None
+        self.lanes.shutdown()
+
+    def resolve_model_names(self, names: Optional[Sequence[str]]) -> List[str]:
+        """
+        Validate requested model names, dropping duplicates and blanks.
+
+        Raises ValueError for names that are not served.
+        """
+        resolved: List[str] = []
+        for name in names or []:
+            name = name.strip()
+            if not name or name in resolved:
+                continue
+            if name not in self.served_models:
+                raise ValueError(
+                    f"Unknown model '{name}'. Available models: {', '.join(self.served_models)}"
+                )
+            resolved.append(name)
+        return resolved
+
+    def _predict_proba(self, X: NDArray[Any]) -> NDArray[np.float64]:
+        """Permeable-class probability of the primary model for a fingerprint matrix."""
+        return self.served_models[PRIMARY_MODEL_NAME].predict_proba(X)
+
+    def _infer(self, X: NDArray[Any], early_exit: bool) -> Dict[str, NDArray[Any]]:
+        """Run the primary model on a fingerprint matrix (see ``ServedModel.infer``)."""
+        return self.served_models[PRIMARY_MODEL_NAME].infer(X, early_exit)
 
     def _create_dummy_model(self) -> None:
         """Create a dummy model for demonstration."""
@@ -223,9 +483,14 @@ class BBBPredictor:
             self._training_fps = []  # Ensure it's empty on error
 
     def _calculate_molecular_properties(
-        self, mol: Optional[Chem.Mol]
+        self, mol: Optional[Chem.Mol], alerts: bool = True
     ) -> Dict[str, Any]:
-        """Calculate physicochemical properties and structural alerts for a molecule."""
+        """
+        Calculate physicochemical properties and structural alerts for a molecule.
+
+        With ``alerts=False`` the PAINS/Brenk counts are left at 0 for the caller
+        to fill in with ``_structural_alerts``.
+        """
         props: Dict[str, Any] = {
             "mw": None,
             "logp": None,
@@ -300,22 +565,8 @@ class BBBPredictor:
                 )
 
             # PAINS and Brenk alerts
-            if self.pains_catalog:
-                pains_matches = self.pains_catalog.GetMatches(mol)
-                props["pains_alerts"] = len(pains_matches)
-            else:
-                props["pains_alerts"] = 0  # Default if catalog not loaded
-
-            if self.brenk_catalog:
-                brenk_matches = self.brenk_catalog.GetMatches(mol)
-                props["brenk_alerts"] = len(brenk_matches)
-                # Optionally, log more details about Brenk matches if needed for debugging
-                # if brenk_matches:
-                #     for match in brenk_matches:
-                #         logger.debug(f"Brenk alert: {match.GetDescription()}")
-            else:
-                # This path should ideally not be taken if constructor guarantees loading
-                props["brenk_alerts"] = 0
+            if alerts:
+                props.update(self._structural_alerts(mol))
 
             # Molecular Formula
             props["mol_formula"] = Descriptors.rdMolDescriptors.CalcMolFormula(mol)
@@ -328,210 +579,511 @@ class BBBPredictor:
 
         return props
 
-    def _run_prediction_pipeline_sync(self, smiles: str) -> Dict[str, Any]:
-        # Initialize default molecular properties. These will be updated if 'mol' is valid.
-        current_molecular_properties: Dict[str, Any] = (
-            self._calculate_molecular_properties(None)
-        )
+    def _structural_alerts(self, mol: Chem.Mol) -> Dict[str, int]:
+        """Count the PAINS and Brenk alerts of a molecule."""
+        props = {"pains_alerts": 0, "brenk_alerts": 0}
+        if self.pains_catalog:
+            pains_matches = self.pains_catalog.GetMatches(mol)
+            props["pains_alerts"] = len(pains_matches)
+
+        if self.brenk_catalog:
+            brenk_matches = self.brenk_catalog.GetMatches(mol)
+            props["brenk_alerts"] = len(brenk_matches)
+            # Optionally, log more details about Brenk matches if needed for debugging
+            # if brenk_matches:
+            #     for match in brenk_matches:
+            #         logger.debug(f"Brenk alert: {match.GetDescription()}")
+        return props
 
-        # Base structure for the result. Fields will be updated based on pipeline execution.
-        final_result_data: Dict[str, Any] = {
+    def _new_result(self, smiles: str) -> Dict[str, Any]:
+        """Build the default result record for a SMILES before any pipeline stage runs."""
+        return {
             "smiles": smiles,
             "molecule_name": None,  # Can be updated later if available
-            **current_molecular_properties,
+            **self._calculate_molecular_properties(None),
             "status": "error_processing",  # Default, will be updated
             "error": None,
             "bbb_probability": 0.0,
             "prediction_class": "non_permeable",  # Default, updated on success or specific errors
             "prediction_certainty": 0.0,
+            "bbb_probability_std": None,
+            "bbb_probability_ci_low": None,
+            "bbb_probability_ci_high": None,
+            "trees_evaluated": None,
             "applicability_score": None,
             "fingerprint_hash": None,
-            "fingerprint_features": None,
+            # Set bit indices (see app.ml.fingerprint_encoding for the outputs)
+            "fingerprint_on_bits": None,
         }
 
-        mol: Optional[Chem.Mol] = None
+    @staticmethod
+    def _mark_pipeline_error(result: Dict[str, Any], error: Exception) -> None:
+        """Reset prediction-specific fields after an unexpected pipeline failure."""
+        result["status"] = "error_pipeline_execution"
+        result["error"] = f"Internal error during prediction pipeline: {error!s}"
+        result["bbb_probability"] = 0.0
+        result["prediction_class"] = "unknown"  # Distinct class for pipeline errors
+        result["prediction_certainty"] = 0.0
+        result["applicability_score"] = None
 
+    def _featurize_sync(
+        self,
+        smiles: str,
+        timings: Optional[Dict[str, float]] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> Tuple[Dict[str, Any], Optional[Any], Optional[NDArray[np.int_]]]:
+        """
+        Run the per-molecule stages (parse, descriptors, alerts, fingerprint) for
+        one SMILES.
+
+        Returns the partially filled result record, the RDKit bit vector used for
+        Tanimoto similarity and the numpy fingerprint used as model input. Both
+        fingerprints are None when the molecule did not make it to inference,
+        including when ``deadline`` expired before one of the stages.
+        """
+        result = self._new_result(smiles)
         try:
-            mol = Chem.MolFromSmiles(smiles)
+            if _abandon(deadline, result, "parse"):
+                return result, None, None
+            with _stage(timings, "parse"):
+                mol = Chem.MolFromSmiles(smiles)
             if mol is None:
-                final_result_data["status"] = "error_invalid_smiles"
-                final_result_data["error"] = "Invalid SMILES string."
+                result["status"] = "error_invalid_smiles"
+                result["error"] = "Invalid SMILES string."
                 logger.debug(
                     f"Invalid SMILES (sync): {smiles}. RDKit Mol object is None."
                 )
-                # prediction_class remains "non_permeable" (default)
-                # Other prediction fields remain at their defaults.
-                # Molecular properties are already set to defaults for None mol.
-                if final_result_data.get("error") is None:  # Cleanup error key
-                    if "error" in final_result_data:
-                        del final_result_data["error"]
-                return final_result_data
-
-            # Mol is valid, update properties and attempt fingerprint hash
-            current_molecular_properties = self._calculate_molecular_properties(mol)
-            final_result_data.update(current_molecular_properties)
+                return result, None, None
 
-            try:
-                canonical_smiles = Chem.MolToSmiles(mol, canonical=True)
-                final_result_data["fingerprint_hash"] = hashlib.sha256(
-                    canonical_smiles.encode("utf-8")
-                ).hexdigest()
-            except Exception as e_hash:
-                logger.warning(
-                    f"Could not generate canonical SMILES or hash for {smiles}: {e_hash}"
-                )
-                # fingerprint_hash remains None (default)
+            if _abandon(deadline, result, "descriptors"):
+                return result, None, None
+            with _stage(timings, "descriptors"):
+                result.update(self._calculate_molecular_properties(mol, alerts=False))
+                try:
+                    canonical_smiles = Chem.MolToSmiles(mol, canonical=True)
+                    result["fingerprint_hash"] = hashlib.sha256(
+                        canonical_smiles.encode("utf-8")
+                    ).hexdigest()
+                except Exception as e_hash:
+                    logger.warning(
+                        f"Could not generate canonical SMILES or hash for {smiles}: {e_hash}"
+                    )
 
-            fp_numpy_array = self._prepare_fingerprint(mol)
-            if fp_numpy_array is None:
-                final_result_data["status"] = "error_fingerprint_generation"
-                final_result_data["error"] = (
-                    "Failed to generate fingerprint for the molecule."
-                )
+            if _abandon(deadline, result, "alerts"):
+                return result, None, None
+            with _stage(timings, "alerts"):
+                try:
+                    result.update(self._structural_alerts(mol))
+                except Exception as e_alerts:
+                    logger.error(
+                        f"Error calculating structural alerts for {smiles}: {e_alerts}",
+                        exc_info=True,
+                    )
+
+            if _abandon(deadline, result, "fingerprint"):
+                return result, None, None
+            with _stage(timings, "fingerprint"):
+                fp_bitvect, fp_array = self._prepare_fingerprints(mol)
+            if fp_array is None:
+                result["status"] = "error_fingerprint_generation"
+                result["error"] = "Failed to generate fingerprint for the molecule."
                 logger.debug(
                     f"Numpy fingerprint generation failed for SMILES (sync): {smiles}"
                 )
-                # prediction_class remains "non_permeable" (default)
-                if final_result_data.get("error") is None:  # Cleanup error key
-                    if "error" in final_result_data:
-                        del final_result_data["error"]
-                return final_result_data
-
-            # Prepare RDKit fingerprint for Tanimoto
-            fp_rdkit_obj: Optional[Any] = None
-            try:
-                # Ensure radius matches what was used for training fingerprints if applicable
-                # Using settings.FP_RADIUS which should be 2 as per previous context
-                fp_rdkit_obj = AllChem.GetMorganFingerprintAsBitVect(
-                    mol, radius=settings.FP_RADIUS, nBits=settings.FP_NBITS
-                )
-            except Exception as e_fp_rdkit:
-                logger.warning(
-                    f"Failed to generate RDKit fingerprint for Tanimoto for {smiles}: {e_fp_rdkit}"
-                )
+                return result, None, None
+            return result, fp_bitvect, fp_array
+        except Exception as e_pipeline:
+            logger.error(
+                f"Critical error in prediction pipeline for '{smiles}': {e_pipeline}",
+                exc_info=True,
+            )
+            self._mark_pipeline_error(result, e_pipeline)
+            return result, None, None
 
-            if not self.model or not self.is_loaded:
-                final_result_data["status"] = "error_model_not_loaded"
-                final_result_data["error"] = "Prediction model is not available."
+    def _applicability_score(
+        self, fp_bitvect: Optional[Any], smiles: str
+    ) -> Optional[float]:
+        """Max Tanimoto similarity of a fingerprint to the training set, if available."""
+        if not self._training_fps:
+            logger.debug(
+                "Training fingerprints not loaded, cannot calculate applicability score."
+            )
+            return None
+        if fp_bitvect is None:
+            logger.debug(
+                f"RDKit fingerprint not generated for {smiles}, cannot calculate applicability score."
+            )
+            return None
+        try:
+            similarities = DataStructs.BulkTanimotoSimilarity(
+                fp_bitvect, self._training_fps
+            )
+        except Exception as e_tanimoto:
+            logger.warning(
+                f"Tanimoto similarity calculation failed for {smiles}: {e_tanimoto}"
+            )
+            return None
+        return round(max(similarities), 4) if similarities else 0.0
+
+    def _run_batch_pipeline_sync(
+        self,
+        smiles_list: List[str],
+        timings: Optional[Dict[str, float]] = None,
+        early_exit: Optional[bool] = None,
+        top_bits: int = 0,
+        models: Optional[Sequence[str]] = None,
+        deadlines: Optional[Sequence[Optional[Deadline]]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Run the full prediction pipeline for a list of SMILES in one pass.
+
+        Molecules are featurized one by one, then all valid fingerprints are stacked
+        into a single matrix so the forest is called once per batch rather than once
+        per molecule. When ``timings`` is given, the wall time of each stage is
+        accumulated into it (seconds, keyed by stage name). ``early_exit`` overrides
+        ``settings.EARLY_EXIT_ENABLED`` for this call. With ``top_bits > 0`` each
+        successful result also gets the ``top_bits`` fingerprint bits with the
+        largest tree-path contribution (see ``_bit_contributions``). ``models``
+        names served models whose predictions are added under
+        ``model_predictions``; they score the same fingerprint matrix, so they
+        add inference cost only. ``deadlines`` gives one optional deadline per
+        SMILES: a molecule whose deadline has expired skips its remaining stages
+        and gets status ``error_deadline_exceeded``.
+        """
+        if early_exit is None:
+            early_exit = settings.EARLY_EXIT_ENABLED
+        if deadlines is None:
+            deadlines = [None] * len(smiles_list)
+        results: List[Dict[str, Any]] = []
+        valid_rows: List[int] = []
+        fp_bitvects: List[Optional[Any]] = []
+        fp_arrays: List[NDArray[np.int_]] = []
+
+        for smiles, deadline in zip(smiles_list, deadlines):
+            result, fp_bitvect, fp_array = self._featurize_sync(
+                smiles, timings, deadline
+            )
+            if fp_array is not None:
+                valid_rows.append(len(results))
+                fp_bitvects.append(fp_bitvect)
+                fp_arrays.append(fp_array)
+            results.append(result)
+
+        live = [
+            i
+            for i, row in enumerate(valid_rows)
+            if not _abandon(deadlines[row], results[row], "inference")
+        ]
+        if len(live) < len(valid_rows):
+            valid_rows = [valid_rows[i] for i in live]
+            fp_bitvects = [fp_bitvects[i] for i in live]
+            fp_arrays = [fp_arrays[i] for i in live]
+
+        if valid_rows and (not self.model or not self.is_loaded):
+            logger.error(
+                "Model not loaded, cannot perform BBB prediction in sync pipeline."
+            )
+            for row in valid_rows:
+                results[row]["status"] = "error_model_not_loaded"
+                results[row]["error"] = "Prediction model is not available."
+            valid_rows = []
+
+        if valid_rows:
+            assert self.model is not None
+            X = np.vstack(fp_arrays)
+            try:
+                with _stage(timings, "inference"):
+                    inference = self._infer(X, early_exit)
+            except Exception as e_inference:
                 logger.error(
-                    "Model not loaded, cannot perform BBB prediction in sync pipeline."
+                    f"Critical error during batch inference for {len(valid_rows)} molecules: {e_inference}",
+                    exc_info=True,
                 )
-                # prediction_class remains "non_permeable" (default)
-                if final_result_data.get("error") is None:  # Cleanup error key
-                    if "error" in final_result_data:
-                        del final_result_data["error"]
-                return final_result_data
-
-            # Perform prediction
-            probability = self.model.predict_proba(fp_numpy_array.reshape(1, -1))[0, 1]
-            final_result_data["bbb_probability"] = float(probability)
-            final_result_data["prediction_class"] = (
-                "permeable" if probability >= 0.5 else "non_permeable"
-            )
-            final_result_data["prediction_certainty"] = abs(probability - 0.5) * 2
-            final_result_data["fingerprint_features"] = fp_numpy_array.tolist()
+                for row in valid_rows:
+                    self._mark_pipeline_error(results[row], e_inference)
+                valid_rows = []
+                inference = {}
 
-            # Calculate applicability score
-            logger.debug(
-                f"Applicability score input: Training FPs count = {len(self._training_fps) if self._training_fps else 0}, Input mol RDKit FP is None = {fp_rdkit_obj is None}"
+            if valid_rows and self.shadow is not None:
+                # Only samples and copies rows; the candidate runs in the background
+                self.shadow.submit(X, inference["probability"])
+
+            contributions: List[Optional[List[Dict[str, Any]]]] = [None] * len(
+                valid_rows
             )
-            if (
-                self._training_fps and fp_rdkit_obj
-            ):  # Ensure training FPs and current mol FP are available
-                try:
-                    similarities = DataStructs.BulkTanimotoSimilarity(
-                        fp_rdkit_obj, self._training_fps
-                    )
-                    logger.debug(
-                        f"Tanimoto similarities (first 5 if any): {similarities[:5] if similarities else 'None/Empty'}. Total similarities: {len(similarities) if similarities else 0}"
+            if valid_rows and top_bits > 0:
+                with _stage(timings, "contributions"):
+                    contributions = self._bit_contributions(X, top_bits)
+
+            model_outputs: Dict[str, Optional[Dict[str, NDArray[Any]]]] = {}
+            if valid_rows and models:
+                with _stage(timings, "extra_models"):
+                    model_outputs = self._infer_models(X, models, inference, early_exit)
+
+            for i, (row, fp_bitvect, fp_array) in enumerate(
+                zip(valid_rows, fp_bitvects, fp_arrays)
+            ):
+                result = results[row]
+                probability = float(inference["probability"][i])
+                result["bbb_probability"] = probability
+                result["prediction_class"] = (
+                    "permeable" if probability >= 0.5 else "non_permeable"
+                )
+                result["prediction_certainty"] = abs(probability - 0.5) * 2
+                result["trees_evaluated"] = int(inference["trees_evaluated"][i])
+                for key in ("std", "ci_low", "ci_high"):
+                    result[f"bbb_probability_{key}"] = (
+                        float(inference[key][i]) if key in inference else None
                     )
-                    # Ensure similarities list is not empty before calling max()
-                    if similarities:
-                        final_result_data["applicability_score"] = round(
-                            max(similarities), 4
-                        )
-                    else:
-                        # Handle case where similarities might be empty (e.g., if _training_fps was empty)
-                        final_result_data["applicability_score"] = (
-                            0.0  # Or None, depending on desired behavior
-                        )
-                except Exception as e_tanimoto:
-                    logger.warning(
-                        f"Tanimoto similarity calculation failed for {smiles}: {e_tanimoto}"
+                result["fingerprint_on_bits"] = np.flatnonzero(fp_array).tolist()
+                if top_bits > 0:
+                    result["top_bits"] = contributions[i]
+                if models:
+                    result["model_predictions"] = {
+                        name: self._model_prediction(name, output, i)
+                        for name, output in model_outputs.items()
+                    }
+                if _abandon(deadlines[row], result, "similarity"):
+                    continue
+                with _stage(timings, "similarity"):
+                    result["applicability_score"] = self._applicability_score(
+                        fp_bitvect, result["smiles"]
                     )
-                    # applicability_score remains its default (None)
-            elif not self._training_fps:
-                logger.debug(
-                    "Training fingerprints not loaded, cannot calculate applicability score."
-                )
-            elif (
-                not fp_rdkit_obj
-            ):  # fp_rdkit_obj could be None if its generation failed
-                logger.debug(
-                    f"RDKit fingerprint not generated for {smiles}, cannot calculate applicability score."
-                )
+                result["status"] = "success"
+                result["error"] = None
 
-            final_result_data["status"] = "success"
-            final_result_data["error"] = (
-                None  # Explicitly set error to None for success
+        for result in results:
+            # Only error records carry the "error" key
+            if result.get("error") is None:
+                result.pop("error", None)
+        if self.drift_monitor is not None:
+            self.drift_monitor.observe(
+                [result for result in results if result.get("status") == "success"]
             )
+        return results
 
-        except Exception as e_pipeline:
-            logger.error(
-                f"Critical error in prediction pipeline for '{smiles}': {e_pipeline}",
-                exc_info=True,
-            )
-            final_result_data["status"] = (
-                "error_pipeline_execution"  # More specific status
+    def _infer_models(
+        self,
+        X: NDArray[Any],
+        names: Sequence[str],
+        primary_inference: Dict[str, NDArray[Any]],
+        early_exit: bool,
+    ) -> Dict[str, Optional[Dict[str, NDArray[Any]]]]:
+        """
+        Run the named served models on a fingerprint matrix.
+
+        Models backed by the primary forest (threshold variants) reuse the primary
+        probabilities unless early exit is on, since settling depends on the
+        threshold. A model that fails maps to None instead of failing the batch.
+        """
+        primary = self.served_models[PRIMARY_MODEL_NAME]
+        outputs: Dict[str, Optional[Dict[str, NDArray[Any]]]] = {}
+        for name in names:
+            served = self.served_models[name]
+            if served.model is primary.model and not early_exit:
+                outputs[name] = primary_inference
+                continue
+            try:
+                outputs[name] = served.infer(X, early_exit)
+            except Exception as e:
+                logger.error(f"Inference failed for model '{name}': {e}", exc_info=True)
+                outputs[name] = None
+        return outputs
+
+    def _model_prediction(
+        self, name: str, output: Optional[Dict[str, NDArray[Any]]], row: int
+    ) -> Dict[str, Any]:
+        served = self.served_models[name]
+        prediction: Dict[str, Any] = {
+            "bbb_probability": None,
+            "prediction_class": None,
+            "threshold": served.threshold,
+            "model_version": served.version,
+        }
+        if output is not None:
+            probability = float(output["probability"][row])
+            prediction["bbb_probability"] = probability
+            prediction["prediction_class"] = (
+                "permeable" if probability >= served.threshold else "non_permeable"
             )
-            final_result_data["error"] = (
-                f"Internal error during prediction pipeline: {e_pipeline!s}"
+        return prediction
+
+    def _bit_contributions(
+        self, X: NDArray[Any], top_n: int
+    ) -> List[Optional[List[Dict[str, Any]]]]:
+        """
+        Top ``top_n`` tree-path contributions per fingerprint row.
+
+        Each entry is ``{"bit", "contribution", "present"}``; contributions are in
+        probability units and, over all bits, add up to ``bbb_probability`` minus
+        ``self.forest.bias``. Returns None per row when the loaded model is not a
+        forest or the calculation fails, so predictions are never lost to it.
+        """
+        if self.forest is None:
+            return [None] * X.shape[0]
+        try:
+            top = self.forest.top_contributions(X, top_n)
+        except Exception as e:
+            logger.error(f"Failed to compute bit contributions: {e}", exc_info=True)
+            return [None] * X.shape[0]
+        return [
+            [
+                {
+                    "bit": bit,
+                    "contribution": contribution,
+                    "present": bool(X[i, bit]),
+                }
+                for bit, contribution in row_top
+            ]
+            for i, row_top in enumerate(top)
+        ]
+
+    def _run_prediction_pipeline_sync(
+        self,
+        smiles: str,
+        models: Optional[Sequence[str]] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> Dict[str, Any]:
+        """Run the full prediction pipeline for a single SMILES."""
+        return self._run_batch_pipeline_sync(
+            [smiles], models=models, deadlines=[deadline]
+        )[0]
+
+    async def _run_prediction_pipeline(
+        self, smiles: str, models: Sequence[str]
+    ) -> Dict[str, Any]:
+        """
+        Offload the synchronous, CPU-bound pipeline to the interactive lane,
+        batched with concurrent requests when micro-batching is on. Once this
+        task is cancelled (no caller waits any more), the remaining stages of
+        the run are skipped.
+        """
+        with cancellation_token() as token:
+            if self.micro_batcher is not None:
+                return await self.micro_batcher.submit((smiles, tuple(models), token))
+            return await self.lanes.run_interactive(
+                self._run_prediction_pipeline_sync, smiles, models, token
             )
-            # Reset prediction-specific fields for general pipeline errors
-            final_result_data["bbb_probability"] = 0.0
-            final_result_data["prediction_class"] = (
-                "unknown"  # Distinct class for pipeline errors
+
+    def _run_micro_batch_sync(
+        self, items: List[Tuple[str, Tuple[str, ...], Optional[Deadline]]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Run the pipeline for micro-batched ``(smiles, models, deadline)`` requests.
+
+        Requests asking for the same extra models share one vectorized pipeline
+        run; results are returned in the order of ``items``.
+        """
+        groups: Dict[Tuple[str, ...], List[int]] = {}
+        for i, (_, models, _) in enumerate(items):
+            groups.setdefault(models, []).append(i)
+        results: List[Dict[str, Any]] = [{} for _ in items]
+        for models, rows in groups.items():
+            group_results = self._run_batch_pipeline_sync(
+                [items[row][0] for row in rows],
+                models=list(models),
+                deadlines=[items[row][2] for row in rows],
             )
-            final_result_data["prediction_certainty"] = 0.0
-            final_result_data["applicability_score"] = None
-            # fingerprint_hash and molecular_properties might have been partially set or default.
-            # Molecular properties are based on 'mol' if it was successfully created, else defaults.
-            # This is handled by initial setup and update after mol creation.
+            for row, result in zip(rows, group_results):
+                results[row] = result
+        return results
 
-        # Final cleanup of the error key
-        if final_result_data.get("error") is None:
-            if "error" in final_result_data:  # Check key existence before del
-                del final_result_data["error"]
+    def _empty_smiles_result(self, smiles: str) -> Dict[str, Any]:
+        """Result record for an empty SMILES input (never reaches the pipeline)."""
+        return {
+            "smiles": smiles,
+            "status": "error_empty_smiles",
+            "error": "Input SMILES string is empty.",
+            "bbb_probability": None,
+            "bbb_class": "unknown",
+            "bbb_confidence": None,
+            **self._calculate_molecular_properties(None),  # Default properties
+        }
 
-        return final_result_data
+    def _threadpool_error_result(self, smiles: str, error: Exception) -> Dict[str, Any]:
+        """Result record for a SMILES whose pipeline run failed in the threadpool."""
+        return {
+            "smiles": smiles,
+            "status": "error_threadpool_execution",
+            "error": f"Critical error in prediction pipeline: {error}",
+            "bbb_probability": None,
+            "bbb_class": "unknown",
+            "bbb_confidence": None,
+            **self._calculate_molecular_properties(None),  # Default properties
+        }
 
-    async def predict_smiles_data(self, smiles: str) -> Dict[str, Any]:
-        """Process a single SMILES string for BBB prediction and molecular properties (non-blocking)."""
+    async def predict_smiles_data(
+        self,
+        smiles: str,
+        models: Optional[Sequence[str]] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> Dict[str, Any]:
+        """
+        Process a single SMILES string for BBB prediction and molecular properties (non-blocking).
+
+        ``models`` adds the predictions of other served models under
+        ``model_predictions``; unknown names raise ValueError. Once ``deadline``
+        expires or is cancelled, DeadlineExceeded is raised and the pipeline run
+        is abandoned unless other callers still wait for it.
+        """
         if not self.is_loaded:
             logger.error("Model not loaded, cannot perform BBB prediction.")
             # This exception will propagate and be caught by the caller in process_batch_job
             raise RuntimeError("Model not loaded")
+        models = self.resolve_model_names(models)
 
         if not smiles:
             logger.warning("Input SMILES string is empty.")
-            return {
-                "smiles": smiles,
-                "status": "error_empty_smiles",
-                "error": "Input SMILES string is empty.",
-                "bbb_probability": None,
-                "bbb_class": "unknown",
-                "bbb_confidence": None,
-                **self._calculate_molecular_properties(None),  # Default properties
-            }
+            return self._empty_smiles_result(smiles)
 
         logger.info(f"Processing SMILES (async via threadpool): {repr(smiles)}")
         try:
-            # Offload the synchronous, CPU-bound work to a thread pool
-            result = await run_in_threadpool(self._run_prediction_pipeline_sync, smiles)
-            # ADDED LOGGING HERE (Corrected Placement)
-            logger.info(
-                f"Pipeline result for SMILES '{smiles}' (from try block): {result}"
+            # Recent results are reused and concurrent requests for the same
+            # molecule share one pipeline run; each caller gets a deep copy
+            # carrying its input SMILES, as the nested model predictions and
+            # fingerprint bits would otherwise be shared with the cache and
+            # other callers. Canonicalizing parses the molecule, so it runs in
+            # the threadpool rather than the event loop; not on the interactive
+            # lane, where cache hits would queue behind pipeline runs and their
+            # sub-millisecond latencies would skew the p95 throttling batches
+            canonical = await run_in_threadpool(canonical_smiles, smiles)
+            key = (
+                canonical or smiles,
+                tuple(models),
+                settings.MODEL_VERSION,
             )
+            ran_pipeline = False
+
+            async def run_pipeline() -> Dict[str, Any]:
+                nonlocal ran_pipeline
+                ran_pipeline = True
+                return await self._run_prediction_pipeline(smiles, models)
+
+            shared = self.prediction_cache.get(key)
+            if shared is None:
+                flight = self.prediction_flight.do(key, run_pipeline)
+                if deadline is not None:
+                    shared = await deadline.run(flight, "prediction")
+                else:
+                    shared = await flight
+                if shared.get("status") == "success":
+                    self.prediction_cache.set(key, shared)
+            if (
+                not ran_pipeline
+                and self.drift_monitor is not None
+                and shared.get("status") == "success"
+            ):
+                # The pipeline observed only the run it made; cache hits and
+                # coalesced callers are predictions served too
+                self.drift_monitor.observe([shared])
+            result = copy.deepcopy(shared)
+            result["smiles"] = smiles
+            # Formatting the full record (2048 fingerprint bits) costs more than
+            # serving the response, so only when debugging
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    f"Pipeline result for SMILES '{smiles}' (from try block): {result}"
+                )
             if "prediction_class" in result:
                 logger.info(
                     f"  prediction_class in pipeline_result for '{smiles}': {result['prediction_class']}"
@@ -540,6 +1092,8 @@ class BBBPredictor:
                 logger.warning(
                     f"  prediction_class MISSING in pipeline_result for SMILES: {smiles}"
                 )
+        except DeadlineExceeded:
+            raise
         except Exception as e_threadpool:
             # This catches errors from within _run_prediction_pipeline_sync if they weren't handled
             # or errors during the threadpool execution itself.
@@ -547,38 +1101,176 @@ class BBBPredictor:
                 f"Error running prediction pipeline in threadpool for SMILES '{smiles}': {e_threadpool}",
                 exc_info=True,
             )
-            return {
-                "smiles": smiles,
-                "status": "error_threadpool_execution",
-                "error": f"Critical error in prediction pipeline: {e_threadpool}",
-                "bbb_probability": None,
-                "bbb_class": "unknown",
-                "bbb_confidence": None,
-                **self._calculate_molecular_properties(None),  # Default properties
-            }
+            return self._threadpool_error_result(smiles, e_threadpool)
         return result
 
-    def _prepare_fingerprint(
+    def _atom_highlights_sync(
+        self, smiles: str, top_n: int, include_svg: bool
+    ) -> Dict[str, Any]:
+        """
+        Per-atom weights from the ``top_n`` most contributing set fingerprint bits.
+
+        Only bits that are set for the molecule have atom environments, so the
+        ranking is over those; the contribution of all other bits is reported as
+        ``unmapped_contribution``. Results are cached per canonical SMILES and
+        model version.
+        """
+        result: Dict[str, Any] = {
+            "smiles": smiles,
+            "canonical_smiles": None,
+            "status": "error_processing",
+            "model_version": settings.MODEL_VERSION,
+        }
+        mol = Chem.MolFromSmiles(smiles) if smiles else None
+        if mol is None:
+            result["status"] = (
+                "error_invalid_smiles" if smiles else "error_empty_smiles"
+            )
+            result["error"] = "Invalid SMILES string."
+            return result
+        if self.forest is None:
+            result["status"] = "error_model_not_loaded"
+            result["error"] = "Bit contributions need a random forest model."
+            return result
+
+        canonical_smiles = Chem.MolToSmiles(mol, canonical=True)
+        cache_key = (canonical_smiles, settings.MODEL_VERSION, top_n, include_svg)
+        cached = self.atom_highlight_cache.get(cache_key)
+        if cached is not None:
+            return {**cached, "smiles": smiles, "cached": True}
+
+        bit_info: Dict[int, Any] = {}
+        fp = rdMolDescriptors.GetMorganFingerprintAsBitVect(
+            mol, settings.FP_RADIUS, nBits=settings.FP_NBITS, bitInfo=bit_info
+        )
+        fp_array: NDArray[np.int_] = np.zeros((settings.FP_NBITS,), dtype=np.int_)
+        DataStructs.ConvertToNumpyArray(fp, fp_array)
+        contributions = self.forest.contributions(fp_array.reshape(1, -1))
+        features, values = contributions.indices, contributions.data
+        present = np.flatnonzero(fp_array[features])
+        order = present[np.argsort(-np.abs(values[present]), kind="stable")[:top_n]]
+        top = [(int(features[i]), float(values[i])) for i in order]
+
+        atom_weights, bits = atom_weights_from_bits(mol, top, bit_info)
+        total_contribution = float(values.sum())
+        result.update(
+            {
+                "canonical_smiles": canonical_smiles,
+                "status": "success",
+                "bbb_probability": self.forest.bias + total_contribution,
+                "bias": self.forest.bias,
+                "atom_weights": atom_weights,
+                "bits": bits,
+                "unmapped_contribution": total_contribution
+                - sum(value for _, value in top),
+                "svg": (
+                    render_atom_weights_svg(mol, atom_weights) if include_svg else None
+                ),
+            }
+        )
+        self.atom_highlight_cache.set(cache_key, result)
+        return {**result, "cached": False}
+
+    async def predict_atom_highlights(
+        self, smiles: str, top_n: int, include_svg: bool = False
+    ) -> Dict[str, Any]:
+        """Atom-level highlight map for one SMILES (non-blocking, cached)."""
+        if not self.is_loaded:
+            logger.error("Model not loaded, cannot compute atom highlights.")
+            raise RuntimeError("Model not loaded")
+        return await self.lanes.run_interactive(
+            self._atom_highlights_sync, smiles, top_n, include_svg
+        )
+
+    def _prepare_fingerprints(
         self, mol: Optional[Chem.Mol]
-    ) -> Optional[NDArray[np.int_]]:
-        """Convert an RDKit Mol object to a Morgan fingerprint if the mol is valid."""
+    ) -> Tuple[Optional[Any], Optional[NDArray[np.int_]]]:
+        """
+        Morgan fingerprint of a mol, both as an RDKit bit vector and a numpy array.
+
+        The bit vector feeds the Tanimoto applicability score and the array feeds the
+        model, so both come from a single fingerprint computation.
+        """
         if mol is None:
-            return None
+            return None, None
         try:
             fp = rdMolDescriptors.GetMorganFingerprintAsBitVect(
                 mol, settings.FP_RADIUS, nBits=settings.FP_NBITS
             )
-            return np.array(fp, dtype=np.int_)
+            fp_array: NDArray[np.int_] = np.zeros((settings.FP_NBITS,), dtype=np.int_)
+            DataStructs.ConvertToNumpyArray(fp, fp_array)
+            return fp, fp_array
         except Exception as e:
             logger.error(f"Error generating fingerprint: {e}", exc_info=True)
-            return None
+            return None, None
 
-    async def predict_batch(self, smiles_list: List[str]) -> List[Dict[str, Any]]:
-        """Process a batch of SMILES strings for BBB prediction and properties."""
-        results: List[Dict[str, Any]] = []
-        for smiles in smiles_list:
-            single_result = await self.predict_smiles_data(smiles)
-            results.append(single_result)
+    def _prepare_fingerprint(
+        self, mol: Optional[Chem.Mol]
+    ) -> Optional[NDArray[np.int_]]:
+        """Convert an RDKit Mol object to a Morgan fingerprint if the mol is valid."""
+        return self._prepare_fingerprints(mol)[1]
+
+    async def predict_batch(
+        self,
+        smiles_list: List[str],
+        early_exit: Optional[bool] = None,
+        top_bits: int = 0,
+        models: Optional[Sequence[str]] = None,
+        progress: Optional[Callable[[int], None]] = None,
+        lane: str = BATCH,
+    ) -> List[Dict[str, Any]]:
+        """
+        Process a batch of SMILES strings for BBB prediction and properties.
+
+        Non-empty SMILES go through the vectorized pipeline in chunks of
+        ``settings.BATCH_INFERENCE_CHUNK_SIZE``: each chunk costs one model call and
+        the event loop is released between chunks. ``early_exit`` overrides
+        ``settings.EARLY_EXIT_ENABLED`` for this batch and ``top_bits`` adds the
+        most contributing fingerprint bits to each result. ``models`` adds the
+        predictions of other served models (unknown names raise ValueError).
+        ``progress`` is called with the number of molecules of each finished chunk.
+        Chunks run on the batch execution lane unless ``lane`` is ``INTERACTIVE``.
+        """
+        if not self.is_loaded:
+            logger.error("Model not loaded, cannot perform BBB prediction.")
+            raise RuntimeError("Model not loaded")
+        models = self.resolve_model_names(models)
+
+        results: List[Dict[str, Any]] = [{} for _ in smiles_list]
+        pending_rows: List[int] = []
+        for row, smiles in enumerate(smiles_list):
+            if smiles:
+                pending_rows.append(row)
+            else:
+                results[row] = self._empty_smiles_result(smiles)
+
+        chunk_size = max(1, settings.BATCH_INFERENCE_CHUNK_SIZE)
+        for start in range(0, len(pending_rows), chunk_size):
+            chunk_rows = pending_rows[start : start + chunk_size]
+            chunk_smiles = [smiles_list[row] for row in chunk_rows]
+            try:
+                chunk_results = await self.lanes.run(
+                    lane,
+                    self._run_batch_pipeline_sync,
+                    chunk_smiles,
+                    None,
+                    early_exit,
+                    top_bits,
+                    models,
+                )
+            except Exception as e_threadpool:
+                logger.error(
+                    f"Error running batch pipeline in threadpool for {len(chunk_smiles)} SMILES: {e_threadpool}",
+                    exc_info=True,
+                )
+                chunk_results = [
+                    self._threadpool_error_result(smiles, e_threadpool)
+                    for smiles in chunk_smiles
+                ]
+            for row, result in zip(chunk_rows, chunk_results):
+                results[row] = result
+            if progress is not None:
+                progress(len(chunk_rows))
         return results
 
     def get_feature_importance(self, top_n: int = 20) -> List[Tuple[int, float]]:
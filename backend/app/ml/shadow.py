@@ -0,0 +1,262 @@
+"""
+Shadow-mode scoring of a candidate model on live traffic.
+
+A sample of the molecules scored by the primary model is handed, as already
+computed fingerprint rows, to a single low-priority background thread that
+scores them with the candidate. Only the sampling and a copy of the sampled
+rows happen on the request path; the candidate's inference, the comparison
+and the periodic flush of the disagreement statistics happen off it. A timer
+thread wakes up every flush interval so a partial buffer is scored, and the
+window logged, even when no new traffic arrives.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from numpy.typing import NDArray
+
+from app.ml.model_registry import ServedModel
+
+logger = logging.getLogger(__name__)
+
+# Nice value of the shadow worker thread (19 = lowest priority)
+_SHADOW_NICENESS = 19
+
+
+def _lower_thread_priority() -> None:
+    """Run the calling thread at the lowest CPU priority (Linux: per thread)."""
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), _SHADOW_NICENESS)
+    except (AttributeError, OSError) as e:
+        logger.debug(f"Could not lower shadow worker priority: {e}")
+
+
+class DisagreementStats:
+    """Running comparison between primary and candidate predictions."""
+
+    def __init__(self) -> None:
+        self.n = 0
+        self.class_disagreements = 0
+        self.abs_diff_sum = 0.0
+        self.sq_diff_sum = 0.0
+        self.max_abs_diff = 0.0
+        self.primary_sum = 0.0
+        self.shadow_sum = 0.0
+
+    def update(
+        self,
+        primary: NDArray[np.float64],
+        shadow: NDArray[np.float64],
+        primary_threshold: float,
+        shadow_threshold: float,
+    ) -> None:
+        diff = shadow - primary
+        self.n += len(primary)
+        self.class_disagreements += int(
+            np.count_nonzero(
+                (primary >= primary_threshold) != (shadow >= shadow_threshold)
+            )
+        )
+        self.abs_diff_sum += float(np.abs(diff).sum())
+        self.sq_diff_sum += float(np.square(diff).sum())
+        if len(diff):
+            self.max_abs_diff = max(self.max_abs_diff, float(np.abs(diff).max()))
+        self.primary_sum += float(primary.sum())
+        self.shadow_sum += float(shadow.sum())
+
+    def as_dict(self) -> Dict[str, Any]:
+        n = self.n
+        return {
+            "n": n,
+            "class_disagreements": self.class_disagreements,
+            "class_disagreement_rate": self.class_disagreements / n if n else None,
+            "mean_abs_diff": self.abs_diff_sum / n if n else None,
+            "rmse": (self.sq_diff_sum / n) ** 0.5 if n else None,
+            "max_abs_diff": self.max_abs_diff if n else None,
+            "mean_primary_probability": self.primary_sum / n if n else None,
+            "mean_shadow_probability": self.shadow_sum / n if n else None,
+        }
+
+
+class ShadowEvaluator:
+    """
+    Scores a sample of primary-model traffic with a candidate model.
+
+    ``submit`` never blocks. Sampled rows are buffered and scored in blocks of
+    ``batch_size`` (or whatever has accumulated after ``flush_interval_s``), so
+    the worker wakes up rarely and spends its time in vectorized inference
+    rather than competing with request threads for the GIL per molecule. Rows
+    beyond ``max_pending`` buffered or in-flight molecules are dropped and
+    counted. Statistics are kept for the current window and since start; the
+    window is logged and reset every ``flush_interval_s`` seconds.
+    """
+
+    def __init__(
+        self,
+        primary: ServedModel,
+        candidate: ServedModel,
+        sample_rate: float,
+        flush_interval_s: float = 60.0,
+        max_pending: int = 1000,
+        batch_size: int = 64,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.primary = primary
+        self.candidate = candidate
+        self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+        self.flush_interval_s = flush_interval_s
+        self.max_pending = max_pending
+        self.batch_size = max(1, batch_size)
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+        self._buffer_X: List[NDArray[Any]] = []
+        self._buffer_primary: List[NDArray[np.float64]] = []
+        self._buffered = 0
+        self._last_dispatch = time.monotonic()
+        self._pending = 0
+        self._sampled = 0
+        self._dropped = 0
+        self._failed = 0
+        self._window = DisagreementStats()
+        self._total = DisagreementStats()
+        self._window_started = time.monotonic()
+        self.last_flushed: Optional[Dict[str, Any]] = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="shadow",
+            initializer=_lower_thread_priority,
+        )
+        self._stopped = threading.Event()
+        self._timer = threading.Thread(
+            target=self._run_timer, name="shadow-timer", daemon=True
+        )
+        self._timer.start()
+
+    def submit(self, X: NDArray[Any], primary_probabilities: NDArray[Any]) -> None:
+        """Buffer a random sample of the rows of ``X`` for candidate scoring."""
+        if self.sample_rate <= 0 or len(X) == 0:
+            return
+        with self._lock:
+            sampled = np.flatnonzero(self._rng.random(len(X)) < self.sample_rate)
+            if sampled.size == 0:
+                return
+            accepted = sampled[: max(0, self.max_pending - self._pending)]
+            self._dropped += sampled.size - accepted.size
+            if accepted.size == 0:
+                return
+            self._pending += accepted.size
+            self._sampled += accepted.size
+            self._buffer_X.append(np.array(X[accepted]))
+            self._buffer_primary.append(
+                np.asarray(primary_probabilities, dtype=np.float64)[accepted]
+            )
+            self._buffered += accepted.size
+            due = (
+                self._buffered >= self.batch_size
+                or time.monotonic() - self._last_dispatch >= self.flush_interval_s
+            )
+        if due:
+            self._dispatch()
+
+    def _run_timer(self) -> None:
+        while not self._stopped.wait(self.flush_interval_s):
+            self._dispatch()
+            try:
+                self._executor.submit(self._flush_if_due)
+            except RuntimeError:
+                return
+
+    def _dispatch(self) -> None:
+        """Hand the buffered rows to the worker thread."""
+        with self._lock:
+            if not self._buffered:
+                return
+            X = np.vstack(self._buffer_X)
+            primary = np.concatenate(self._buffer_primary)
+            self._buffer_X, self._buffer_primary, self._buffered = [], [], 0
+            self._last_dispatch = time.monotonic()
+        try:
+            self._executor.submit(self._score, X, primary)
+        except RuntimeError:
+            # Executor already shut down
+            with self._lock:
+                self._pending -= len(X)
+                self._dropped += len(X)
+
+    def _score(self, X: NDArray[Any], primary: NDArray[np.float64]) -> None:
+        try:
+            shadow = np.asarray(
+                self.candidate.infer(X, early_exit=False)["probability"],
+                dtype=np.float64,
+            )
+        except Exception as e:
+            logger.error(f"Shadow model '{self.candidate.name}' failed: {e}")
+            with self._lock:
+                self._pending -= len(X)
+                self._failed += len(X)
+            return
+        with self._lock:
+            self._pending -= len(X)
+            for stats in (self._window, self._total):
+                stats.update(
+                    primary, shadow, self.primary.threshold, self.candidate.threshold
+                )
+        self._flush_if_due()
+
+    def _flush_if_due(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_started < self.flush_interval_s:
+                return
+            if not self._window.n:
+                # Nothing to report: the window just starts over
+                self._window_started = now
+                return
+        self.flush()
+
+    def flush(self) -> Dict[str, Any]:
+        """Log the current window of statistics and start a new one."""
+        with self._lock:
+            now = time.monotonic()
+            report = {
+                "candidate": self.candidate.name,
+                "candidate_version": self.candidate.version,
+                "window_s": round(now - self._window_started, 1),
+                **self._window.as_dict(),
+            }
+            self._window = DisagreementStats()
+            self._window_started = now
+            self.last_flushed = report
+        if report["n"]:
+            logger.info(f"Shadow disagreement: {json.dumps(report)}")
+        return report
+
+    def stats(self) -> Dict[str, Any]:
+        """Current counters, the open window and the totals since start."""
+        with self._lock:
+            return {
+                "candidate": self.candidate.name,
+                "candidate_version": self.candidate.version,
+                "sample_rate": self.sample_rate,
+                "sampled": self._sampled,
+                "pending": self._pending,
+                "dropped": self._dropped,
+                "failed": self._failed,
+                "window": self._window.as_dict(),
+                "total": self._total.as_dict(),
+                "last_flushed": self.last_flushed,
+            }
+
+    def close(self, wait: bool = True) -> None:
+        """Score buffered rows (if ``wait``), flush and stop the worker thread."""
+        self._stopped.set()
+        if wait:
+            self._dispatch()
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+        self.flush()
@@ -0,0 +1,340 @@
+"""
+Offline validation benchmark for the BBB prediction pipeline.
+
+Runs the same batch pipeline the API serves over a labelled CSV (e.g. the B3DB
+export in ``sample_data``) and reports accuracy (AUC-ROC, AUC-PR) together with
+throughput, per-stage timings and peak memory, so a model or featurization change
+can be checked for both at once.
+
+Usage:
+    python -m app.ml.validate "../sample_data/B3DB_50 mol.csv" --output report.json
+"""
+
+import argparse
+import csv
+import json
+import logging
+import resource
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from numpy.typing import NDArray
+from sklearn.metrics import (
+    accuracy_score,
+    average_precision_score,
+    f1_score,
+    roc_auc_score,
+)
+
+from app.core.config import settings
+from app.ml.predictor import BBBPredictor
+
+logger = logging.getLogger("validate")
+
+SMILES_COLUMN_CANDIDATES = ("smiles",)
+LABEL_COLUMN_CANDIDATES = ("label", "bbb+/bbb-", "bbb_label", "bbb", "y")
+POSITIVE_LABELS = {"1", "1.0", "bbb+", "permeable", "true", "yes"}
+NEGATIVE_LABELS = {"0", "0.0", "bbb-", "non_permeable", "false", "no"}
+
+
+def _parse_line(line: str, delimiter: str) -> List[str]:
+    """Parse one CSV line, unwrapping rows that were exported as a single quoted field."""
+    row = next(csv.reader([line.rstrip("\r\n").rstrip(";")], delimiter=delimiter))
+    if len(row) == 1 and delimiter in row[0]:
+        # Some spreadsheet exports (e.g. "B3DB_50 mol.csv") quote each whole row
+        row = next(csv.reader([row[0]], delimiter=delimiter))
+    return row
+
+
+def _find_column(
+    header: Sequence[str], requested: Optional[str], candidates: Sequence[str]
+) -> int:
+    normalized = [h.strip().lower() for h in header]
+    names = [requested.strip().lower()] if requested else list(candidates)
+    for name in names:
+        if name in normalized:
+            return normalized.index(name)
+    raise ValueError(f"None of the columns {names} found in header {list(header)}")
+
+
+def _parse_label(raw: str) -> Optional[int]:
+    value = raw.strip().lower()
+    if value in POSITIVE_LABELS:
+        return 1
+    if value in NEGATIVE_LABELS:
+        return 0
+    return None
+
+
+def load_labelled_smiles(
+    path: Path,
+    smiles_column: Optional[str] = None,
+    label_column: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> Tuple[List[str], List[int]]:
+    """
+    Read (SMILES, label) pairs from a labelled CSV/TSV file.
+
+    Labels may be 0/1 or B3DB-style ``BBB+``/``BBB-``. Rows without a SMILES or
+    with an unrecognised label are skipped.
+    """
+    delimiter = "\t" if path.suffix.lower() == ".tsv" else ","
+    smiles_list: List[str] = []
+    labels: List[int] = []
+    skipped = 0
+    with path.open(encoding="utf-8-sig", newline="") as handle:
+        header = _parse_line(handle.readline(), delimiter)
+        smiles_idx = _find_column(header, smiles_column, SMILES_COLUMN_CANDIDATES)
+        label_idx = _find_column(header, label_column, LABEL_COLUMN_CANDIDATES)
+        for line in handle:
+            if not line.strip():
+                continue
+            row = _parse_line(line, delimiter)
+            if len(row) <= max(smiles_idx, label_idx):
+                skipped += 1
+                continue
+            smiles = row[smiles_idx].strip()
+            label = _parse_label(row[label_idx])
+            if not smiles or label is None:
+                skipped += 1
+                continue
+            smiles_list.append(smiles)
+            labels.append(label)
+            if limit is not None and len(smiles_list) >= limit:
+                break
+    if skipped:
+        logger.warning(f"Skipped {skipped} rows without a SMILES or a usable label.")
+    return smiles_list, labels
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def _classification_metrics(
+    y_true: NDArray[np.int_], y_prob: NDArray[np.float64], threshold: float
+) -> Dict[str, Optional[float]]:
+    metrics: Dict[str, Optional[float]] = {
+        "auc_roc": None,
+        "auc_pr": None,
+        "accuracy": None,
+        "f1_bbb_plus": None,
+        "f1_bbb_minus": None,
+    }
+    if len(y_true) == 0:
+        return metrics
+    y_pred = (y_prob >= threshold).astype(int)
+    metrics["accuracy"] = float(accuracy_score(y_true, y_pred))
+    metrics["f1_bbb_plus"] = float(
+        f1_score(y_true, y_pred, pos_label=1, zero_division=0)
+    )
+    metrics["f1_bbb_minus"] = float(
+        f1_score(y_true, y_pred, pos_label=0, zero_division=0)
+    )
+    if len(set(y_true.tolist())) == 2:
+        metrics["auc_roc"] = float(roc_auc_score(y_true, y_prob))
+        metrics["auc_pr"] = float(average_precision_score(y_true, y_prob))
+    else:
+        logger.warning("Only one class present in labels, AUC metrics are undefined.")
+    return metrics
+
+
+def run_validation(
+    predictor: BBBPredictor,
+    smiles_list: List[str],
+    labels: List[int],
+    chunk_size: int = settings.BATCH_INFERENCE_CHUNK_SIZE,
+    threshold: float = 0.5,
+    trace_memory: bool = False,
+    early_exit: Optional[bool] = None,
+) -> Dict[str, Any]:
+    """
+    Score ``smiles_list`` with ``predictor`` and compare against ``labels``.
+
+    The predictor's batch pipeline is driven chunk by chunk exactly as batch jobs
+    do, with stage timings collected on the way. Molecules that fail the pipeline
+    are counted but excluded from the accuracy metrics. ``early_exit`` overrides
+    ``settings.EARLY_EXIT_ENABLED`` for the run.
+    """
+    if early_exit is None:
+        early_exit = settings.EARLY_EXIT_ENABLED
+    timings: Dict[str, float] = {}
+    results: List[Dict[str, Any]] = []
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    for offset in range(0, len(smiles_list), max(1, chunk_size)):
+        results.extend(
+            predictor._run_batch_pipeline_sync(
+                smiles_list[offset : offset + chunk_size], timings, early_exit
+            )
+        )
+    wall_time = time.perf_counter() - start
+    traced_peak_mb: Optional[float] = None
+    if trace_memory:
+        traced_peak_mb = tracemalloc.get_traced_memory()[1] / (1024.0 * 1024.0)
+        tracemalloc.stop()
+
+    scored = [
+        (label, result["bbb_probability"])
+        for label, result in zip(labels, results)
+        if result.get("status") == "success"
+    ]
+    y_true = np.array([label for label, _ in scored], dtype=int)
+    y_prob = np.array([prob for _, prob in scored], dtype=float)
+    trees_evaluated = [
+        result["trees_evaluated"]
+        for result in results
+        if result.get("status") == "success"
+    ]
+    status_counts: Dict[str, int] = {}
+    for result in results:
+        status = str(result.get("status"))
+        status_counts[status] = status_counts.get(status, 0) + 1
+
+    n_molecules = len(smiles_list)
+    return {
+        "n_molecules": n_molecules,
+        "n_scored": len(scored),
+        "n_failed": n_molecules - len(scored),
+        "status_counts": status_counts,
+        "threshold": threshold,
+        "metrics": _classification_metrics(y_true, y_prob, threshold),
+        "inference": {
+            "backend": predictor.inference_backend,
+            "early_exit": early_exit,
+            "mean_trees_evaluated": (
+                round(float(np.mean(trees_evaluated)), 2) if trees_evaluated else None
+            ),
+        },
+        "throughput": {
+            "wall_time_s": round(wall_time, 4),
+            "molecules_per_second": (
+                round(n_molecules / wall_time, 2) if wall_time > 0 else None
+            ),
+            "chunk_size": chunk_size,
+        },
+        "stage_timings_s": {k: round(v, 4) for k, v in timings.items()},
+        "stage_timings_ms_per_molecule": {
+            k: round(v * 1000.0 / n_molecules, 4) if n_molecules else None
+            for k, v in timings.items()
+        },
+        "memory": {
+            "peak_rss_mb": round(_peak_rss_mb(), 2),
+            "traced_peak_mb": (
+                round(traced_peak_mb, 2) if traced_peak_mb is not None else None
+            ),
+        },
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark accuracy and speed of the BBB prediction pipeline"
+    )
+    parser.add_argument("dataset", type=Path, help="Labelled CSV or TSV file")
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="Where to write the JSON report (default: print to stdout)",
+    )
+    parser.add_argument("--smiles-column", default=None, help="SMILES column name")
+    parser.add_argument("--label-column", default=None, help="Label column name")
+    parser.add_argument(
+        "--limit", type=int, default=None, help="Only score the first N molecules"
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=settings.BATCH_INFERENCE_CHUNK_SIZE,
+        help=f"Molecules per inference call (default: {settings.BATCH_INFERENCE_CHUNK_SIZE})",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.5,
+        help="Probability threshold for the BBB+ class (default: 0.5)",
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Also report the tracemalloc peak (slows the run down)",
+    )
+    parser.add_argument(
+        "--early-exit",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help="Force early-exit tree voting on or off (default: EARLY_EXIT_ENABLED)",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    # The predictor logs every molecule at INFO level; keep the benchmark quiet
+    logging.getLogger("app.ml.predictor").setLevel(logging.WARNING)
+
+    if not args.dataset.exists():
+        logger.error(f"Dataset not found: {args.dataset}")
+        return 1
+    smiles_list, labels = load_labelled_smiles(
+        args.dataset, args.smiles_column, args.label_column, args.limit
+    )
+    if not smiles_list:
+        logger.error(f"No labelled molecules found in {args.dataset}")
+        return 1
+    logger.info(f"Loaded {len(smiles_list)} labelled molecules from {args.dataset}")
+
+    load_start = time.perf_counter()
+    predictor = BBBPredictor()
+    model_load_time = time.perf_counter() - load_start
+    if not predictor.is_loaded:
+        logger.error("Model could not be loaded.")
+        return 1
+
+    report = run_validation(
+        predictor,
+        smiles_list,
+        labels,
+        chunk_size=args.chunk_size,
+        threshold=args.threshold,
+        trace_memory=args.trace_memory,
+        early_exit=args.early_exit,
+    )
+    report = {
+        "dataset": str(args.dataset),
+        "model_path": settings.MODEL_PATH,
+        "model_version": settings.MODEL_VERSION,
+        "fingerprint": {"radius": settings.FP_RADIUS, "n_bits": settings.FP_NBITS},
+        "generated_at": datetime.utcnow().isoformat(),
+        "model_load_time_s": round(model_load_time, 4),
+        **report,
+    }
+
+    report_json = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(report_json + "\n")
+        logger.info(f"Report written to {args.output}")
+    else:
+        print(report_json)
+
+    metrics = report["metrics"]
+    logger.info(
+        f"AUC-ROC: {metrics['auc_roc']}, AUC-PR: {metrics['auc_pr']}, "
+        f"{report['throughput']['molecules_per_second']} molecules/s, "
+        f"peak RSS {report['memory']['peak_rss_mb']} MB"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,7 +7,7 @@ from datetime import datetime
 from enum import Enum
 import re
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 
 
 class JobStatus(str, Enum):
@@ -92,6 +92,14 @@ class BatchPredictionRequest(BaseModel):
     notify_email: Optional[str] = Field(
         None, description="Email for completion notification"
     )
+    models: Optional[str] = Field(
+        None,
+        description="Comma-separated names of extra served models to score the job with",
+    )
+    fingerprint_encoding: Optional[str] = Field(
+        None,
+        description="Fingerprint column encoding: none, base64, hex or indices (defaults to FINGERPRINT_ENCODING)",
+    )
 
 
 class BatchJobResponse(BaseModel):
@@ -126,7 +134,10 @@ class BatchStatusResponse(BaseModel):
 class ExplainRequest(BaseModel):
     """AI explanation request."""
 
-    smiles: str
+    smiles: Optional[str] = None
+    prediction_id: Optional[str] = Field(
+        None, description="prediction_id of a /predict result to explain"
+    )
     prediction_result: Optional[Dict[str, Any]] = None
     context: Optional[str] = Field(
         None, description="Additional context for explanation"
@@ -134,12 +145,21 @@ class ExplainRequest(BaseModel):
 
     @field_validator("smiles", mode="before")
     @classmethod
-    def validate_smiles(cls, v: str) -> str:
+    def validate_smiles(cls, v: Optional[str]) -> Optional[str]:
         """Basic SMILES validation."""
-        if not v or len(v.strip()) == 0:
+        if v is None:
+            return None
+        if len(v.strip()) == 0:
             raise ValueError("SMILES string cannot be empty")
         return v.strip()
 
+    @model_validator(mode="after")
+    def require_smiles_or_prediction_id(self) -> "ExplainRequest":
+        """A molecule is given by its SMILES or a prediction_id."""
+        if self.smiles is None and self.prediction_id is None:
+            raise ValueError("Either smiles or prediction_id is required")
+        return self
+
 
 class MoleculeData(BaseModel):
     """Molecule data for database storage."""
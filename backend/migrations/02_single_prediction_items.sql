@@ -0,0 +1,41 @@
+
+-- VitronMax Single Predictions
+
+-- Single Prediction Items Table: /predict results, written in bulk by the
+-- write-behind queue under the prediction_id the response returned, which
+-- /report/{prediction_id} and /explain look up
+CREATE TABLE IF NOT EXISTS single_prediction_item (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    smiles TEXT NOT NULL,
+    molecule_name TEXT,
+    bbb_probability DOUBLE PRECISION,
+    prediction_class TEXT,
+    prediction_certainty DOUBLE PRECISION,
+    applicability_score DOUBLE PRECISION,
+    fingerprint_hash TEXT,
+    model_version TEXT,
+    molecular_weight DOUBLE PRECISION,
+    log_p DOUBLE PRECISION,
+    tpsa DOUBLE PRECISION,
+    num_rotatable_bonds INTEGER,
+    num_h_acceptors INTEGER,
+    num_h_donors INTEGER,
+    fraction_csp3 DOUBLE PRECISION,
+    molar_refractivity DOUBLE PRECISION,
+    log_s_esol DOUBLE PRECISION,
+    gi_absorption TEXT,
+    lipinski_rule_of_five_passes BOOLEAN,
+    pains_alert_count INTEGER,
+    brenk_alert_count INTEGER,
+    num_heavy_atoms INTEGER,
+    molecular_formula TEXT,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+);
+
+-- Databases where the table was created before this migration get the id key
+ALTER TABLE single_prediction_item
+    ADD COLUMN IF NOT EXISTS id UUID NOT NULL DEFAULT gen_random_uuid();
+CREATE UNIQUE INDEX IF NOT EXISTS idx_single_prediction_item_id ON single_prediction_item(id);
+
+-- Create index for recent predictions queries
+CREATE INDEX IF NOT EXISTS idx_single_prediction_item_created_at ON single_prediction_item(created_at);
@@ -6,7 +6,9 @@ import pytest
 import os
 import sys
 from pathlib import Path
-from typing import Iterator
+from typing import Iterator, Tuple
+
+import numpy as np
 
 # Add backend to path
 backend_path = Path(__file__).parent.parent
@@ -20,11 +22,38 @@ os.environ["STORAGE_BUCKET_NAME"] = "test-bucket"
 os.environ["ENV"] = "test"
 os.environ["LOG_LEVEL"] = "ERROR"
 os.environ["MODEL_PATH"] = "models/test_model.joblib"
+# Many tests share one client address; rate limit tests use their own limiter
+os.environ["RATE_LIMIT_ENABLED"] = "false"
 
 # Remove potentially problematic env vars for testing
 os.environ.pop("FLY_API_TOKEN", None)
 
 
+class FakeClock:
+    """Monotonic clock that only moves when a test advances ``now``."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    """A fresh fake clock for components that take a ``clock`` callable."""
+    return FakeClock()
+
+
+@pytest.fixture(scope="session")
+def fingerprint_data() -> Tuple[np.ndarray, np.ndarray]:
+    """Binary fingerprint-like features with a learnable signal, and their labels."""
+    rng = np.random.RandomState(0)
+    X = rng.randint(0, 2, size=(400, 64))
+    y = (X[:, 0] + X[:, 1] + rng.random_sample(400) > 1.2).astype(int)
+    return X, y
+
+
 @pytest.fixture(scope="session", autouse=True)
 def mock_supabase() -> Iterator[None]:
     """Mock Supabase client."""
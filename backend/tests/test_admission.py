@@ -0,0 +1,80 @@
+"""
+Tests for admission control and load shedding.
+"""
+
+import pytest
+
+from app.core.admission import BATCH, INTERACTIVE, AdmissionController, Overloaded
+from conftest import FakeClock
+
+
+def make_controller(clock: FakeClock) -> AdmissionController:
+    return AdmissionController(
+        limits={INTERACTIVE: 4, BATCH: 100},
+        default_throughput=10.0,
+        max_retry_after_s=60,
+        clock=clock,
+    )
+
+
+def test_sheds_beyond_limit_per_workload(clock: FakeClock) -> None:
+    admission = make_controller(clock)
+
+    for _ in range(4):
+        admission.acquire(INTERACTIVE)
+    with pytest.raises(Overloaded) as excinfo:
+        admission.acquire(INTERACTIVE)
+    assert excinfo.value.status_code == 503
+    assert excinfo.value.headers == {"Retry-After": "1"}
+
+    # Classes are independent, and an idle class admits oversized work
+    admission.acquire(BATCH, 500)
+    with pytest.raises(Overloaded):
+        admission.acquire(BATCH, 1)
+
+    admission.release(INTERACTIVE)
+    admission.acquire(INTERACTIVE)
+    stats = admission.stats()["workloads"]
+    assert stats[INTERACTIVE]["pending"] == 4
+    assert stats[INTERACTIVE]["rejected"] == 1
+    assert stats[BATCH]["pending"] == 500
+
+
+def test_retry_after_follows_measured_throughput(clock: FakeClock) -> None:
+    admission = make_controller(clock)
+    admission.acquire(BATCH, 100)
+    # Excess of 200 molecules at the default 10 molecules/s
+    with pytest.raises(Overloaded) as excinfo:
+        admission.acquire(BATCH, 200)
+    assert excinfo.value.retry_after == 20
+
+    # 100 molecules completed over 20 s: 5 molecules/s
+    admission.record_completed(BATCH, 100)
+    clock.now += 20.0
+    assert admission.throughput(BATCH) == pytest.approx(5.0)
+    with pytest.raises(Overloaded) as excinfo:
+        admission.acquire(BATCH, 200)
+    assert excinfo.value.retry_after == 40
+    with pytest.raises(Overloaded) as excinfo:
+        admission.acquire(BATCH, 1000)
+    assert excinfo.value.retry_after == 60  # Capped
+
+    # Old completions fall out of the window
+    clock.now += 60.0
+    assert admission.throughput(BATCH) == 10.0
+
+
+async def test_admit_releases_on_error(clock: FakeClock) -> None:
+    admission = make_controller(clock)
+    with pytest.raises(ValueError):
+        async with admission.admit(INTERACTIVE, 3):
+            assert admission.stats()["workloads"][INTERACTIVE]["pending"] == 3
+            raise ValueError("boom")
+    stats = admission.stats()["workloads"][INTERACTIVE]
+    assert stats["pending"] == 0
+    assert stats["completed"] == 0
+
+    disabled = AdmissionController(limits={INTERACTIVE: 1}, enabled=False)
+    for _ in range(5):
+        disabled.acquire(INTERACTIVE)
+    assert disabled.stats()["workloads"][INTERACTIVE]["rejected"] == 0
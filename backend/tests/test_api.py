@@ -2,10 +2,24 @@
 Tests for API endpoints.
 """
 
+import asyncio
+import json
+import uuid
+from pathlib import Path
+
 import pytest
 from fastapi.testclient import TestClient
+from unittest.mock import MagicMock
+from app.core.admission import BATCH, INTERACTIVE, AdmissionController
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.rate_limit import BATCH_MOLECULE, EXPLAIN, PREDICTION, RateLimiter
+from app.core.write_behind import WriteBehindQueue
 from app.main import app
-from typing import Iterator
+from app.ml.fingerprint_encoding import decode_fingerprint
+from typing import Any, Dict, Iterator
+
+MIGRATIONS_DIR = Path(__file__).resolve().parents[1] / "migrations"
 
 
 @pytest.fixture(scope="module")
@@ -24,6 +38,20 @@ class TestHealthCheck:
         assert response.json()["status"] == "healthy"
 
 
+class TestMetrics:
+    """Test the Prometheus metrics endpoint."""
+
+    def test_metrics(self, client: TestClient) -> None:
+        """Test that the thread budget and lane metrics are exposed."""
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert 'vitronmax_thread_pool_size{pool="interactive"}' in response.text
+        assert 'vitronmax_admission_pending{workload="batch"}' in response.text
+        assert "vitronmax_cpu_quota " in response.text
+        assert 'vitronmax_prediction_writes_total{outcome="written"}' in response.text
+
+
 class TestPredictionAPI:
     """Test prediction endpoint."""
 
@@ -63,6 +91,180 @@ class TestPredictionAPI:
         )  # Should be a string for CCO
         assert data["processing_time_ms"] > 0
 
+    def test_predict_queues_db_write(self, client: TestClient) -> None:
+        """Test that /predict hands its record to the write-behind queue."""
+
+        def unavailable(rows: Any) -> None:
+            raise RuntimeError("database unavailable")
+
+        # Not started: records stay queued, the response never waits on the DB
+        writer = WriteBehindQueue(unavailable, max_size=1)
+        original = app.state.prediction_writer
+        app.state.prediction_writer = writer
+        try:
+            responses = [
+                client.post(
+                    "/api/v1/predict", json={"smiles": "CCO", "molecule_name": "x"}
+                )
+                for _ in range(2)
+            ]
+            assert [r.status_code for r in responses] == [200, 200]
+            stats = client.get("/api/v1/model/stats").json()["prediction_writes"]
+            assert stats["queued"] == 1
+            assert stats["dropped"] == 1
+            record = writer._pending[0]
+            assert record["smiles"] == "CCO"
+            assert record["molecule_name"] == "x"
+            data = responses[0].json()
+            assert record["id"] == data["prediction_id"]
+            assert record["bbb_probability"] == data["bbb_probability"]
+            assert record["prediction_certainty"] == data["prediction_certainty"]
+            # Every column the record sends is declared by the migration
+            migration = (MIGRATIONS_DIR / "02_single_prediction_items.sql").read_text()
+            for column in record:
+                assert f"\n    {column} " in migration
+        finally:
+            app.state.prediction_writer = original
+
+    def test_prediction_id_reused_by_report_and_explain(
+        self, client: TestClient, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that report and explain reuse a stored /predict result by its id."""
+        from app.api.routes import explain
+
+        response = client.post(
+            "/api/v1/predict", json={"smiles": "CCN", "molecule_name": "ethylamine"}
+        )
+        data = response.json()
+        prediction_id = data["prediction_id"]
+        assert prediction_id
+
+        # Nothing is predicted again
+        async def no_prediction(*args: Any, **kwargs: Any) -> Dict[str, Any]:
+            raise AssertionError("predicted again")
+
+        explained: Dict[str, Any] = {}
+
+        async def fake_stream(
+            smiles: str, prediction_result: Dict[str, Any], context: Any = None
+        ) -> Any:
+            explained.update(smiles=smiles, **prediction_result)
+            yield 'data: {"done": true}\n\n'
+
+        monkeypatch.setattr(app.state.predictor, "predict_smiles_data", no_prediction)
+        monkeypatch.setattr(explain, "generate_explanation_stream", fake_stream)
+
+        response = client.get(f"/api/v1/report/{prediction_id}")
+        assert response.status_code == 200
+        assert response.content.startswith(b"%PDF")
+
+        response = client.post("/api/v1/explain", json={"prediction_id": prediction_id})
+        assert response.status_code == 200
+        assert explained["smiles"] == "CCN"
+        assert explained["bbb_probability"] == data["bbb_probability"]
+        assert explained["prediction_class"] == data["bbb_class"]
+        assert explained["confidence_score"] == data["prediction_certainty"]
+
+        # Unknown ids
+        response = client.post("/api/v1/explain", json={"prediction_id": "unknown"})
+        assert response.status_code == 404
+        assert client.post("/api/v1/explain", json={}).status_code == 422
+
+    def test_prediction_id_read_back_from_database(
+        self, client: TestClient, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that report and explain read an evicted result from the database."""
+        from app.api.routes import explain
+        from app.core import write_behind
+
+        explained: Dict[str, Any] = {}
+
+        async def fake_stream(
+            smiles: str, prediction_result: Dict[str, Any], context: Any = None
+        ) -> Any:
+            explained.update(smiles=smiles, **prediction_result)
+            yield 'data: {"done": true}\n\n'
+
+        monkeypatch.setattr(explain, "generate_explanation_stream", fake_stream)
+
+        prediction_id = str(uuid.uuid4())
+        row = {
+            "id": prediction_id,
+            "smiles": "CCN",
+            "molecule_name": "ethylamine",
+            "bbb_probability": 0.8,
+            "prediction_class": "permeable",
+            "prediction_certainty": 0.6,
+        }
+        db = MagicMock()
+        select = db.table.return_value.select
+        query = select.return_value.eq.return_value
+        query.execute.return_value = MagicMock(data=[row])
+        monkeypatch.setattr(write_behind, "get_db", lambda: db)
+
+        response = client.get(f"/api/v1/report/{prediction_id}")
+        assert response.status_code == 200
+        assert response.content.startswith(b"%PDF")
+        db.table.assert_called_with("single_prediction_item")
+        select.return_value.eq.assert_called_with("id", prediction_id)
+
+        response = client.post("/api/v1/explain", json={"prediction_id": prediction_id})
+        assert response.status_code == 200
+        assert explained["smiles"] == "CCN"
+        assert explained["bbb_probability"] == 0.8
+        assert explained["prediction_class"] == "permeable"
+        assert explained["confidence_score"] == 0.6
+
+        # Rows missing what the result needs, and ids not in the database
+        for data in ([{**row, "smiles": None}], [{"id": prediction_id}], []):
+            query.execute.return_value = MagicMock(data=data)
+            response = client.get(f"/api/v1/report/{prediction_id}")
+            assert response.status_code == 404
+            assert response.json()["detail"] == "Prediction not found"
+            response = client.post(
+                "/api/v1/explain", json={"prediction_id": prediction_id}
+            )
+            assert response.status_code == 404
+
+        # Ids that are not UUIDs are not looked up
+        select.reset_mock()
+        assert client.get("/api/v1/report/unknown").status_code == 404
+        assert not select.called
+
+    def test_predict_fingerprint_encodings(self, client: TestClient) -> None:
+        """Fingerprints are left out unless an encoding is requested."""
+        data = client.post("/api/v1/predict", json={"smiles": "c1ccccc1O"}).json()
+        assert data["fingerprint"] is None
+
+        encoded = {}
+        for encoding in ("base64", "hex", "indices"):
+            data = client.post(
+                "/api/v1/predict",
+                json={"smiles": "c1ccccc1O", "fingerprint_encoding": encoding},
+            ).json()
+            assert data["fingerprint_encoding"] == encoding
+            encoded[encoding] = decode_fingerprint(data["fingerprint"], encoding)
+        assert encoded["base64"] == encoded["hex"] == encoded["indices"]
+        assert len(encoded["indices"]) > 0
+
+        response = client.post(
+            "/api/v1/predict/batch",
+            json={
+                "molecules": [{"smiles": "c1ccccc1O"}],
+                "fingerprint_encoding": "indices",
+            },
+        )
+        assert response.json()["results"][0]["fingerprint"] == encoded["indices"]
+        response = client.post(
+            "/api/v1/predict",
+            json={"smiles": "CCO", "fingerprint_encoding": "dense"},
+        )
+        assert response.status_code == 422
+        response = client.post(
+            "/api/v1/predict/stream?fingerprint_encoding=dense", content="CCO"
+        )
+        assert response.status_code == 400
+
     def test_invalid_smiles(self, client: TestClient) -> None:
         """Test behavior with invalid SMILES."""
         response = client.post("/api/v1/predict", json={"smiles": "INVALID_SMILES_123"})
@@ -70,6 +272,12 @@ class TestPredictionAPI:
         json_response = response.json()
         assert "detail" in json_response
 
+    def test_report_unparseable_smiles(self, client: TestClient) -> None:
+        """A SMILES that passes validation but RDKit cannot parse is a 400."""
+        response = client.post("/api/v1/report", json={"smiles": "C1CC"})
+        assert response.status_code == 400
+        assert response.json()["detail"].startswith("Prediction failed")
+
     def test_empty_smiles(self, client: TestClient) -> None:
         """Test behavior with empty SMILES."""
         response = client.post("/api/v1/predict", json={"smiles": ""})
@@ -77,6 +285,348 @@ class TestPredictionAPI:
         json_response = response.json()
         assert "detail" in json_response
 
+    def test_predict_batch_inline(self, client: TestClient) -> None:
+        """Test the synchronous JSON batch endpoint."""
+        molecules = [
+            {"smiles": "CCO", "molecule_name": "Ethanol"},
+            {"smiles": "INVALID"},
+            {"smiles": "c1ccccc1O"},
+        ]
+        response = client.post("/api/v1/predict/batch", json={"molecules": molecules})
+        assert response.status_code == 200
+        data = response.json()
+
+        assert data["total"] == 3
+        assert data["successful"] == 2
+        assert data["failed"] == 1
+        assert [r["smiles"] for r in data["results"]] == ["CCO", "INVALID", "c1ccccc1O"]
+        assert data["results"][0]["molecule_name"] == "Ethanol"
+        assert data["results"][0]["bbb_class"] in ["permeable", "non_permeable"]
+        assert data["results"][1]["status"] == "error_invalid_smiles"
+
+        single = client.post("/api/v1/predict", json={"smiles": "CCO"}).json()
+        assert data["results"][0]["bbb_probability"] == pytest.approx(
+            single["bbb_probability"]
+        )
+
+        # Large JSON responses are compressed when the client accepts it
+        compressed = client.post(
+            "/api/v1/predict/batch",
+            json={"molecules": molecules},
+            headers={"Accept-Encoding": "gzip"},
+        )
+        assert compressed.headers["content-encoding"] == "gzip"
+        assert int(compressed.headers["content-length"]) < len(response.content)
+        assert compressed.json()["total"] == 3
+
+    def test_predict_batch_inline_limits(
+        self, client: TestClient, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test the batch size limit and unknown model names."""
+        monkeypatch.setattr(settings, "SYNC_BATCH_MAX_SIZE", 2)
+        molecules = [{"smiles": "CCO"}] * 3
+        response = client.post("/api/v1/predict/batch", json={"molecules": molecules})
+        assert response.status_code == 400
+
+        response = client.post("/api/v1/predict/batch", json={"molecules": []})
+        assert response.status_code == 400
+
+        response = client.post(
+            "/api/v1/predict/batch",
+            json={"molecules": [{"smiles": "CCO"}], "models": ["does_not_exist"]},
+        )
+        assert response.status_code == 400
+
+    def test_predict_websocket(self, client: TestClient) -> None:
+        """Test interactive predictions over the WebSocket."""
+        cache = app.state.predictor.prediction_cache
+        with client.websocket_connect("/api/v1/predict/ws") as websocket:
+            websocket.send_text("CCO")
+            first = websocket.receive_json()
+            assert first["status"] == "success"
+            assert first["smiles"] == "CCO"
+
+            hits = cache.stats()["hits"]
+            websocket.send_text(json.dumps({"id": 1, "smiles": "OCC"}))
+            again = websocket.receive_json()
+            assert again["id"] == 1
+            assert again["smiles"] == "OCC"
+            assert again["bbb_probability"] == pytest.approx(first["bbb_probability"])
+            assert cache.stats()["hits"] == hits + 1
+
+            websocket.send_text("INVALID")
+            assert websocket.receive_json()["status"] == "error_invalid_smiles"
+
+            # A newer message supersedes the one still in flight
+            websocket.send_text(json.dumps({"id": "old", "smiles": "c1ccc2ccccc2c1"}))
+            websocket.send_text(json.dumps({"id": "new", "smiles": "CCN"}))
+            reply = websocket.receive_json()
+            assert reply["id"] == "new"
+            assert reply["status"] == "success"
+
+    def test_predict_websocket_errors(
+        self, client: TestClient, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that failed WebSocket predictions are answered, not dropped."""
+
+        async def failing_prediction(*args: Any, **kwargs: Any) -> Dict[str, Any]:
+            raise ValueError("featurization failed")
+
+        with client.websocket_connect("/api/v1/predict/ws") as websocket:
+            websocket.send_text(json.dumps({"smiles": "CCO", "models": ["nope"]}))
+            assert websocket.receive_json()["status"] == "error_unknown_model"
+
+            monkeypatch.setattr(
+                app.state.predictor, "predict_smiles_data", failing_prediction
+            )
+            websocket.send_text(json.dumps({"id": 2, "smiles": "CCO"}))
+            reply = websocket.receive_json()
+            assert reply == {
+                "id": 2,
+                "status": "error",
+                "error": "Prediction failed due to an internal server error.",
+            }
+
+    def test_predict_stream(self, client: TestClient) -> None:
+        """Test the NDJSON streaming endpoint."""
+        body = "\n".join(
+            [
+                "CCO",
+                '{"smiles": "c1ccccc1O", "molecule_name": "Phenol", "id": 7}',
+                "",
+                "INVALID",
+                '{"name": "no smiles"}',
+            ]
+        )
+        response = client.post(
+            "/api/v1/predict/stream",
+            content=body,
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        records = [json.loads(line) for line in response.text.splitlines()]
+
+        assert [r["line"] for r in records] == [1, 2, 4, 5]
+        assert records[0]["status"] == "success"
+        assert records[1]["id"] == 7
+        assert records[1]["molecule_name"] == "Phenol"
+        assert records[2]["status"] == "error_invalid_smiles"
+        assert records[3]["status"] == "error_invalid_record"
+
+        response = client.post(
+            "/api/v1/predict/stream?models=does_not_exist", content="CCO"
+        )
+        assert response.status_code == 400
+        # The stream gave its batch capacity back
+        assert app.state.admission.stats()["workloads"]["batch"]["pending"] == 0
+
+    def test_load_shedding(self, client: TestClient) -> None:
+        """Test that work beyond the admission limits is rejected quickly."""
+        admission = AdmissionController(limits={INTERACTIVE: 1, BATCH: 1})
+        admission.acquire(INTERACTIVE)
+        admission.acquire(BATCH)
+        original = app.state.admission
+        app.state.admission = admission
+        try:
+            response = client.post("/api/v1/predict", json={"smiles": "CCO"})
+            assert response.status_code == 503
+            assert int(response.headers["Retry-After"]) >= 1
+
+            response = client.post(
+                "/api/v1/predict/batch", json={"molecules": [{"smiles": "CCO"}]}
+            )
+            assert response.status_code == 503
+
+            with client.websocket_connect("/api/v1/predict/ws") as websocket:
+                websocket.send_text("CCO")
+                reply = websocket.receive_json()
+                assert reply["status"] == "error_overloaded"
+                assert reply["retry_after"] >= 1
+
+            admission.release(INTERACTIVE)
+            response = client.post("/api/v1/predict", json={"smiles": "CCO"})
+            assert response.status_code == 200
+            workloads = admission.stats()["workloads"]
+            assert workloads[INTERACTIVE]["pending"] == 0
+            assert workloads[INTERACTIVE]["rejected"] == 2
+        finally:
+            app.state.admission = original
+
+    def test_rate_limiting(self, client: TestClient) -> None:
+        """Test that each client key is limited by the cost of its calls."""
+        limiter = RateLimiter(
+            tokens_per_s=0.001,
+            burst=3.0,
+            costs={PREDICTION: 1.0, EXPLAIN: 3.0, BATCH_MOLECULE: 1.0},
+            api_keys=["batch-client", "report-client"],
+        )
+        original = app.state.rate_limiter
+        app.state.rate_limiter = limiter
+        try:
+            for _ in range(3):
+                response = client.post("/api/v1/predict", json={"smiles": "CCO"})
+                assert response.status_code == 200
+            response = client.post("/api/v1/predict", json={"smiles": "CCO"})
+            assert response.status_code == 429
+            assert int(response.headers["Retry-After"]) >= 1
+
+            with client.websocket_connect("/api/v1/predict/ws") as websocket:
+                websocket.send_text("CCO")
+                reply = websocket.receive_json()
+                assert reply["status"] == "error_rate_limited"
+
+            # An unknown key does not get a fresh bucket
+            response = client.post(
+                "/api/v1/predict",
+                json={"smiles": "CCO"},
+                headers={"X-API-Key": "made-up"},
+            )
+            assert response.status_code == 429
+
+            # Known keys have their own buckets; free endpoints are not charged
+            keyed = {"X-API-Key": "batch-client"}
+            response = client.post(
+                "/api/v1/predict/batch",
+                json={"molecules": [{"smiles": "CCO"}, {"smiles": "CCN"}]},
+                headers=keyed,
+            )
+            assert response.status_code == 200
+            response = client.post(
+                "/api/v1/predict/batch",
+                json={"molecules": [{"smiles": "CCO"}, {"smiles": "CCN"}]},
+                headers=keyed,
+            )
+            assert response.status_code == 429
+            assert client.get("/api/v1/model/info").status_code == 200
+
+            # Reports by prediction id cost a prediction each (unknown ids that
+            # are not UUIDs are charged, then 404 without a database lookup)
+            keyed = {"X-API-Key": "report-client"}
+            for _ in range(3):
+                response = client.get("/api/v1/report/unknown", headers=keyed)
+                assert response.status_code == 404
+            response = client.get("/api/v1/report/unknown", headers=keyed)
+            assert response.status_code == 429
+
+            stats = limiter.stats()
+            assert stats["limited"][PREDICTION] == 4
+            assert stats["limited"][BATCH_MOLECULE] == 1
+        finally:
+            app.state.rate_limiter = original
+
+    def test_request_deadline(
+        self, client: TestClient, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that requests past their deadline get 504 and their work is dropped."""
+        response = client.post(
+            "/api/v1/predict",
+            json={"smiles": "CCO"},
+            headers={"X-Request-Timeout-Ms": "0"},
+        )
+        assert response.status_code == 400
+
+        cancelled = []
+
+        async def slow_pipeline(smiles: str, models: Any) -> Dict[str, Any]:
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(smiles)
+                raise
+            return {}
+
+        predictor = app.state.predictor
+        monkeypatch.setattr(predictor, "_run_prediction_pipeline", slow_pipeline)
+        response = client.post(
+            "/api/v1/predict",
+            json={"smiles": "CCCCCCCCCO"},
+            headers={"X-Request-Timeout-Ms": "50"},
+        )
+        assert response.status_code == 504
+        assert cancelled == ["CCCCCCCCCO"]
+
+        response = client.post(
+            "/api/v1/report",
+            json={"smiles": "CCCCCCCCCN"},
+            headers={"X-Request-Timeout-Ms": "50"},
+        )
+        assert response.status_code == 504
+
+        expired = client.get("/api/v1/model/stats").json()["deadlines"]
+        assert expired["expired_requests"]["prediction"] >= 1
+        assert expired["expired_requests"]["report"] >= 1
+
+    def test_predict_contributions(self, client: TestClient) -> None:
+        """Test local tree-path attribution of fingerprint bits."""
+        response = client.post(
+            "/api/v1/predict/contributions", json={"smiles": "CCO", "top_n": 5}
+        )
+        assert response.status_code == 200
+        data = response.json()
+
+        assert data["status"] == "success"
+        assert 0 <= data["bias"] <= 1
+        assert 0 < len(data["top_bits"]) <= 5
+        magnitudes = [abs(entry["contribution"]) for entry in data["top_bits"]]
+        assert magnitudes == sorted(magnitudes, reverse=True)
+        for entry in data["top_bits"]:
+            assert 0 <= entry["bit"] < 2048
+            assert isinstance(entry["present"], bool)
+
+    def test_predict_contributions_invalid_smiles(self, client: TestClient) -> None:
+        """Test attribution request with invalid SMILES."""
+        response = client.post(
+            "/api/v1/predict/contributions", json={"smiles": "INVALID_SMILES_123"}
+        )
+        assert response.status_code == 400
+
+    def test_predict_atom_highlights(self, client: TestClient) -> None:
+        """Test atom-level highlight maps and their cache."""
+        payload = {"smiles": "CC(=O)Oc1ccccc1C(=O)O", "top_n": 5, "include_svg": True}
+        response = client.post("/api/v1/predict/atom-highlights", json=payload)
+        assert response.status_code == 200
+        data = response.json()
+
+        assert data["status"] == "success"
+        assert len(data["atom_weights"]) == 13
+        assert 0 < len(data["bits"]) <= 5
+        for bit in data["bits"]:
+            assert bit["environments"]
+            assert all(0 <= atom < 13 for atom in bit["atoms"])
+        # Mapped atom weights, unmapped bits and the bias add up to the probability
+        total = data["bias"] + sum(data["atom_weights"]) + data["unmapped_contribution"]
+        assert total == pytest.approx(data["bbb_probability"])
+        assert data["svg"].lstrip().startswith("<?xml")
+
+        # Same molecule written differently hits the cache
+        payload["smiles"] = "OC(=O)c1ccccc1OC(C)=O"
+        cached = client.post("/api/v1/predict/atom-highlights", json=payload).json()
+        assert cached["cached"] is True
+        assert cached["smiles"] == payload["smiles"]
+        assert cached["atom_weights"] == data["atom_weights"]
+
+    def test_predict_atom_highlights_invalid_smiles(self, client: TestClient) -> None:
+        """Test atom highlight request with invalid SMILES."""
+        response = client.post(
+            "/api/v1/predict/atom-highlights", json={"smiles": "INVALID_SMILES_123"}
+        )
+        assert response.status_code == 400
+
+    def test_smiles_to_pdb(self, client: TestClient) -> None:
+        """Test that the 3D embedding runs on the interactive lane."""
+        lanes = app.state.predictor.lanes
+        tasks = lanes.interactive_tasks
+        response = client.post("/api/v1/utils/smiles-to-pdb", json={"smiles": "CCO"})
+        assert response.status_code == 200
+        assert "HETATM" in response.json()["pdb_string"]
+        assert lanes.interactive_tasks == tasks + 1
+
+        response = client.post(
+            "/api/v1/utils/smiles-to-pdb", json={"smiles": "INVALID"}
+        )
+        assert response.status_code == 400
+
     def test_model_info(self, client: TestClient) -> None:
         """Test model info endpoint."""
         response = client.get("/api/v1/model/info")
@@ -89,6 +639,50 @@ class TestPredictionAPI:
         assert "fingerprint_bits" in data
         assert "top_features" in data
         assert "is_loaded" in data
+        assert data["models"][0]["name"] == "default"
+
+        # Cacheable until the served models change; revalidated with a 304
+        etag = response.headers["etag"]
+        assert "max-age=" in response.headers["cache-control"]
+        assert "last-modified" in response.headers
+        response = client.get("/api/v1/model/info", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+        assert response.content == b""
+        response = client.get(
+            "/api/v1/model/info", headers={"If-None-Match": '"stale"'}
+        )
+        assert response.status_code == 200
+
+        stats = client.get("/api/v1/model/stats")
+        assert stats.headers["cache-control"] == "no-cache"
+        assert "admission" in stats.json()
+
+    def test_drift_report(self, client: TestClient) -> None:
+        """Test the drift monitor endpoint."""
+        client.post("/api/v1/predict", json={"smiles": "CCO"})
+        response = client.get("/api/v1/model/drift")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["enabled"] is True
+        assert data["reference_loaded"] is True
+        assert data["features"]["bbb_probability"]["since_start"]["n"] >= 1
+
+    def test_predict_with_model_selection(self, client: TestClient) -> None:
+        """Test requesting served models by name."""
+        response = client.post(
+            "/api/v1/predict", json={"smiles": "CCO", "models": ["default"]}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["model_predictions"]["default"]["bbb_probability"] == (
+            pytest.approx(data["bbb_probability"])
+        )
+
+        response = client.post(
+            "/api/v1/predict", json={"smiles": "CCO", "models": ["does_not_exist"]}
+        )
+        assert response.status_code == 400
 
 
 class TestExplainAPI:
@@ -104,3 +698,142 @@ class TestExplainAPI:
         assert "explanation" in data
         assert "confidence" in data
         assert "prediction" in data
+
+        # The sample never changes: revalidation gets a 304
+        response = client.get(
+            "/api/v1/explain/sample",
+            headers={"If-None-Match": response.headers["etag"]},
+        )
+        assert response.status_code == 304
+
+
+class TestBatchAPI:
+    """Test batch job endpoints."""
+
+    def test_completed_job_http_caching(self, client: TestClient) -> None:
+        """Completed jobs are revalidated with a 304 and no database query."""
+        job = {
+            "job_id": "job-1",
+            "status": "completed",
+            "created_at": "2024-01-01T00:00:00",
+            "updated_at": "2024-01-01T01:00:00",
+            "completed_at": "2024-01-01T01:00:00",
+            "estimated_completion_time": None,
+            "error_message": None,
+            "total_molecules": 2,
+            "processed_molecules": 2,
+            "failed_molecules": 0,
+            "progress_percentage": 100.0,
+            "results_file_path": "batch_results_job-1.csv",
+        }
+        db = MagicMock()
+        query = db.table.return_value.select.return_value.eq.return_value
+        query.maybe_single.return_value.execute.return_value = MagicMock(data=job)
+        db.storage.from_.return_value.download.return_value = b"smiles\nCCO\n"
+        app.dependency_overrides[get_db] = lambda: db
+        try:
+            for path in (
+                "/api/v1/batch_jobs/batch_status/job-1",
+                "/api/v1/batch_jobs/download_batch_results/job-1",
+            ):
+                response = client.get(path)
+                assert response.status_code == 200
+                assert "immutable" in response.headers["cache-control"]
+                assert response.headers["last-modified"] == (
+                    "Mon, 01 Jan 2024 01:00:00 GMT"
+                )
+                etag = response.headers["etag"]
+
+                db.reset_mock()
+                response = client.get(path, headers={"If-None-Match": etag})
+                assert response.status_code == 304
+                assert not db.table.called and not db.storage.from_.called
+
+                response = client.get(
+                    path,
+                    headers={"If-Modified-Since": "Mon, 01 Jan 2024 01:00:00 GMT"},
+                )
+                assert response.status_code == 304
+                assert db.table.called
+            assert not db.storage.from_.called
+
+            # Running jobs are always revalidated
+            job["status"] = "processing"
+            response = client.get("/api/v1/batch_jobs/batch_status/job-1")
+            assert response.status_code == 200
+            assert response.headers["cache-control"] == "no-cache"
+            assert "etag" not in response.headers
+
+            # "*" is only answered with a 304 for a job found completed
+            response = client.get(
+                "/api/v1/batch_jobs/batch_status/job-1",
+                headers={"If-None-Match": "*"},
+            )
+            assert response.status_code == 200
+            response = client.get(
+                "/api/v1/batch_jobs/download_batch_results/job-1",
+                headers={"If-None-Match": "*"},
+            )
+            assert response.status_code == 400
+            query.maybe_single.return_value.execute.return_value = MagicMock(data=None)
+            for path in (
+                "/api/v1/batch_jobs/batch_status/job-1",
+                "/api/v1/batch_jobs/download_batch_results/job-1",
+            ):
+                response = client.get(path, headers={"If-None-Match": "*"})
+                assert response.status_code == 404
+        finally:
+            app.dependency_overrides.pop(get_db, None)
+
+    def test_batch_predict_csv_limits(
+        self, client: TestClient, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """CSV uploads are parsed as streamed and held to the size and row limits."""
+        from app.api.routes import batch
+
+        queued: Dict[str, Any] = {}
+
+        async def fake_job(
+            job_id: str,
+            job_name: str,
+            filename: str,
+            smiles_data: Any,
+            *args: Any,
+        ) -> None:
+            queued["smiles_data"] = smiles_data
+            app.state.admission.release(BATCH, len(smiles_data), completed=0)
+
+        db = MagicMock()
+        db.table.return_value.insert.return_value.execute.return_value = MagicMock(
+            data=[{"job_id": "job-1"}]
+        )
+        db.table.return_value.select.return_value.eq.return_value.limit.return_value.execute.return_value = MagicMock(
+            data=[{"job_id": "job-1"}]
+        )
+        monkeypatch.setattr(batch, "process_batch_job", fake_job)
+        monkeypatch.setattr(settings, "MAX_BATCH_SIZE", 3)
+        app.dependency_overrides[get_db] = lambda: db
+        url = "/api/v1/batch_jobs/batch_predict_csv"
+        try:
+            csv_text = "SMILES,molecule_name\nCCO,ethanol\nc1ccccc1O,phenol\n"
+            response = client.post(url, files={"file": ("m.csv", csv_text)})
+            assert response.status_code == 200
+            assert response.json()["total_molecules"] == 2
+            assert queued["smiles_data"] == [
+                {"smiles": "CCO", "molecule_name": "ethanol"},
+                {"smiles": "c1ccccc1O", "molecule_name": "phenol"},
+            ]
+
+            db.reset_mock()
+            response = client.post(
+                url, files={"file": ("m.csv", "smiles\n" + "CCO\n" * 4)}
+            )
+            assert response.status_code == 413
+            response = client.post(url, files={"file": ("m.csv", "name\nCCO\n")})
+            assert response.status_code == 400
+            # Rejected before any job is created or capacity held
+            assert not db.table.called
+            pending = app.state.admission.stats()["workloads"][BATCH]["pending"]
+            assert pending == 0
+        finally:
+            app.dependency_overrides.pop(get_db, None)
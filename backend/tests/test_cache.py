@@ -0,0 +1,38 @@
+"""
+Tests for the in-process LRU cache.
+"""
+
+import time
+
+from app.core.cache import LRUCache
+
+
+def test_lru_evicts_least_recently_used() -> None:
+    cache: LRUCache[int] = LRUCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now the least recently used
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+    assert cache.stats()["hits"] == 3
+    assert cache.stats()["misses"] == 1
+
+
+def test_entries_expire_after_ttl() -> None:
+    cache: LRUCache[str] = LRUCache(max_size=10, ttl_seconds=0.05)
+    cache.set("key", "value")
+    assert cache.get("key") == "value"
+    time.sleep(0.1)
+    assert cache.get("key") is None
+    assert len(cache) == 0
+
+
+def test_zero_size_disables_cache() -> None:
+    cache: LRUCache[int] = LRUCache(max_size=0)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+    assert len(cache) == 0
@@ -0,0 +1,134 @@
+"""
+Tests for negotiated response compression and the orjson responses.
+"""
+
+import gzip
+import zlib
+from datetime import datetime, timezone
+from typing import Any, List
+
+import brotli
+import numpy as np
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response
+from fastapi.testclient import TestClient
+from starlette.types import Message, Receive, Scope, Send
+
+from app.core.compression import CompressionMiddleware, negotiate_encoding
+from app.core.responses import ORJSONResponse, dumps
+
+BODY = "smiles,bbb_probability\n" + "CCO,0.42\n" * 500
+
+
+def make_client() -> TestClient:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+    @app.get("/csv")
+    async def csv() -> Response:
+        return Response(BODY, media_type="text/csv", headers={"ETag": '"v1"'})
+
+    @app.get("/small")
+    async def small() -> PlainTextResponse:
+        return PlainTextResponse("ok")
+
+    @app.get("/pdf")
+    async def pdf() -> Response:
+        return Response(b"%PDF" * 1000, media_type="application/pdf")
+
+    return TestClient(app)
+
+
+def test_negotiate_encoding() -> None:
+    assert negotiate_encoding("gzip, deflate, br") == "br"
+    assert negotiate_encoding("gzip;q=0.8, br;q=0") == "gzip"
+    assert negotiate_encoding("*") == "br"
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("") is None
+
+
+def test_compresses_negotiated_encoding_above_threshold() -> None:
+    client = make_client()
+
+    response = client.get("/csv", headers={"Accept-Encoding": "br"})
+    assert response.headers["content-encoding"] == "br"
+    assert "Accept-Encoding" in response.headers["vary"]
+    # httpx decodes the body; the wire size is in Content-Length
+    assert response.text == BODY
+    assert int(response.headers["content-length"]) < len(BODY) // 10
+
+    response = client.get("/csv", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.text == BODY
+    assert response.headers["etag"] == 'W/"v1"'
+
+    # Below the threshold, uncompressible types and without Accept-Encoding
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    response = client.get("/pdf", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    response = client.get("/csv", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.text == BODY
+    assert response.headers["etag"] == '"v1"'
+
+
+async def test_streamed_chunks_are_flushed() -> None:
+    chunks = [b'{"line": 0}\n', b'{"line": 1}\n', b'{"line": 2}\n']
+
+    async def app(scope: Scope, receive: Receive, send: Send) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"application/x-ndjson")],
+            }
+        )
+        for i, chunk in enumerate(chunks):
+            more_body = i < len(chunks) - 1
+            await send(
+                {"type": "http.response.body", "body": chunk, "more_body": more_body}
+            )
+
+    for encoding in ("gzip", "br"):
+        sent: List[Message] = []
+
+        async def send(message: Message, sent: List[Message] = sent) -> None:
+            sent.append(message)
+
+        async def receive() -> Message:
+            return {"type": "http.request", "body": b""}
+
+        scope = {
+            "type": "http",
+            "headers": [(b"accept-encoding", encoding.encode())],
+        }
+        await CompressionMiddleware(app, minimum_size=1024)(scope, receive, send)
+        headers = dict(sent[0]["headers"])
+        assert headers[b"content-encoding"] == encoding.encode()
+        assert b"content-length" not in headers
+
+        # Every chunk decodes as soon as it is sent, below the size threshold
+        decoder: Any = (
+            zlib.decompressobj(16 + zlib.MAX_WBITS)
+            if encoding == "gzip"
+            else brotli.Decompressor()
+        )
+        decode = decoder.decompress if encoding == "gzip" else decoder.process
+        bodies = [message["body"] for message in sent[1:]]
+        assert [decode(body) for body in bodies] == chunks
+        assert sent[-1]["more_body"] is False
+        if encoding == "gzip":
+            assert gzip.decompress(b"".join(bodies)) == b"".join(chunks)
+
+
+def test_orjson_response_serializes_numpy_and_datetimes() -> None:
+    content = {
+        "probability": np.float32(0.5),
+        "bits": np.array([1, 0, 1], dtype=np.uint8),
+        "created_at": datetime(2024, 1, 2, tzinfo=timezone.utc),
+    }
+    assert dumps(content) == (
+        b'{"probability":0.5,"bits":[1,0,1],"created_at":"2024-01-02T00:00:00Z"}'
+    )
+    assert ORJSONResponse({"a": 1}).body == b'{"a":1}'
@@ -0,0 +1,71 @@
+"""
+Tests for streaming ingestion of uploaded molecule CSVs.
+"""
+
+import io
+import tempfile
+from typing import Dict, List
+
+import pytest
+
+from app.core.csv_upload import (
+    UploadRejected,
+    iter_molecule_records,
+    read_molecule_records,
+)
+
+
+def _read(
+    content: bytes, max_bytes: int = 10000, max_rows: int = 100
+) -> List[Dict[str, str]]:
+    return read_molecule_records(io.BytesIO(content), max_bytes, max_rows)
+
+
+def test_records_are_normalized() -> None:
+    content = (
+        "﻿ SMILES ,Compound_Name\n"
+        'CCO,ethanol\n\n"CCN,""an amine""",ethylamine\n c1ccccc1O \n'
+    ).encode("utf-8")
+    assert _read(content) == [
+        {"smiles": "CCO", "molecule_name": "ethanol"},
+        {"smiles": "CCN", "molecule_name": "ethylamine"},
+        {"smiles": "c1ccccc1O", "molecule_name": ""},
+    ]
+    # molecule_name is preferred over compound_name
+    content = b"compound_name,smiles,molecule_name\nx,CCO,ethanol\n"
+    assert _read(content) == [{"smiles": "CCO", "molecule_name": "ethanol"}]
+
+
+@pytest.mark.parametrize(
+    "content, status_code",
+    [
+        (b"", 400),
+        (b"\n\n", 400),
+        (b"name,structure\nethanol,CCO\n", 400),
+        (b"smiles\nC\xe9O\n", 400),
+        (b"smiles\n" + b"CCO\n" * 1000, 413),
+    ],
+)
+def test_invalid_uploads_are_rejected(content: bytes, status_code: int) -> None:
+    with pytest.raises(UploadRejected) as exc_info:
+        _read(content, max_bytes=100000)
+    assert exc_info.value.status_code == status_code
+
+
+def test_limits_are_enforced_while_reading() -> None:
+    # Over the size limit: rejected before a row is parsed
+    with pytest.raises(UploadRejected) as exc_info:
+        _read(b"smiles\n" + b"CCO\n" * 100, max_bytes=100)
+    assert exc_info.value.status_code == 413
+
+    # Over the row limit: rejected after max_rows + 1 rows, not at the end
+    with tempfile.SpooledTemporaryFile(max_size=1024) as spooled:
+        spooled.write(b"smiles\n" + b"CCO\n" * 10000)
+        spooled.seek(0)
+        records = iter_molecule_records(spooled, 1 << 20, 10)
+        assert sum(1 for _ in zip(range(10), records)) == 10
+        with pytest.raises(UploadRejected):
+            next(records)
+        assert spooled.tell() < 10000
+        # The upload stays open for Starlette to close
+        assert not spooled.closed
@@ -0,0 +1,102 @@
+"""
+Tests for per-request deadlines and the abandonment of work for dead requests.
+"""
+
+import asyncio
+from typing import Any
+
+import pytest
+
+from app.core.deadline import Deadline, DeadlineExceeded, deadline_stats
+from app.ml.predictor import BBBPredictor
+from conftest import FakeClock
+
+
+def abandoned(stage: str) -> int:
+    count: int = deadline_stats()["abandoned_work"].get(stage, 0)
+    return count
+
+
+def test_deadline_expires_and_counts_abandoned_stage(clock: FakeClock) -> None:
+    deadline = Deadline(0.5, clock=clock)
+    deadline.check("parse")
+    assert deadline.remaining() == pytest.approx(0.5)
+
+    clock.now += 0.5
+    before = abandoned("parse")
+    with pytest.raises(DeadlineExceeded) as exc_info:
+        deadline.check("parse")
+    assert exc_info.value.stage == "parse"
+    assert abandoned("parse") == before + 1
+
+    # Without a timeout only cancellation ends it
+    token = Deadline()
+    assert token.remaining() is None
+    assert not token.expired
+    token.cancel()
+    assert token.expired
+
+
+async def test_run_abandons_awaited_work() -> None:
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def slow() -> str:
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return "done"
+
+    with pytest.raises(DeadlineExceeded):
+        await Deadline(0.05).run(slow(), "prediction")
+    await asyncio.wait_for(cancelled.wait(), 1)
+    assert deadline_stats()["expired_requests"]["prediction"] >= 1
+
+    # A disconnect cancels the deadline before it expires
+    deadline = Deadline(10)
+    started.clear()
+    cancelled.clear()
+    waiting = asyncio.ensure_future(deadline.run(slow(), "prediction"))
+    await started.wait()
+    deadline.cancel()
+    with pytest.raises(DeadlineExceeded):
+        await waiting
+    assert cancelled.is_set()
+
+    assert await Deadline(10).run(asyncio.sleep(0, "fast"), "prediction") == "fast"
+
+
+async def test_pipeline_skips_stages_of_expired_molecules(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    predictor = BBBPredictor()
+    try:
+        expired = Deadline()
+        expired.cancel()
+        before = abandoned("parse")
+        results = predictor._run_batch_pipeline_sync(
+            ["CCO", "c1ccccc1O"], deadlines=[expired, Deadline(10)]
+        )
+        assert results[0]["status"] == "error_deadline_exceeded"
+        assert results[1]["status"] == "success"
+        assert abandoned("parse") == before + 1
+
+        # A token cancelled mid-featurization stops before the next stage
+        token = Deadline()
+        alerts = predictor._structural_alerts
+
+        def cancel_during_alerts(mol: Any) -> Any:
+            token.cancel()
+            return alerts(mol)
+
+        monkeypatch.setattr(predictor, "_structural_alerts", cancel_during_alerts)
+        before = abandoned("fingerprint")
+        result = predictor._run_prediction_pipeline_sync("CCN", deadline=token)
+        assert result["status"] == "error_deadline_exceeded"
+        assert result["fingerprint_on_bits"] is None
+        assert abandoned("fingerprint") == before + 1
+    finally:
+        predictor.shutdown()
@@ -0,0 +1,117 @@
+"""
+Tests for the streaming drift monitor.
+"""
+
+import asyncio
+from typing import Any, Dict, List
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.ml.drift import DriftMonitor, StreamingHistogram, population_stability_index
+from app.ml.predictor import BBBPredictor
+
+FEATURES = {"score": (0.0, 1.0, 10), "mw": (0.0, 500.0, 25)}
+
+
+def _records(scores: np.ndarray, mw: float = 250.0) -> List[Dict[str, Any]]:
+    return [{"score": float(score), "mw": mw} for score in scores]
+
+
+def test_histogram_summary_matches_numpy() -> None:
+    rng = np.random.default_rng(0)
+    values = rng.uniform(0.0, 1.0, 5000)
+    histogram = StreamingHistogram(0.0, 1.0, 20)
+    histogram.update(values)
+    histogram.update(np.array([np.nan, 2.0]))  # NaN skipped, 2.0 clipped to 1.0
+
+    assert histogram.n == len(values) + 1
+    assert np.array_equal(
+        histogram.counts[:-1], np.histogram(values, histogram.edges)[0][:-1]
+    )
+    summary = histogram.summary()
+    assert summary["p50"] == pytest.approx(np.median(values), abs=0.02)
+    assert summary["p90"] == pytest.approx(np.quantile(values, 0.9), abs=0.02)
+    assert summary["mean"] == pytest.approx((values.sum() + 1.0) / histogram.n)
+
+
+def test_psi_separates_shifted_distribution() -> None:
+    rng = np.random.default_rng(1)
+    reference = StreamingHistogram(0.0, 1.0, 20)
+    same = StreamingHistogram(0.0, 1.0, 20)
+    shifted = StreamingHistogram(0.0, 1.0, 20)
+    reference.update(rng.beta(2, 5, 5000))
+    same.update(rng.beta(2, 5, 5000))
+    shifted.update(rng.beta(5, 2, 5000))
+
+    assert population_stability_index(reference.counts, same.counts) < 0.05
+    assert population_stability_index(reference.counts, shifted.counts) > 1.0
+    assert population_stability_index(reference.counts, np.zeros(20)) is None
+
+
+def test_window_rollover_raises_alerts() -> None:
+    rng = np.random.default_rng(2)
+    monitor = DriftMonitor(window_size=200, psi_threshold=0.2, features=FEATURES)
+    monitor.set_reference(
+        {"score": rng.beta(2, 5, 2000).tolist(), "mw": [250.0] * 2000}
+    )
+
+    monitor.observe(_records(rng.beta(2, 5, 200)))
+    report = monitor.report()
+    assert report["windows_completed"] == 1
+    assert report["alerts"] == []
+
+    # Shifted scores, with one record missing its score
+    records = _records(rng.beta(5, 2, 150))
+    records.append({"score": None, "mw": 250.0})
+    monitor.observe(records)
+    assert monitor.report()["current_window_observations"] == 151
+    monitor.observe(_records(rng.beta(5, 2, 49)))
+
+    report = monitor.report()
+    assert report["windows_completed"] == 2
+    assert report["current_window_observations"] == 0
+    assert report["alerts"] == ["score"]
+    assert report["features"]["score"]["alert"] is True
+    assert report["features"]["score"]["last_window"]["n"] == 199
+    assert report["features"]["mw"]["psi"] == pytest.approx(0.0, abs=1e-6)
+    assert report["features"]["score"]["since_start"]["n"] == 399
+
+
+async def test_predictor_feeds_drift_monitor(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "DRIFT_WINDOW_SIZE", 2)
+    predictor = BBBPredictor()
+    assert predictor.drift_monitor is not None
+
+    await predictor.predict_batch(["CCO", "c1ccccc1O", "INVALID"])
+    report = await predictor.drift_report()
+
+    assert report["enabled"] is True
+    assert report["reference_loaded"] is True
+    assert report["windows_completed"] == 1
+    assert report["features"]["bbb_probability"]["last_window"]["n"] == 2
+    assert report["features"]["mw"]["reference"]["n"] > 0
+    assert report["features"]["bbb_probability"]["psi"] is not None
+
+
+async def test_cached_and_coalesced_predictions_are_observed() -> None:
+    predictor = BBBPredictor()
+    assert predictor.drift_monitor is not None
+
+    # One pipeline run shared by two callers, then a cache hit
+    await asyncio.gather(
+        predictor.predict_smiles_data("CCO"), predictor.predict_smiles_data("OCC")
+    )
+    await predictor.predict_smiles_data("CCO")
+    report = predictor.drift_monitor.report()
+
+    assert predictor.prediction_flight.stats()["started"] == 1
+    assert report["features"]["bbb_probability"]["since_start"]["n"] == 3
+
+
+async def test_drift_monitor_can_be_disabled(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "DRIFT_MONITOR_ENABLED", False)
+    predictor = BBBPredictor()
+    assert predictor.drift_monitor is None
+    assert await predictor.drift_report() == {"enabled": False}
@@ -0,0 +1,51 @@
+"""
+Tests for the compact fingerprint encodings.
+"""
+
+import base64
+
+import numpy as np
+import pytest
+
+from app.ml.fingerprint_encoding import (
+    BASE64,
+    HEX,
+    INDICES,
+    NONE,
+    decode_fingerprint,
+    encode_fingerprint,
+    resolve_encoding,
+)
+
+
+def test_encodings_round_trip() -> None:
+    on_bits = [0, 7, 8, 100, 2047]
+    dense = np.zeros(2048, dtype=np.uint8)
+    dense[on_bits] = 1
+
+    encoded = encode_fingerprint(on_bits, BASE64, 2048)
+    assert isinstance(encoded, str) and len(encoded) == 344
+    assert base64.b64decode(encoded) == np.packbits(dense).tobytes()
+    hex_encoded = encode_fingerprint(on_bits, HEX, 2048)
+    assert isinstance(hex_encoded, str) and hex_encoded.startswith("8180")
+    assert len(hex_encoded) == 512
+    assert encode_fingerprint(on_bits, INDICES, 2048) == on_bits
+
+    for encoding in (BASE64, HEX, INDICES):
+        value = encode_fingerprint(on_bits, encoding, 2048)
+        assert value is not None
+        assert decode_fingerprint(value, encoding, 2048) == on_bits
+    assert decode_fingerprint("0;7;8;100;2047", INDICES) == on_bits
+
+    assert encode_fingerprint(on_bits, NONE, 2048) is None
+    assert encode_fingerprint(None, BASE64, 2048) is None
+
+
+def test_resolve_encoding(monkeypatch: pytest.MonkeyPatch) -> None:
+    assert resolve_encoding() == NONE
+    assert resolve_encoding("HEX") == HEX
+    monkeypatch.setattr("app.core.config.settings.FINGERPRINT_ENCODING", "indices")
+    assert resolve_encoding() == INDICES
+    assert resolve_encoding("base64") == BASE64
+    with pytest.raises(ValueError, match="Unknown fingerprint encoding"):
+        resolve_encoding("dense")
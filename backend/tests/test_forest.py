@@ -0,0 +1,118 @@
+"""
+Tests for per-tree forest evaluation, uncertainty and early-exit voting.
+"""
+
+from typing import Tuple
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from app.ml.forest import ForestEngine
+
+
+@pytest.fixture(scope="module")
+def fitted_forest(
+    fingerprint_data: Tuple[np.ndarray, np.ndarray],
+) -> RandomForestClassifier:
+    """Small forest on binary fingerprint-like data with a learnable signal."""
+    X, y = fingerprint_data
+    return RandomForestClassifier(n_estimators=60, random_state=0).fit(X, y)
+
+
+@pytest.fixture(scope="module")
+def samples() -> np.ndarray:
+    return np.random.RandomState(1).randint(0, 2, size=(200, 64))
+
+
+def test_tree_votes_average_to_predict_proba(
+    fitted_forest: RandomForestClassifier, samples: np.ndarray
+) -> None:
+    engine = ForestEngine(fitted_forest)
+    votes = engine.tree_votes(samples)
+    assert votes.shape == (len(samples), engine.n_trees)
+    np.testing.assert_allclose(
+        votes.mean(axis=1), fitted_forest.predict_proba(samples)[:, 1], atol=1e-12
+    )
+
+
+def test_predict_reports_tree_disagreement(
+    fitted_forest: RandomForestClassifier, samples: np.ndarray
+) -> None:
+    engine = ForestEngine(fitted_forest)
+    out = engine.predict(samples)
+    votes = engine.tree_votes(samples)
+
+    np.testing.assert_allclose(
+        out["probability"], fitted_forest.predict_proba(samples)[:, 1], atol=1e-12
+    )
+    np.testing.assert_allclose(out["std"], votes.std(axis=1), atol=1e-9)
+    assert np.all(out["ci_low"] <= out["probability"])
+    assert np.all(out["probability"] <= out["ci_high"])
+    assert np.all((out["ci_low"] >= 0.0) & (out["ci_high"] <= 1.0))
+    assert np.all(out["trees_evaluated"] == engine.n_trees)
+
+
+def test_early_exit_with_zero_tolerance_keeps_exact_class(
+    fitted_forest: RandomForestClassifier, samples: np.ndarray
+) -> None:
+    engine = ForestEngine(fitted_forest)
+    out = engine.predict(samples, early_exit=True, block_size=5, tolerance=0.0)
+    full = fitted_forest.predict_proba(samples)[:, 1]
+    trees_evaluated = out["trees_evaluated"]
+
+    np.testing.assert_array_equal(out["probability"] >= 0.5, full >= 0.5)
+    assert trees_evaluated.max() <= engine.n_trees
+    assert trees_evaluated.min() >= 5
+    # Rows evaluated on every tree report the full forest probability
+    complete = trees_evaluated == engine.n_trees
+    np.testing.assert_allclose(out["probability"][complete], full[complete], atol=1e-12)
+
+
+def test_early_exit_tolerance_reduces_trees_evaluated(
+    fitted_forest: RandomForestClassifier, samples: np.ndarray
+) -> None:
+    engine = ForestEngine(fitted_forest)
+    exact = engine.predict(samples, early_exit=True, block_size=5, tolerance=0.0)
+    loose = engine.predict(samples, early_exit=True, block_size=5, tolerance=0.05)
+    full = fitted_forest.predict_proba(samples)[:, 1]
+
+    assert (
+        loose["trees_evaluated"].mean()
+        < exact["trees_evaluated"].mean()
+        < engine.n_trees
+    )
+    agreement = np.mean((loose["probability"] >= 0.5) == (full >= 0.5))
+    assert agreement >= 0.9
+
+
+def test_contributions_add_up_to_probability(
+    fitted_forest: RandomForestClassifier, samples: np.ndarray
+) -> None:
+    engine = ForestEngine(fitted_forest)
+    contributions = engine.contributions(samples)
+    assert contributions.shape == (len(samples), samples.shape[1])
+
+    totals = engine.bias + np.asarray(contributions.sum(axis=1)).ravel()
+    np.testing.assert_allclose(
+        totals, fitted_forest.predict_proba(samples)[:, 1], atol=1e-9
+    )
+
+
+def test_top_contributions_rank_by_magnitude(
+    fitted_forest: RandomForestClassifier, samples: np.ndarray
+) -> None:
+    engine = ForestEngine(fitted_forest)
+    dense = engine.contributions(samples[:5]).toarray()
+    top = engine.top_contributions(samples[:5], top_n=3)
+
+    assert len(top) == 5
+    for row, row_top in zip(dense, top):
+        assert len(row_top) == 3
+        magnitudes = [abs(value) for _, value in row_top]
+        assert magnitudes == sorted(magnitudes, reverse=True)
+        assert magnitudes[0] == np.abs(row).max()
+        for bit, value in row_top:
+            assert row[bit] == value
+    # The planted signal bits dominate the attribution
+    assert {bit for row_top in top for bit, _ in row_top[:1]} <= {0, 1}
@@ -0,0 +1,63 @@
+"""
+Tests for HTTP validators and conditional request handling.
+"""
+
+from datetime import datetime, timezone
+from typing import Dict
+
+from starlette.requests import Request
+
+from app.core.http_cache import (
+    cache_control,
+    cache_headers,
+    etag_for,
+    etag_listed,
+    is_not_modified,
+)
+
+
+def make_request(headers: Dict[str, str]) -> Request:
+    raw = [(name.lower().encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "headers": raw})
+
+
+def test_conditional_requests() -> None:
+    etag = etag_for("model-info", "v1.0")
+    assert etag == etag_for("model-info", "v1.0") != etag_for("model-info", "v1.1")
+    modified = datetime(2024, 1, 1, 1, 0, 0, 500000)
+
+    assert is_not_modified(make_request({"If-None-Match": etag}), etag)
+    assert is_not_modified(make_request({"If-None-Match": f'"x", W/{etag}'}), etag)
+    assert is_not_modified(make_request({"If-None-Match": "*"}), etag)
+    assert not is_not_modified(make_request({"If-None-Match": '"x"'}), etag)
+    assert not is_not_modified(make_request({}), etag, modified)
+
+    # Only the ETag itself, not "*", is answered before a lookup
+    assert etag_listed(make_request({"If-None-Match": f'"x", W/{etag}'}), etag)
+    assert not etag_listed(make_request({"If-None-Match": "*"}), etag)
+    assert not etag_listed(make_request({}), etag)
+
+    since = "Mon, 01 Jan 2024 01:00:00 GMT"
+    assert is_not_modified(make_request({"If-Modified-Since": since}), etag, modified)
+    earlier = "Mon, 01 Jan 2024 00:59:59 GMT"
+    assert not is_not_modified(
+        make_request({"If-Modified-Since": earlier}), etag, modified
+    )
+    # If-None-Match takes precedence over If-Modified-Since
+    assert not is_not_modified(
+        make_request({"If-None-Match": '"x"', "If-Modified-Since": since}),
+        etag,
+        modified,
+    )
+    assert not is_not_modified(
+        make_request({"If-Modified-Since": "garbage"}), etag, modified
+    )
+
+    headers = cache_headers(
+        etag, cache_control(60, immutable=True), modified.replace(tzinfo=timezone.utc)
+    )
+    assert headers == {
+        "ETag": etag,
+        "Cache-Control": "public, max-age=60, immutable",
+        "Last-Modified": "Mon, 01 Jan 2024 01:00:00 GMT",
+    }
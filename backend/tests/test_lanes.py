@@ -0,0 +1,93 @@
+"""
+Tests for the interactive and batch execution lanes.
+"""
+
+import threading
+
+import pytest
+
+from app.core.admission import INTERACTIVE
+from app.core.lanes import ExecutionLanes
+from app.ml.predictor import BBBPredictor
+from conftest import FakeClock
+
+
+def thread_name() -> str:
+    return threading.current_thread().name
+
+
+async def test_lanes_use_separate_pools() -> None:
+    lanes = ExecutionLanes(interactive_workers=2, batch_workers=1)
+    try:
+        assert (await lanes.run_interactive(thread_name)).startswith("interactive")
+        assert (await lanes.run_batch(thread_name)).startswith("batch")
+        assert (await lanes.run(INTERACTIVE, thread_name)).startswith("interactive")
+        with pytest.raises(ValueError):
+            await lanes.run("unknown", thread_name)
+    finally:
+        lanes.shutdown()
+
+
+async def test_batch_is_throttled_while_interactive_p95_is_high(
+    clock: FakeClock,
+) -> None:
+    lanes = ExecutionLanes(
+        throttle_p95_ms=100.0, max_batch_delay_s=0.04, window_s=5.0, clock=clock
+    )
+
+    def slow_interactive() -> None:
+        clock.now += 0.5  # Every interactive task takes 500 ms
+
+    try:
+        await lanes.run_batch(int)
+        assert lanes.batch_delay_s == 0.0
+
+        for _ in range(5):
+            await lanes.run_interactive(slow_interactive)
+        assert lanes.interactive_p95_ms() == pytest.approx(500.0)
+        delays = []
+        for _ in range(4):
+            await lanes.run_batch(int)
+            delays.append(lanes.batch_delay_s)
+        assert delays == [0.01, 0.02, 0.04, 0.04]
+        assert lanes.stats()["throttled_batch_tasks"] == 4
+
+        # Once interactive latency has recovered, the delay decays to zero
+        clock.now += 10.0
+        delays = []
+        for _ in range(3):
+            await lanes.run_batch(int)
+            delays.append(lanes.batch_delay_s)
+        assert delays == [0.02, 0.01, 0.0]
+    finally:
+        lanes.shutdown()
+
+
+async def test_interactive_latencies_stay_within_window(clock: FakeClock) -> None:
+    lanes = ExecutionLanes(window_s=5.0, clock=clock)
+
+    def one_second() -> None:
+        clock.now += 1.0
+
+    try:
+        # Interactive-only traffic: samples older than the window are dropped
+        for _ in range(100):
+            await lanes.run_interactive(one_second)
+        assert len(lanes._latencies) <= 6
+        assert lanes.interactive_tasks == 100
+    finally:
+        lanes.shutdown()
+
+
+async def test_predictor_routes_work_to_lanes() -> None:
+    predictor = BBBPredictor()
+    try:
+        await predictor.predict_smiles_data("CCO")
+        await predictor.predict_batch(["CCO", "c1ccccc1O"])
+        await predictor.predict_batch(["CCN"], top_bits=3, lane=INTERACTIVE)
+
+        stats = predictor.lanes.stats()
+        assert stats["interactive_tasks"] == 2
+        assert stats["batch_tasks"] == 1
+    finally:
+        predictor.shutdown()
@@ -0,0 +1,81 @@
+"""
+Tests for micro-batching of concurrent single-molecule predictions.
+"""
+
+import asyncio
+import threading
+from typing import List
+
+import pytest
+
+from app.core.micro_batcher import MicroBatcher
+from app.ml.predictor import BBBPredictor
+
+
+class RecordingProcess:
+    """Doubles its inputs and records the size of every batch."""
+
+    def __init__(self) -> None:
+        self.batches: List[List[int]] = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, items: List[int]) -> List[int]:
+        self.release.wait()
+        self.batches.append(list(items))
+        return [item * 2 for item in items]
+
+
+async def test_concurrent_items_share_batches() -> None:
+    process = RecordingProcess()
+    process.release.clear()
+    batcher = MicroBatcher(process, max_batch_size=8, max_wait_ms=1.0)
+
+    first = asyncio.ensure_future(batcher.submit(0))
+    await asyncio.sleep(0.01)  # First batch is running (blocked) in the threadpool
+    rest = [asyncio.ensure_future(batcher.submit(i)) for i in range(1, 21)]
+    await asyncio.sleep(0.01)
+    process.release.set()
+
+    assert await first == 0
+    assert await asyncio.gather(*rest) == [i * 2 for i in range(1, 21)]
+    # Queued items were taken in batches of at most max_batch_size, in order
+    assert [len(batch) for batch in process.batches] == [1, 8, 8, 4]
+    assert [item for batch in process.batches for item in batch] == list(range(21))
+    assert batcher.stats()["items"] == 21
+
+
+async def test_idle_requests_are_not_delayed() -> None:
+    process = RecordingProcess()
+    # A wait window this long would time the test out if it were applied
+    batcher = MicroBatcher(process, max_batch_size=8, max_wait_ms=60_000)
+
+    for i in range(5):
+        assert await asyncio.wait_for(batcher.submit(i), timeout=5) == i * 2
+    assert [len(batch) for batch in process.batches] == [1] * 5
+
+
+async def test_batch_failure_reaches_every_caller() -> None:
+    def failing(items: List[int]) -> List[int]:
+        raise ValueError("boom")
+
+    batcher: MicroBatcher[int, int] = MicroBatcher(failing)
+    results = await asyncio.gather(
+        *[batcher.submit(i) for i in range(3)], return_exceptions=True
+    )
+    assert all(isinstance(result, ValueError) for result in results)
+    assert batcher.stats()["in_flight"] == 0
+
+
+async def test_predictor_micro_batches_concurrent_requests() -> None:
+    predictor = BBBPredictor()
+    assert predictor.micro_batcher is not None
+    smiles = ["CCO", "c1ccccc1O", "INVALID", "CC(=O)Oc1ccccc1C(=O)O"] * 5
+
+    batched = await asyncio.gather(*[predictor.predict_smiles_data(s) for s in smiles])
+    expected = await predictor.predict_batch(smiles)
+
+    assert predictor.micro_batcher.stats()["batches"] < len(smiles)
+    for result, reference in zip(batched, expected):
+        assert result["status"] == reference["status"]
+        assert result["bbb_probability"] == pytest.approx(reference["bbb_probability"])
@@ -0,0 +1,125 @@
+"""
+Tests for serving several named models on one featurization pass.
+"""
+
+from pathlib import Path
+from typing import Iterator
+
+import joblib
+import numpy as np
+import pytest
+from pytest import approx
+from sklearn.ensemble import RandomForestClassifier
+
+from app.core.config import settings
+from app.ml.model_registry import (
+    PRIMARY_MODEL_NAME,
+    ServedModel,
+    load_extra_models,
+    parse_model_spec,
+)
+from app.ml.predictor import BBBPredictor
+
+SMILES = ["CCO", "c1ccccc1O", "CC(=O)OC1=CC=CC=C1C(=O)O", "INVALID_SMILES_123"]
+
+
+@pytest.fixture(scope="module")
+def predictor() -> BBBPredictor:
+    return BBBPredictor()
+
+
+@pytest.fixture
+def candidate_path(tmp_path: Path) -> Path:
+    """A second, smaller forest on the same fingerprint layout."""
+    rng = np.random.RandomState(1)
+    features = rng.randint(0, 2, size=(50, settings.FP_NBITS))
+    model = RandomForestClassifier(n_estimators=10, random_state=1)
+    model.fit(features, rng.randint(0, 2, size=50))
+    path = tmp_path / "candidate.joblib"
+    joblib.dump(model, path)
+    return path
+
+
+@pytest.fixture
+def with_extra_models(
+    predictor: BBBPredictor, candidate_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> Iterator[BBBPredictor]:
+    monkeypatch.setattr(
+        settings,
+        "EXTRA_MODELS_STR",
+        f"candidate={candidate_path}, strict=@0.9, broken=missing.joblib",
+    )
+    predictor._init_inference_backend()
+    yield predictor
+    monkeypatch.setattr(settings, "EXTRA_MODELS_STR", "")
+    predictor._init_inference_backend()
+
+
+def test_parse_model_spec() -> None:
+    assert parse_model_spec("candidate=models/v2.joblib") == (
+        "candidate",
+        "models/v2.joblib",
+        0.5,
+    )
+    assert parse_model_spec("v2 = models/v2.joblib@0.4") == (
+        "v2",
+        "models/v2.joblib",
+        0.4,
+    )
+    assert parse_model_spec("strict=@0.7") == ("strict", None, 0.7)
+    for bad in ("no_separator", "=models/v2.joblib", "x=@1.5"):
+        with pytest.raises(ValueError):
+            parse_model_spec(bad)
+
+
+def test_load_extra_models_skips_broken_entries(predictor: BBBPredictor) -> None:
+    primary = predictor.served_models[PRIMARY_MODEL_NAME]
+    models = load_extra_models(
+        ["strict=@0.8", "default=@0.3", "gone=missing.joblib", "garbage"], primary
+    )
+    assert list(models) == ["strict"]
+    assert isinstance(models["strict"], ServedModel)
+    # Threshold variants share the primary forest instead of rebuilding it
+    assert models["strict"].forest is primary.forest
+    assert models["strict"].threshold == 0.8
+
+
+async def test_predict_batch_with_extra_models(
+    with_extra_models: BBBPredictor,
+) -> None:
+    predictor = with_extra_models
+    assert list(predictor.served_models) == [PRIMARY_MODEL_NAME, "candidate", "strict"]
+
+    results = await predictor.predict_batch(
+        SMILES, models=["candidate", "strict", "default"]
+    )
+    plain = await predictor.predict_batch(SMILES)
+    candidate = predictor.served_models["candidate"]
+
+    for result, plain_result in zip(results, plain):
+        assert result["status"] == plain_result["status"]
+        if result["status"] != "success":
+            assert "model_predictions" not in result
+            continue
+        assert result["bbb_probability"] == approx(plain_result["bbb_probability"])
+        predictions = result["model_predictions"]
+        assert list(predictions) == ["candidate", "strict", "default"]
+        assert predictions["default"]["bbb_probability"] == approx(
+            result["bbb_probability"]
+        )
+        assert predictions["strict"]["bbb_probability"] == approx(
+            result["bbb_probability"]
+        )
+        assert predictions["strict"]["prediction_class"] == (
+            "permeable" if result["bbb_probability"] >= 0.9 else "non_permeable"
+        )
+        features = np.zeros((1, settings.FP_NBITS))
+        features[0, result["fingerprint_on_bits"]] = 1
+        expected = candidate.predict_proba(features)[0]
+        assert predictions["candidate"]["bbb_probability"] == approx(expected)
+        assert predictions["candidate"]["model_version"] == "candidate"
+
+
+async def test_unknown_model_name_is_rejected(predictor: BBBPredictor) -> None:
+    with pytest.raises(ValueError, match="Unknown model"):
+        await predictor.predict_smiles_data("CCO", models=["does_not_exist"])
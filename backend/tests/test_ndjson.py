@@ -0,0 +1,32 @@
+"""
+Tests for incremental line splitting of streamed request bodies.
+"""
+
+from typing import AsyncIterator, List, Optional, Tuple
+
+from app.core.ndjson import iter_lines
+
+
+async def _collect(
+    chunks: List[bytes], max_line_bytes: int = 100
+) -> List[Tuple[int, Optional[str]]]:
+    async def stream() -> AsyncIterator[bytes]:
+        for chunk in chunks:
+            yield chunk
+
+    return [line async for line in iter_lines(stream(), max_line_bytes)]
+
+
+async def test_lines_split_across_chunks() -> None:
+    lines = await _collect([b"CC", b"O\nc1cc", b"ccc1\r\n\n", b'{"smiles": "N"}'])
+    assert lines == [(1, "CCO"), (2, "c1ccccc1"), (3, ""), (4, '{"smiles": "N"}')]
+
+
+async def test_long_lines_are_dropped_without_buffering() -> None:
+    lines = await _collect([b"C" * 8, b"C" * 8 + b"\nCCO\n", b"N" * 20], 10)
+    assert lines == [(1, None), (2, "CCO"), (3, None)]
+
+
+async def test_invalid_utf8_is_replaced() -> None:
+    lines = await _collect([b"C\xffO\n"])
+    assert lines == [(1, "C�O")]
@@ -0,0 +1,98 @@
+"""
+Parity tests between the sklearn and onnxruntime inference backends.
+"""
+
+from pathlib import Path
+from typing import Iterator, List
+
+import numpy as np
+import pytest
+from pytest import approx
+from rdkit import Chem
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("skl2onnx")
+
+from app.core.config import settings
+from app.ml.onnx_backend import OnnxForestBackend, export_forest_to_onnx
+from app.ml.predictor import BBBPredictor
+from app.ml.validate import load_labelled_smiles
+
+PARITY_TOLERANCE = 1e-5
+
+
+@pytest.fixture(scope="module")
+def predictor() -> Iterator[BBBPredictor]:
+    pred = BBBPredictor()
+    assert pred.is_loaded
+    yield pred
+    settings.INFERENCE_BACKEND = "sklearn"
+
+
+@pytest.fixture(scope="module")
+def sample_smiles() -> List[str]:
+    """B3DB sample molecules plus the head of the training set."""
+    b3db, _ = load_labelled_smiles(
+        settings.PROJECT_ROOT / "sample_data" / "B3DB_50 mol.csv"
+    )
+    training, _ = load_labelled_smiles(
+        settings.PROJECT_ROOT / "sample_data" / "training_dataset.csv", limit=50
+    )
+    return b3db + training
+
+
+def test_onnx_predict_proba_matches_sklearn(
+    predictor: BBBPredictor, sample_smiles: List[str]
+) -> None:
+    """Raw forest output agrees up to float32 rounding on the sample fingerprints."""
+    assert predictor.model is not None
+    fps = [predictor._prepare_fingerprint(Chem.MolFromSmiles(s)) for s in sample_smiles]
+    X = np.vstack([fp for fp in fps if fp is not None])
+    backend = OnnxForestBackend.from_sklearn(predictor.model, settings.FP_NBITS)
+
+    onnx_proba = backend.predict_proba(X)
+    sklearn_proba = predictor.model.predict_proba(X)
+    assert onnx_proba.shape == sklearn_proba.shape
+    assert np.abs(onnx_proba - sklearn_proba).max() < PARITY_TOLERANCE
+
+
+async def test_pipeline_parity_between_backends(
+    predictor: BBBPredictor, sample_smiles: List[str]
+) -> None:
+    """Both backends produce the same results through the full batch pipeline."""
+    settings.INFERENCE_BACKEND = "sklearn"
+    predictor._init_inference_backend()
+    assert predictor.inference_backend == "sklearn"
+    sklearn_results = await predictor.predict_batch(sample_smiles)
+
+    settings.INFERENCE_BACKEND = "onnx"
+    predictor._init_inference_backend()
+    assert predictor.inference_backend == "onnx"
+    onnx_results = await predictor.predict_batch(sample_smiles)
+
+    assert len(onnx_results) == len(sklearn_results)
+    for sk_result, onnx_result in zip(sklearn_results, onnx_results):
+        assert onnx_result["status"] == sk_result["status"]
+        if sk_result["status"] != "success":
+            continue
+        assert onnx_result["bbb_probability"] == approx(
+            sk_result["bbb_probability"], abs=PARITY_TOLERANCE
+        )
+        assert onnx_result["prediction_class"] == sk_result["prediction_class"]
+        assert onnx_result["applicability_score"] == sk_result["applicability_score"]
+
+
+def test_onnx_backend_loads_exported_file(
+    predictor: BBBPredictor, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    assert predictor.model is not None
+    onnx_path = tmp_path / "model.onnx"
+    onnx_path.write_bytes(export_forest_to_onnx(predictor.model, settings.FP_NBITS))
+    monkeypatch.setattr(settings, "ONNX_MODEL_PATH", str(onnx_path))
+    monkeypatch.setattr(settings, "INFERENCE_BACKEND", "onnx")
+
+    predictor._init_inference_backend()
+    assert predictor.inference_backend == "onnx"
+    X = np.zeros((2, settings.FP_NBITS), dtype=np.int_)
+    expected = predictor.model.predict_proba(X)[:, 1]
+    assert predictor._predict_proba(X) == approx(expected, abs=PARITY_TOLERANCE)
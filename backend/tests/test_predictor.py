@@ -163,8 +163,29 @@ class TestBBBPredictor:
         assert data.get("fingerprint_hash") is not None  # Aspirin should have a hash
         if data.get("fingerprint_hash") is not None:  # Check type only if present
             assert isinstance(data["fingerprint_hash"], str)
+        # Ensemble disagreement comes from the same per-tree pass as the probability
+        assert data["bbb_probability_std"] >= 0
+        assert (
+            data["bbb_probability_ci_low"]
+            <= data["bbb_probability"]
+            <= data["bbb_probability_ci_high"]
+        )
+        assert data["trees_evaluated"] == len(predictor_with_model.model.estimators_)
         assert "error" not in data or data["error"] is None  # Existing check
 
+    @pytest.mark.asyncio
+    async def test_predict_smiles_data_results_are_independent(
+        self, predictor_with_model: BBBPredictor
+    ) -> None:
+        """A cached result's nested values are not shared between callers."""
+        first = await predictor_with_model.predict_smiles_data("CCO")
+        bits = list(first["fingerprint_on_bits"])
+        first["fingerprint_on_bits"].append(-1)
+        second = await predictor_with_model.predict_smiles_data("OCC")
+        assert predictor_with_model.prediction_cache.stats()["hits"] == 1
+        assert second["fingerprint_on_bits"] == bits
+        assert second["smiles"] == "OCC"
+
     @pytest.mark.asyncio
     async def test_predict_smiles_data_invalid_smiles(
         self, predictor_instance: BBBPredictor
@@ -244,3 +265,29 @@ async def test_model_not_loaded_predict_smiles_data() -> None:
         # Let's assume for this test case, we simulate is_loaded being False manually for the check.
         predictor.is_loaded = False  # Manually set for test purpose
         await predictor.predict_smiles_data("CCO")
+
+
+@pytest.mark.asyncio
+async def test_predict_batch_matches_single_predictions() -> None:
+    """The vectorized batch path returns the same predictions as the single path."""
+    predictor = BBBPredictor()
+    smiles_list = [
+        "CCO",
+        "c1ccccc1O",
+        "CC(=O)OC1=CC=CC=C1C(=O)O",
+        "CN1CCC[C@H]1c1cccnc1",
+    ]
+
+    batch_results = await predictor.predict_batch(smiles_list)
+    for smiles, batch_result in zip(smiles_list, batch_results):
+        single_result = await predictor.predict_smiles_data(smiles)
+        assert batch_result["status"] == single_result["status"] == "success"
+        assert batch_result["bbb_probability"] == approx(
+            single_result["bbb_probability"]
+        )
+        assert (
+            batch_result["applicability_score"] == single_result["applicability_score"]
+        )
+        assert (
+            batch_result["fingerprint_on_bits"] == single_result["fingerprint_on_bits"]
+        )
@@ -0,0 +1,139 @@
+"""
+Tests for the per-client token-bucket rate limiter and its backends.
+"""
+
+from typing import Any
+
+import pytest
+from starlette.requests import HTTPConnection
+
+from app.core.rate_limit import (
+    BATCH_MOLECULE,
+    EXPLAIN,
+    PREDICTION,
+    MemoryBucketBackend,
+    RateLimited,
+    RateLimiter,
+    RedisBucketBackend,
+)
+from conftest import FakeClock
+
+
+class FailingBackend:
+    name = "failing"
+
+    async def take(self, key: str, cost: float, rate: float, burst: float) -> float:
+        raise ConnectionError("backend down")
+
+    async def close(self) -> None:
+        pass
+
+
+async def test_memory_bucket_refills_and_waits(clock: FakeClock) -> None:
+    backend = MemoryBucketBackend(max_keys=2, clock=clock)
+
+    # A new key starts with a full bucket of 3 tokens, refilled at 1 token/s
+    assert [await backend.take("a", 1, 1.0, 3) for _ in range(3)] == [0.0] * 3
+    assert await backend.take("a", 2, 1.0, 3) == pytest.approx(2.0)
+    clock.now += 1.5
+    assert await backend.take("a", 1, 1.0, 3) == 0.0
+    assert await backend.take("a", 1, 1.0, 3) == pytest.approx(0.5)
+
+    # Keys have separate buckets; the least recently used one is dropped
+    assert await backend.take("b", 3, 1.0, 3) == 0.0
+    assert await backend.take("c", 3, 1.0, 3) == 0.0
+    assert len(backend) == 2
+    assert await backend.take("a", 3, 1.0, 3) == 0.0
+
+
+async def test_limiter_costs_per_class() -> None:
+    limiter = RateLimiter(
+        tokens_per_s=1.0,
+        burst=10.0,
+        costs={PREDICTION: 1.0, EXPLAIN: 5.0, BATCH_MOLECULE: 0.01},
+    )
+    assert await limiter.take("k", EXPLAIN) == 0.0
+    assert await limiter.take("k", BATCH_MOLECULE, 300) == 0.0
+    assert await limiter.take("k", PREDICTION) == 0.0
+    assert await limiter.take("k", EXPLAIN) > 0.0
+    assert limiter.stats()["limited"] == {PREDICTION: 0, EXPLAIN: 1, BATCH_MOLECULE: 0}
+
+    # A batch costing more than the burst takes the whole bucket
+    assert await limiter.take("other", BATCH_MOLECULE, 100000) == 0.0
+    assert await limiter.take("other", PREDICTION) > 0.0
+
+    disabled = RateLimiter(burst=1.0, enabled=False)
+    assert await disabled.take("k", EXPLAIN, 100) == 0.0
+
+
+async def test_refund_gives_tokens_back_up_to_the_burst() -> None:
+    limiter = RateLimiter(tokens_per_s=0.001, burst=2.0)
+    connection = HTTPConnection(
+        {"type": "http", "headers": [], "client": ("1.2.3.4", 1)}
+    )
+    await limiter.charge(connection, PREDICTION)
+    await limiter.charge(connection, PREDICTION)
+    with pytest.raises(RateLimited):
+        await limiter.charge(connection, PREDICTION)
+
+    await limiter.refund(connection, PREDICTION)
+    await limiter.charge(connection, PREDICTION)
+    assert limiter.stats()["allowed"][PREDICTION] == 2
+
+    # A full bucket does not grow past the burst
+    for _ in range(3):
+        await limiter.refund(connection, PREDICTION)
+    assert await limiter.take("ip:1.2.3.4", PREDICTION, 2) == 0.0
+    assert await limiter.take("ip:1.2.3.4", PREDICTION) > 0.0
+
+
+async def test_redis_buckets_are_shared() -> None:
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    limiters = [
+        RateLimiter(
+            tokens_per_s=1.0,
+            burst=3.0,
+            backend=RedisBucketBackend(fakeredis.FakeAsyncRedis(server=server)),
+        )
+        for _ in range(2)
+    ]
+    try:
+        waits = [await limiter.take("k", PREDICTION) for limiter in limiters * 2]
+        assert waits[:3] == [0.0, 0.0, 0.0]
+        assert 0.9 < waits[3] <= 1.0
+        # Tokens given back are shared too
+        await limiters[0]._take("k", -1.0)
+        assert await limiters[1].take("k", PREDICTION) == 0.0
+        assert await limiters[0].take("another", PREDICTION) == 0.0
+
+        # Buckets expire once they would be full again
+        client: Any = fakeredis.FakeAsyncRedis(server=server)
+        assert 0 < await client.pttl("vitronmax:ratelimit:k") <= 4000
+        assert limiters[0].stats()["backend"] == "redis"
+        assert limiters[0].stats()["local_keys"] == 0
+    finally:
+        for limiter in limiters:
+            await limiter.close()
+
+
+async def test_failing_shared_backend_falls_back_to_local_buckets(
+    clock: FakeClock,
+) -> None:
+    limiter = RateLimiter(
+        tokens_per_s=0.001,
+        burst=2.0,
+        backend=FailingBackend(),
+        backend_retry_s=5.0,
+        clock=clock,
+    )
+    assert await limiter.take("k", PREDICTION) == 0.0
+    assert await limiter.take("k", PREDICTION) == 0.0
+    assert await limiter.take("k", PREDICTION) > 0.0
+    # The backend is not asked again until the retry time has passed
+    assert limiter.stats()["backend_errors"] == 1
+    assert limiter.stats()["backend_failing"] is True
+
+    clock.now += 5.0
+    assert await limiter.take("k", PREDICTION) > 0.0
+    assert limiter.stats()["backend_errors"] == 2
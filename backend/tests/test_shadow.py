@@ -0,0 +1,126 @@
+"""
+Tests for shadow-mode scoring of a candidate model.
+"""
+
+import time
+from typing import Iterator, Tuple
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from app.core.config import settings
+from app.ml.model_registry import ServedModel
+from app.ml.predictor import BBBPredictor
+from app.ml.shadow import ShadowEvaluator
+
+
+@pytest.fixture(scope="module")
+def forests(fingerprint_data: Tuple[np.ndarray, np.ndarray]) -> Iterator[tuple]:
+    X, y = fingerprint_data
+    primary = RandomForestClassifier(n_estimators=20, random_state=0).fit(X, y)
+    candidate = RandomForestClassifier(n_estimators=20, random_state=1).fit(X, y)
+    yield primary, candidate, X
+
+
+def test_identical_models_never_disagree(forests: tuple) -> None:
+    primary_model, _, X = forests
+    primary = ServedModel("default", primary_model)
+    shadow = ShadowEvaluator(primary, ServedModel("copy", primary_model), 1.0)
+
+    shadow.submit(X, primary.predict_proba(X))
+    shadow.close()
+    stats = shadow.stats()
+
+    assert stats["sampled"] == len(X)
+    assert stats["pending"] == 0
+    assert stats["total"]["n"] == len(X)
+    assert stats["total"]["class_disagreements"] == 0
+    assert stats["total"]["max_abs_diff"] == pytest.approx(0.0)
+    # close() flushed the window
+    assert stats["last_flushed"]["n"] == len(X)
+    assert stats["window"]["n"] == 0
+
+
+def test_candidate_disagreement_is_measured(forests: tuple) -> None:
+    primary_model, candidate_model, X = forests
+    primary = ServedModel("default", primary_model)
+    candidate = ServedModel("candidate", candidate_model, threshold=0.7)
+    shadow = ShadowEvaluator(primary, candidate, 1.0)
+
+    primary_proba = primary.predict_proba(X)
+    shadow.submit(X, primary_proba)
+    shadow.close()
+    total = shadow.stats()["total"]
+
+    candidate_proba = candidate.predict_proba(X)
+    expected_flips = np.count_nonzero(
+        (primary_proba >= 0.5) != (candidate_proba >= 0.7)
+    )
+    assert total["class_disagreements"] == expected_flips
+    assert total["mean_abs_diff"] == pytest.approx(
+        np.abs(candidate_proba - primary_proba).mean()
+    )
+
+
+def test_partial_buffer_is_scored_without_new_traffic(forests: tuple) -> None:
+    primary_model, candidate_model, X = forests
+    primary = ServedModel("default", primary_model)
+    shadow = ShadowEvaluator(
+        primary, ServedModel("candidate", candidate_model), 1.0, flush_interval_s=0.05
+    )
+    try:
+        shadow.submit(X[:5], primary.predict_proba(X[:5]))
+        time.sleep(0.5)
+        stats = shadow.stats()
+        # Scored and the window logged by the timer, below batch_size
+        assert stats["pending"] == 0
+        assert stats["total"]["n"] == 5
+        assert stats["window"]["n"] == 0
+        assert stats["last_flushed"]["n"] == 5
+    finally:
+        shadow.close()
+
+
+def test_sampling_and_backlog_limit(forests: tuple) -> None:
+    primary_model, candidate_model, X = forests
+    primary = ServedModel("default", primary_model)
+    candidate = ServedModel("candidate", candidate_model)
+
+    shadow = ShadowEvaluator(primary, candidate, 0.0)
+    shadow.submit(X, primary.predict_proba(X))
+    shadow.close()
+    assert shadow.stats()["sampled"] == 0
+
+    shadow = ShadowEvaluator(primary, candidate, 1.0, max_pending=10)
+    shadow.submit(X, primary.predict_proba(X))
+    shadow.close()
+    stats = shadow.stats()
+    assert stats["sampled"] == 10
+    assert stats["dropped"] == len(X) - 10
+    assert stats["total"]["n"] == 10
+
+
+async def test_predictor_shadows_pipeline_traffic(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(settings, "EXTRA_MODELS_STR", "strict=@0.9")
+    monkeypatch.setattr(settings, "SHADOW_MODEL", "strict")
+    monkeypatch.setattr(settings, "SHADOW_SAMPLE_RATE", 1.0)
+    predictor = BBBPredictor()
+    assert predictor.shadow is not None
+
+    results = await predictor.predict_batch(["CCO", "c1ccccc1O", "INVALID"])
+    shadow = predictor.shadow
+    predictor.shutdown()
+    stats = shadow.stats()
+
+    assert predictor.shadow is None
+    assert stats["candidate"] == "strict"
+    assert stats["total"]["n"] == 2
+    # Same forest, so only the threshold can make the classes differ
+    assert stats["total"]["max_abs_diff"] == pytest.approx(0.0)
+    expected_flips = sum(
+        0.5 <= r["bbb_probability"] < 0.9 for r in results if r["status"] == "success"
+    )
+    assert stats["total"]["class_disagreements"] == expected_flips
@@ -0,0 +1,93 @@
+"""
+Tests for single-flight coalescing of identical in-flight requests.
+"""
+
+import asyncio
+from typing import List
+
+import pytest
+
+from app.core.single_flight import SingleFlight
+from app.ml.predictor import BBBPredictor
+
+
+async def test_concurrent_callers_share_one_computation() -> None:
+    flight: SingleFlight[str] = SingleFlight()
+    calls: List[str] = []
+
+    async def compute(key: str) -> str:
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return key.upper()
+
+    results = await asyncio.gather(
+        *[flight.do(key, lambda key=key: compute(key)) for key in "aaab"]
+    )
+
+    assert results == ["A", "A", "A", "B"]
+    assert sorted(calls) == ["a", "b"]
+    assert flight.stats() == {
+        "in_flight": 0,
+        "started": 2,
+        "coalesced": 2,
+        "abandoned": 0,
+    }
+    # Completed computations are not cached
+    assert await flight.do("a", lambda: compute("a")) == "A"
+    assert len(calls) == 3
+
+
+async def test_errors_are_shared_and_cancellation_is_isolated() -> None:
+    flight: SingleFlight[int] = SingleFlight()
+
+    async def failing() -> int:
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(
+        flight.do("k", failing), flight.do("k", failing), return_exceptions=True
+    )
+    assert all(isinstance(result, ValueError) for result in results)
+
+    async def slow() -> int:
+        await asyncio.sleep(0.05)
+        return 42
+
+    leader = asyncio.ensure_future(flight.do("slow", slow))
+    follower = asyncio.ensure_future(flight.do("slow", slow))
+    await asyncio.sleep(0.01)
+    leader.cancel()
+    assert await follower == 42
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+    # Once every caller is gone the computation itself is cancelled
+    finished: List[bool] = []
+
+    async def tracked() -> int:
+        await asyncio.sleep(0.05)
+        finished.append(True)
+        return 1
+
+    only = asyncio.ensure_future(flight.do("gone", tracked))
+    await asyncio.sleep(0.01)
+    only.cancel()
+    await asyncio.sleep(0.08)
+    assert finished == []
+    assert flight.stats()["abandoned"] == 1
+    assert flight.stats()["in_flight"] == 0
+
+
+async def test_predictor_coalesces_same_molecule() -> None:
+    predictor = BBBPredictor()
+    # Two spellings of ethanol and a different molecule
+    results = await asyncio.gather(
+        predictor.predict_smiles_data("CCO"),
+        predictor.predict_smiles_data("OCC"),
+        predictor.predict_smiles_data("c1ccccc1O"),
+    )
+
+    assert predictor.prediction_flight.stats()["coalesced"] == 1
+    assert [result["smiles"] for result in results] == ["CCO", "OCC", "c1ccccc1O"]
+    assert results[0] is not results[1]
+    assert results[0]["bbb_probability"] == results[1]["bbb_probability"]
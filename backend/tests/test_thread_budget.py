@@ -0,0 +1,52 @@
+"""
+Tests for the CPU quota detection and the thread budget.
+"""
+
+from pathlib import Path
+
+import pytest
+
+from app.core.config import settings
+from app.core.thread_budget import ThreadBudget, detect_cpu_quota
+
+
+def test_detects_cgroup_quota(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("os.sched_getaffinity", lambda pid: set(range(8)))
+
+    assert detect_cpu_quota(tmp_path) == (8.0, "affinity")
+
+    # cgroup v2: a quota of 1.5 CPUs, then no quota at all
+    (tmp_path / "cpu.max").write_text("150000 100000\n")
+    assert detect_cpu_quota(tmp_path) == (1.5, "cgroup")
+    (tmp_path / "cpu.max").write_text("max 100000\n")
+    assert detect_cpu_quota(tmp_path) == (8.0, "affinity")
+
+    # cgroup v1, and a quota above the CPUs the process may run on
+    (tmp_path / "cpu.max").unlink()
+    (tmp_path / "cpu").mkdir()
+    (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("200000")
+    (tmp_path / "cpu" / "cpu.cfs_period_us").write_text("100000")
+    assert detect_cpu_quota(tmp_path) == (2.0, "cgroup")
+    (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("1600000")
+    assert detect_cpu_quota(tmp_path) == (8.0, "affinity")
+
+
+def test_budget_sizes_pools_from_cpus(monkeypatch: pytest.MonkeyPatch) -> None:
+    single = ThreadBudget(1.0, "cgroup")
+    assert single.describe()["interactive_workers"] == 2
+    assert single.batch_workers == 1
+    assert single.app_threads == 4
+    assert single.native_threads == single.model_n_jobs == single.onnx_threads == 1
+
+    # A fractional quota does not add parallelism
+    assert ThreadBudget(1.9, "cgroup").cores == 1
+
+    quad = ThreadBudget(4.0, "affinity")
+    assert quad.interactive_workers == 4
+    assert quad.batch_workers == 2
+    assert quad.app_threads == 16
+
+    monkeypatch.setattr(settings, "BATCH_LANE_WORKERS", 3)
+    monkeypatch.setattr(settings, "NATIVE_THREADS", 2)
+    overridden = ThreadBudget(4.0, "affinity")
+    assert (overridden.batch_workers, overridden.native_threads) == (3, 2)
@@ -0,0 +1,66 @@
+"""
+Tests for the offline validation benchmark.
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from app.core.config import settings
+from app.ml.predictor import BBBPredictor
+from app.ml.validate import load_labelled_smiles, main, run_validation
+
+B3DB_SAMPLE = settings.PROJECT_ROOT / "sample_data" / "B3DB_50 mol.csv"
+
+
+@pytest.fixture(scope="module")
+def predictor() -> BBBPredictor:
+    pred = BBBPredictor()
+    assert pred.is_loaded
+    return pred
+
+
+def test_load_b3db_export_with_quoted_rows() -> None:
+    """Rows wrapped in a single quoted field are unwrapped and BBB+/- mapped to 1/0."""
+    smiles_list, labels = load_labelled_smiles(B3DB_SAMPLE)
+    assert len(smiles_list) > 40
+    assert len(smiles_list) == len(labels)
+    assert smiles_list[0].startswith("O=C(O)c1cc(N=Nc2ccc")
+    assert set(labels) <= {0, 1}
+
+
+def test_load_training_dataset_with_limit() -> None:
+    path = settings.PROJECT_ROOT / "sample_data" / "training_dataset.csv"
+    smiles_list, labels = load_labelled_smiles(path, limit=10)
+    assert len(smiles_list) == 10
+    assert set(labels) <= {0, 1}
+
+
+def test_run_validation_report(predictor: BBBPredictor) -> None:
+    smiles_list = ["CCO", "c1ccccc1", "CC(=O)OC1=CC=CC=C1C(=O)O", "INVALID"]
+    labels = [1, 1, 0, 0]
+    report = run_validation(predictor, smiles_list, labels, chunk_size=2)
+
+    assert report["n_molecules"] == 4
+    assert report["n_scored"] == 3
+    assert report["n_failed"] == 1
+    assert report["status_counts"]["error_invalid_smiles"] == 1
+    assert report["metrics"]["auc_roc"] is not None
+    assert 0.0 <= report["metrics"]["auc_pr"] <= 1.0
+    assert report["throughput"]["molecules_per_second"] > 0
+    for stage in ("parse", "descriptors", "fingerprint", "inference", "similarity"):
+        assert report["stage_timings_s"][stage] >= 0.0
+    assert report["memory"]["peak_rss_mb"] > 0
+
+
+def test_main_writes_json_report(tmp_path: Path) -> None:
+    dataset = tmp_path / "tiny.csv"
+    dataset.write_text("smiles,label\nCCO,1\nCC(=O)O,0\n")
+    output = tmp_path / "report.json"
+
+    assert main([str(dataset), "--output", str(output)]) == 0
+    report = json.loads(output.read_text())
+    assert report["n_molecules"] == 2
+    assert report["model_version"] == settings.MODEL_VERSION
+    assert "molecules_per_second" in report["throughput"]
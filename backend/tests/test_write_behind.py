@@ -0,0 +1,130 @@
+"""
+Tests for the write-behind queue of single predictions.
+"""
+
+import asyncio
+import threading
+from typing import Any, Dict, List
+
+from app.core.write_behind import RecordRejected, WriteBehindQueue
+
+
+class RecordingWriter:
+    """Bulk writer that records its batches and fails the first ``failures`` calls."""
+
+    def __init__(self, failures: int = 0, block: bool = False) -> None:
+        self.batches: List[List[Dict[str, Any]]] = []
+        self.calls = 0
+        self.failures = failures
+        self.release = threading.Event()
+        if not block:
+            self.release.set()
+
+    def __call__(self, rows: List[Dict[str, Any]]) -> None:
+        self.calls += 1
+        self.release.wait(5)
+        if self.calls <= self.failures:
+            raise RuntimeError("database unavailable")
+        self.batches.append(rows)
+
+
+async def test_flushes_full_batches_and_partial_ones_after_interval() -> None:
+    writer = RecordingWriter()
+    queue = WriteBehindQueue(writer, batch_size=3, flush_interval_s=0.2)
+    queue.start()
+
+    for i in range(7):
+        assert queue.submit({"i": i})
+    await asyncio.sleep(0.05)
+    # Two full batches go at once; the seventh record waits for the interval
+    assert [len(batch) for batch in writer.batches] == [3, 3]
+    assert queue.stats()["queued"] == 1
+
+    await asyncio.sleep(0.3)
+    assert [row["i"] for batch in writer.batches for row in batch] == list(range(7))
+    assert queue.stats()["written"] == 7
+    assert queue.stats()["flushes"] == 3
+    await queue.close()
+
+
+async def test_retries_with_backoff_then_gives_up() -> None:
+    writer = RecordingWriter(failures=2)
+    queue = WriteBehindQueue(
+        writer, batch_size=2, max_retries=2, retry_base_s=0.01, retry_max_s=0.02
+    )
+    queue.start()
+    queue.submit({"i": 0})
+    queue.submit({"i": 1})
+    await asyncio.sleep(0.2)
+    assert writer.calls == 3
+    assert queue.stats()["written"] == 2
+    assert queue.stats()["retries"] == 2
+
+    # Past max_retries the batch is counted as failed and the queue moves on
+    writer.failures = 10
+    queue.submit({"i": 2})
+    queue.submit({"i": 3})
+    await asyncio.sleep(0.2)
+    stats = queue.stats()
+    assert stats["failed"] == 2
+    assert stats["queued"] == 0
+    await queue.close()
+
+
+async def test_rejected_batch_is_written_one_by_one() -> None:
+    batches: List[List[Dict[str, Any]]] = []
+
+    def write(rows: List[Dict[str, Any]]) -> None:
+        if any(row.get("bad") for row in rows):
+            raise RecordRejected("invalid input syntax")
+        batches.append(rows)
+
+    queue = WriteBehindQueue(write, batch_size=4, flush_interval_s=10)
+    queue.start()
+    for i in range(4):
+        queue.submit({"i": i, "bad": i == 2})
+    await asyncio.sleep(0.05)
+
+    # Only the bad record is lost, and a rejection is not retried
+    assert [row["i"] for batch in batches for row in batch] == [0, 1, 3]
+    stats = queue.stats()
+    assert stats["written"] == 3
+    assert stats["failed"] == 1
+    assert stats["retries"] == 0
+    await queue.close()
+
+
+async def test_bounded_and_drained_on_close() -> None:
+    writer = RecordingWriter(block=True)
+    queue = WriteBehindQueue(writer, max_size=4, batch_size=2, flush_interval_s=10)
+    queue.start()
+
+    # The first batch is taken by the (blocked) writer, then the queue fills up
+    queue.submit({"i": 0})
+    queue.submit({"i": 1})
+    await asyncio.sleep(0.05)
+    accepted = [queue.submit({"i": i}) for i in range(2, 8)]
+    assert accepted == [True] * 4 + [False] * 2
+    assert queue.stats()["dropped"] == 2
+
+    writer.release.set()
+    await queue.close(timeout_s=5)
+    assert sum(len(batch) for batch in writer.batches) == 6
+    assert queue.stats()["queued"] == 0
+    # Nothing is accepted once closed
+    assert not queue.submit({"i": 8})
+
+
+async def test_close_gives_up_after_timeout() -> None:
+    writer = RecordingWriter(failures=100)
+    queue = WriteBehindQueue(writer, batch_size=1, retry_base_s=1.0)
+    queue.start()
+    for i in range(3):
+        queue.submit({"i": i})
+    await asyncio.sleep(0.05)
+
+    await queue.close(timeout_s=0.1)
+    stats = queue.stats()
+    assert stats["queued"] == 0
+    # The batch being retried counts as failed along with the queued ones
+    assert stats["failed"] == 3